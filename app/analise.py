@@ -0,0 +1,524 @@
+import calendar
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.metricas import contar_linhas
+from app.models import GranularidadeReceita, ReceitaPeriodo, ReceitaVendas, ResumoVendas, TipoVeiculo, Veiculo, Venda
+
+
+_TIPOS = list(TipoVeiculo)
+_CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(_TIPOS)}
+_DESCONHECIDO = "Desconhecido"
+_COLUNAS_VENDAS = ("ativo", "data", "mes", "valor", "preco", "funcionario", "veiculo")
+
+# Máximo de períodos em uma consulta de receita (pouco mais de 27 anos dia a dia)
+LIMITE_PERIODOS = 10000
+# Dias cobertos pelas somas diárias na primeira venda; a faixa dobra quando preciso
+_DIAS_INICIAIS = 1024
+
+
+def _crescer(coluna: np.ndarray, tamanho: int, preenchimento=0) -> np.ndarray:
+    # Dobra a capacidade para que as inclusões custem O(1) amortizado
+    if tamanho <= len(coluna):
+        return coluna
+    nova = np.full(max(tamanho, 2 * len(coluna), 1024), preenchimento, dtype=coluna.dtype)
+    nova[:len(coluna)] = coluna
+    return nova
+
+
+class ColunasVeiculos:
+    """
+    Atributos dos veículos usados nas análises, em colunas indexadas pelo ID
+
+    Marca e tipo são guardados como códigos inteiros (-1 para veículos
+    removidos), o que permite juntar cada venda ao seu veículo com uma simples
+    indexação de array.
+    """
+
+    def __init__(self):
+        self.preco = np.zeros(0, dtype=np.float64)
+        self.tipo = np.zeros(0, dtype=np.int16)
+        self.marca = np.zeros(0, dtype=np.int32)
+        self.nomes_marcas: List[str] = []
+        self._codigo_marca: Dict[str, int] = {}
+
+    def definir(self, veiculo: Veiculo) -> None:
+        self.definir_lote([veiculo])
+
+    def definir_lote(self, veiculos: List[Veiculo]) -> None:
+        """
+        Grava os atributos de vários veículos com uma atribuição vetorizada por coluna
+        """
+        if not veiculos:
+            return
+        ids = np.fromiter((veiculo.id for veiculo in veiculos), dtype=np.int64, count=len(veiculos))
+        tamanho = int(ids.max()) + 1
+        self.preco = _crescer(self.preco, tamanho, np.nan)
+        self.tipo = _crescer(self.tipo, tamanho, -1)
+        self.marca = _crescer(self.marca, tamanho, -1)
+        for veiculo in veiculos:
+            if veiculo.marca not in self._codigo_marca:
+                self._codigo_marca[veiculo.marca] = len(self.nomes_marcas)
+                self.nomes_marcas.append(veiculo.marca)
+        self.preco[ids] = [veiculo.preco for veiculo in veiculos]
+        self.tipo[ids] = [_CODIGO_TIPO[TipoVeiculo(veiculo.tipo)] for veiculo in veiculos]
+        self.marca[ids] = [self._codigo_marca[veiculo.marca] for veiculo in veiculos]
+
+    def remover(self, veiculo_id: int) -> None:
+        if veiculo_id < len(self.preco):
+            self.preco[veiculo_id] = np.nan
+            self.tipo[veiculo_id] = -1
+            self.marca[veiculo_id] = -1
+
+    def secoes(self) -> Dict[str, np.ndarray]:
+        """
+        Cópia das colunas, para gravação em uma publicação (veja de_secoes)
+        """
+        return {"preco": self.preco.copy(), "tipo": self.tipo.copy(), "marca": self.marca.copy()}
+
+    @classmethod
+    def de_secoes(cls, secoes: Dict[str, np.ndarray], nomes_marcas: List[str]) -> "ColunasVeiculos":
+        """
+        Colunas somente leitura sobre arrays já prontos, como os de uma publicação mapeada em memória
+        """
+        colunas = cls()
+        colunas.preco, colunas.tipo, colunas.marca = secoes["preco"], secoes["tipo"], secoes["marca"]
+        colunas.nomes_marcas = nomes_marcas
+        return colunas
+
+    def coluna(self, coluna: np.ndarray, veiculo_ids: np.ndarray, padrao) -> np.ndarray:
+        """
+        Junta a coluna de veículos às vendas; IDs desconhecidos recebem o valor padrão
+        """
+        conhecidos = veiculo_ids < len(coluna)
+        resultado = np.full(len(veiculo_ids), padrao, dtype=coluna.dtype)
+        resultado[conhecidos] = coluna[veiculo_ids[conhecidos]]
+        return resultado
+
+
+class ColunasVendas:
+    """
+    Cópia colunar das vendas, mantida ao lado das tabelas, para análises vetorizadas
+
+    Cada venda ocupa uma posição nos arrays; remoções apenas desligam a
+    posição, e os arrays são compactados quando metade deles está ociosa.
+    """
+
+    def __init__(self, veiculos: ColunasVeiculos):
+        self.veiculos = veiculos
+        self._tamanho = 0
+        self._ativos = 0
+        self._posicao: Dict[int, int] = {}
+        self.ativo = np.zeros(0, dtype=bool)
+        self.data = np.zeros(0, dtype=np.int32)
+        self.mes = np.zeros(0, dtype=np.int32)
+        self.valor = np.zeros(0, dtype=np.float64)
+        self.preco = np.zeros(0, dtype=np.float64)
+        self.funcionario = np.zeros(0, dtype=np.int64)
+        self.veiculo = np.zeros(0, dtype=np.int64)
+
+    def adicionar(self, venda: Venda, preco: Optional[float]) -> None:
+        """
+        Inclui a venda com o preço de tabela do veículo no momento em que ela foi registrada (None se desconhecido)
+        """
+        self.adicionar_lote([venda], [preco])
+
+    def adicionar_lote(self, vendas: List[Venda], precos: Sequence[Optional[float]]) -> None:
+        """
+        Inclui várias vendas, cada uma com o seu preço de tabela (como em adicionar), no fim dos arrays
+        """
+        inicio = self._tamanho
+        self._tamanho += len(vendas)
+        for nome in _COLUNAS_VENDAS:
+            setattr(self, nome, _crescer(getattr(self, nome), self._tamanho))
+        fim = self._tamanho
+        datas = [venda.data_venda for venda in vendas]
+        self.ativo[inicio:fim] = True
+        self.data[inicio:fim] = [data.toordinal() for data in datas]
+        self.mes[inicio:fim] = [data.year * 12 + data.month - 1 for data in datas]
+        self.valor[inicio:fim] = [venda.valor_venda for venda in vendas]
+        # None vira NaN na conversão para float64
+        self.preco[inicio:fim] = np.array(precos, dtype=np.float64)
+        self.funcionario[inicio:fim] = [venda.funcionario_id for venda in vendas]
+        self.veiculo[inicio:fim] = [venda.veiculo_id for venda in vendas]
+        self._posicao.update(zip((venda.id for venda in vendas), range(inicio, fim)))
+        self._ativos += len(vendas)
+
+    def remover(self, venda_id: int) -> None:
+        posicao = self._posicao.pop(venda_id, None)
+        if posicao is None:
+            return
+        self.ativo[posicao] = False
+        self._ativos -= 1
+        if self._tamanho > 1024 and self._ativos < self._tamanho // 2:
+            self._compactar()
+
+    def _compactar(self) -> None:
+        manter = np.flatnonzero(self.ativo[:self._tamanho])
+        nova_posicao = np.full(self._tamanho, -1, dtype=np.int64)
+        nova_posicao[manter] = np.arange(len(manter))
+        self._posicao = {venda_id: int(nova_posicao[posicao]) for venda_id, posicao in self._posicao.items()}
+        for nome in _COLUNAS_VENDAS:
+            setattr(self, nome, getattr(self, nome)[manter].copy())
+        self._tamanho = len(manter)
+
+    def secoes(self) -> Dict[str, np.ndarray]:
+        """
+        Cópia compactada das colunas (só as vendas ativas), para gravação em uma publicação
+        """
+        ativo = self.ativo[:self._tamanho]
+        return {nome: getattr(self, nome)[:self._tamanho][ativo] for nome in _COLUNAS_VENDAS}
+
+    @classmethod
+    def de_secoes(cls, secoes: Dict[str, np.ndarray], veiculos: ColunasVeiculos) -> "ColunasVendas":
+        """
+        Colunas somente leitura sobre arrays já prontos, como os de uma publicação mapeada em memória
+        """
+        colunas = cls(veiculos)
+        for nome in _COLUNAS_VENDAS:
+            setattr(colunas, nome, secoes[nome])
+        colunas._tamanho = colunas._ativos = len(colunas.ativo)
+        return colunas
+
+    def agrupar(
+        self,
+        dimensao: str,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> List[ResumoVendas]:
+        """
+        Soma quantidade, receita, preço de tabela e desconto das vendas por dimensão
+
+        Dimensões: "mes", "vendedor", "tipo", "marca" ou "total". O preço de
+        tabela é o do momento da venda, o mesmo do desconto no ranking. Todo o
+        cálculo é feito com operações vetorizadas do NumPy sobre as colunas.
+        """
+        contar_linhas(self._tamanho)
+        mascara = self.ativo[:self._tamanho].copy()
+        if data_inicial is not None:
+            mascara &= self.data[:self._tamanho] >= data_inicial.toordinal()
+        if data_final is not None:
+            mascara &= self.data[:self._tamanho] <= data_final.toordinal()
+
+        valor = self.valor[:self._tamanho][mascara]
+        veiculo = self.veiculo[:self._tamanho][mascara]
+        preco = self.preco[:self._tamanho][mascara]
+
+        if dimensao == "mes":
+            chaves = self.mes[:self._tamanho][mascara]
+        elif dimensao == "vendedor":
+            chaves = self.funcionario[:self._tamanho][mascara]
+        elif dimensao == "tipo":
+            chaves = self.veiculos.coluna(self.veiculos.tipo, veiculo, -1).astype(np.int64)
+        elif dimensao == "marca":
+            chaves = self.veiculos.coluna(self.veiculos.marca, veiculo, -1).astype(np.int64)
+        elif dimensao == "total":
+            chaves = np.zeros(len(valor), dtype=np.int64)
+        else:
+            raise ValueError(f"Dimensão desconhecida: {dimensao}")
+
+        if not len(valor):
+            return []
+
+        grupos, inverso = np.unique(chaves, return_inverse=True)
+        inverso = inverso.reshape(-1)
+        # Desconto só faz sentido para vendas cujo veículo existia quando foram registradas
+        conhecido = ~np.isnan(preco)
+        quantidade = np.bincount(inverso, minlength=len(grupos))
+        receita = np.bincount(inverso, weights=valor, minlength=len(grupos))
+        preco_tabela = np.bincount(inverso, weights=np.where(conhecido, preco, 0), minlength=len(grupos))
+        receita_conhecida = np.bincount(inverso, weights=np.where(conhecido, valor, 0), minlength=len(grupos))
+        desconto = preco_tabela - receita_conhecida
+
+        resultado = [
+            ResumoVendas(
+                grupo=self._nome_grupo(dimensao, int(grupo)),
+                quantidade=int(quantidade[i]),
+                receita=float(receita[i]),
+                preco_tabela=float(preco_tabela[i]),
+                desconto=float(desconto[i]),
+                desconto_percentual=float(desconto[i] / preco_tabela[i] * 100) if preco_tabela[i] else 0.0
+            )
+            for i, grupo in enumerate(grupos)
+        ]
+        if dimensao != "mes":
+            resultado.sort(key=lambda resumo: resumo.receita, reverse=True)
+        return resultado
+
+    def _nome_grupo(self, dimensao: str, grupo: int) -> str:
+        if dimensao == "mes":
+            return f"{grupo // 12:04d}-{grupo % 12 + 1:02d}"
+        if dimensao == "vendedor":
+            return str(grupo)
+        if dimensao == "tipo":
+            return _TIPOS[grupo].value if grupo >= 0 else _DESCONHECIDO
+        if dimensao == "marca":
+            return self.veiculos.nomes_marcas[grupo] if grupo >= 0 else _DESCONHECIDO
+        return "total"
+
+
+def verificar_intervalo(inicio: Optional[date], fim: Optional[date]) -> None:
+    """
+    Recusa um intervalo informado com inicio depois de fim
+    """
+    if inicio is not None and fim is not None and inicio > fim:
+        raise ValueError(f"O início do intervalo ({inicio}) é posterior ao fim ({fim})")
+
+
+def limites_periodos(inicio: date, fim: date, granularidade: str) -> List[int]:
+    """
+    Ordinais do primeiro dia de cada período entre inicio e fim, seguidos do dia seguinte a fim
+
+    O primeiro e o último período são recortados no intervalo, mesmo que não
+    comecem ou terminem junto com o mês ou o ano.
+    """
+    if fim < inicio:
+        return []
+    if granularidade == "dia":
+        quantidade = (fim - inicio).days + 1
+    elif granularidade == "mes":
+        quantidade = (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    elif granularidade == "ano":
+        quantidade = fim.year - inicio.year + 1
+    else:
+        raise ValueError(f"Granularidade desconhecida: {granularidade}")
+    if quantidade > LIMITE_PERIODOS:
+        raise ValueError(
+            f"O intervalo tem {quantidade} períodos de granularidade '{granularidade}'; o máximo é {LIMITE_PERIODOS}"
+        )
+
+    if granularidade == "dia":
+        return list(range(inicio.toordinal(), fim.toordinal() + 2))
+    limites = [inicio.toordinal()]
+    ano, mes = inicio.year, inicio.month
+    for _ in range(quantidade - 1):
+        if granularidade == "mes":
+            limites.append(limites[-1] - date.fromordinal(limites[-1]).day + 1 + calendar.monthrange(ano, mes)[1])
+            ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+        else:
+            limites.append(date(ano + 1, 1, 1).toordinal())
+            ano += 1
+    limites.append(fim.toordinal() + 1)
+    return limites
+
+
+def rotulo_periodo(dia: date, granularidade: str) -> str:
+    if granularidade == "mes":
+        return f"{dia.year:04d}-{dia.month:02d}"
+    if granularidade == "ano":
+        return f"{dia.year:04d}"
+    return dia.isoformat()
+
+
+def resumo_receita(
+    granularidade: str,
+    inicio: Optional[date],
+    fim: Optional[date],
+    limites: Sequence[int],
+    quantidades: Sequence[int],
+    receitas: Sequence[float]
+) -> ReceitaVendas:
+    """
+    Monta a resposta da receita por período a partir das somas de cada período (veja limites_periodos)
+    """
+    periodos = []
+    for posicao, quantidade in enumerate(quantidades):
+        primeiro = date.fromordinal(limites[posicao])
+        periodos.append(ReceitaPeriodo(
+            periodo=rotulo_periodo(primeiro, granularidade),
+            inicio=primeiro,
+            fim=date.fromordinal(limites[posicao + 1] - 1),
+            quantidade=int(quantidade),
+            # Sem vendas, a receita é zero, sem o resíduo de arredondamento das remoções
+            receita=float(receitas[posicao]) if quantidade else 0.0
+        ))
+    return ReceitaVendas(
+        inicio=inicio,
+        fim=fim,
+        granularidade=GranularidadeReceita(granularidade),
+        quantidade=sum(periodo.quantidade for periodo in periodos),
+        receita=sum(periodo.receita for periodo in periodos),
+        periodos=periodos
+    )
+
+
+def _faixa(inicio: int, capacidade: int, dia: int) -> Tuple[int, int]:
+    """
+    Início e capacidade das árvores de receita diária depois de incluir uma venda no dia informado
+    """
+    if inicio <= dia < inicio + capacidade:
+        return inicio, capacidade
+    if not capacidade:
+        return dia - _DIAS_INICIAIS // 2, _DIAS_INICIAIS
+    primeiro = min(inicio, dia)
+    ultimo = max(inicio + capacidade - 1, dia)
+    while capacidade < ultimo - primeiro + 1:
+        capacidade *= 2
+    # A folga fica do lado para onde as datas cresceram
+    return (inicio if dia >= inicio else ultimo + 1 - capacidade), capacidade
+
+
+def _arvores(dias: np.ndarray, valores: np.ndarray, inicio: int, capacidade: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Árvores de Fenwick de quantidade e receita das vendas informadas, em O(d + n)
+    """
+    posicoes = dias - inicio + 1
+    quantidade = np.bincount(posicoes, minlength=capacidade + 1).astype(np.int64)
+    receita = np.bincount(posicoes, weights=valores, minlength=capacidade + 1).astype(np.float64)
+    # Cada nó soma o seu total ao pai (posição + bit menos significativo), nível a nível
+    passo = 1
+    while passo < capacidade:
+        filhos = np.arange(passo, capacidade + 1 - passo, 2 * passo)
+        quantidade[filhos + passo] += quantidade[filhos]
+        receita[filhos + passo] += receita[filhos]
+        passo *= 2
+    return quantidade, receita
+
+
+class ReceitaDiaria:
+    """
+    Quantidade e receita das vendas por dia, em árvores de Fenwick (binary indexed trees)
+
+    Incluir ou remover uma venda e somar qualquer intervalo de dias custam
+    O(log d), sendo d a quantidade de dias cobertos, seja qual for o número de
+    vendas. As árvores cobrem uma faixa contígua de dias (uma potência de
+    dois) que dobra, com uma reconstrução em O(d + n), quando aparece uma
+    venda fora dela.
+    """
+
+    def __init__(self):
+        # Ordinal do dia na posição 1 das árvores; a posição 0 não é usada
+        self.inicio = 0
+        self.quantidade = np.zeros(1, dtype=np.int64)
+        self.receita = np.zeros(1, dtype=np.float64)
+        self._vendas: Dict[int, Tuple[int, float]] = {}
+
+    def adicionar(self, venda: Venda) -> None:
+        dia = venda.data_venda.toordinal()
+        self._cobrir(dia)
+        self._vendas[venda.id] = (dia, venda.valor_venda)
+        self._atualizar(dia, 1, venda.valor_venda)
+
+    def remover(self, venda_id: int) -> None:
+        entrada = self._vendas.pop(venda_id, None)
+        if entrada is not None:
+            dia, valor = entrada
+            self._atualizar(dia, -1, -valor)
+
+    def _atualizar(self, dia: int, quantidade: int, valor: float) -> None:
+        capacidade = len(self.quantidade) - 1
+        posicoes = []
+        posicao = dia - self.inicio + 1
+        while posicao <= capacidade:
+            posicoes.append(posicao)
+            posicao += posicao & -posicao
+        self.quantidade[posicoes] += quantidade
+        self.receita[posicoes] += valor
+
+    def adicionar_lote(self, vendas: List[Venda]) -> None:
+        """
+        Inclui várias vendas em O(d + k), somando às árvores as árvores do próprio lote
+
+        A árvore de Fenwick é linear (a árvore de uma soma é a soma das
+        árvores), então o lote não precisa atualizar as árvores venda a venda.
+        """
+        if not vendas:
+            return
+        dias = np.fromiter((venda.data_venda.toordinal() for venda in vendas), dtype=np.int64, count=len(vendas))
+        valores = np.fromiter((venda.valor_venda for venda in vendas), dtype=np.float64, count=len(vendas))
+        self._vendas.update(zip((venda.id for venda in vendas), zip(dias.tolist(), valores.tolist())))
+        faixa = atual = (self.inicio, len(self.quantidade) - 1)
+        for dia in (int(dias[0]), int(dias.min()), int(dias.max())):
+            faixa = _faixa(*faixa, dia)
+        if faixa != atual:
+            self._reconstruir(*faixa)
+            return
+        quantidade, receita = _arvores(dias, valores, *faixa)
+        self.quantidade += quantidade
+        self.receita += receita
+
+    def _cobrir(self, dia: int) -> None:
+        atual = (self.inicio, len(self.quantidade) - 1)
+        faixa = _faixa(*atual, dia)
+        if faixa != atual:
+            self._reconstruir(*faixa)
+
+    def _reconstruir(self, inicio: int, capacidade: int) -> None:
+        dias = np.fromiter((dia for dia, _ in self._vendas.values()), dtype=np.int64, count=len(self._vendas))
+        valores = np.fromiter((valor for _, valor in self._vendas.values()), dtype=np.float64, count=len(self._vendas))
+        self.quantidade, self.receita = _arvores(dias, valores, inicio, capacidade)
+        self.inicio = inicio
+
+    def _acumulados(self, posicoes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Somas de prefixo de várias posições de uma vez, um nível da árvore por iteração
+        posicoes = np.clip(posicoes, 0, len(self.quantidade) - 1)
+        quantidade = np.zeros(len(posicoes), dtype=np.int64)
+        receita = np.zeros(len(posicoes), dtype=np.float64)
+        while posicoes.any():
+            quantidade += self.quantidade[posicoes]
+            receita += self.receita[posicoes]
+            posicoes &= posicoes - 1
+        return quantidade, receita
+
+    def _posicao(self, ordem: int) -> int:
+        # Posição do dia da ordem-ésima venda em ordem de data, por busca binária na árvore
+        posicao, passo = 0, len(self.quantidade) - 1
+        while passo:
+            if self.quantidade[posicao + passo] < ordem:
+                posicao += passo
+                ordem -= int(self.quantidade[posicao])
+            passo >>= 1
+        return posicao + 1
+
+    def extremos(self) -> Optional[Tuple[date, date]]:
+        """
+        Primeiro e último dia com vendas, em O(log d), ou None se não há vendas
+        """
+        total = int(self.quantidade[-1]) if len(self.quantidade) > 1 else 0
+        if not total:
+            return None
+        return (
+            date.fromordinal(self.inicio + self._posicao(1) - 1),
+            date.fromordinal(self.inicio + self._posicao(total) - 1)
+        )
+
+    def resumir(self, inicio: Optional[date], fim: Optional[date], granularidade: str) -> ReceitaVendas:
+        """
+        Quantidade e receita por dia, mês ou ano entre inicio e fim (inclusive)
+
+        Sem inicio ou fim, o intervalo começa ou termina no primeiro ou no
+        último dia com vendas. Cada período custa duas somas de prefixo. Um
+        intervalo invertido levanta ValueError.
+        """
+        verificar_intervalo(inicio, fim)
+        if inicio is None or fim is None:
+            extremos = self.extremos()
+            if extremos is None:
+                return resumo_receita(granularidade, inicio, fim, [], [], [])
+            inicio = extremos[0] if inicio is None else inicio
+            fim = extremos[1] if fim is None else fim
+        limites = limites_periodos(inicio, fim, granularidade)
+        quantidade, receita = self._acumulados(np.array(limites, dtype=np.int64) - self.inicio)
+        return resumo_receita(granularidade, inicio, fim, limites, np.diff(quantidade), np.diff(receita))
+
+    def secoes(self) -> Dict[str, np.ndarray]:
+        """
+        Cópia das árvores, para gravação em uma publicação (veja de_secoes)
+        """
+        return {
+            "inicio": np.array([self.inicio], dtype=np.int64),
+            "quantidade": self.quantidade.copy(),
+            "receita": self.receita.copy(),
+        }
+
+    @classmethod
+    def de_secoes(cls, secoes: Dict[str, np.ndarray]) -> "ReceitaDiaria":
+        """
+        Árvores somente leitura sobre arrays já prontos, como os de uma publicação mapeada em memória
+        """
+        receita_diaria = cls()
+        receita_diaria.inicio = int(secoes["inicio"][0])
+        receita_diaria.quantidade, receita_diaria.receita = secoes["quantidade"], secoes["receita"]
+        return receita_diaria
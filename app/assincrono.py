@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable
+
+from app.concorrencia import TravaOcupada, sem_espera
+from app.perfilamento import perfil_em_andamento
+
+
+def _no_perfil(funcao: Callable[[], Any]) -> Callable[[], Any]:
+    # Numa requisição perfilada, o trabalho feito em outra thread também entra no perfil
+    perfil = perfil_em_andamento.get()
+    return perfil.na_thread(funcao) if perfil is not None else funcao
+
+
+async def em_thread(funcao: Callable[[], Any]) -> Any:
+    """
+    Executa fora do laço de eventos um trabalho de CPU da própria rota
+
+    Ler e validar um lote ou serializar uma listagem inteira ocupa a thread
+    por tanto tempo quanto uma consulta pesada. Roda no executor padrão do
+    laço, e não no do banco, para não ocupar as threads das consultas.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, _no_perfil(funcao))
+
+
+class DatabaseAssincrono:
+    """
+    Interface assíncrona do banco: os mesmos métodos, como corrotinas
+
+    Operações que podem ocupar a thread (escritas, que aguardam o fsync do WAL
+    ou percorrem um lote, leituras cujo custo cresce com os dados, qualquer
+    consulta ao SQLite) rodam em um executor dedicado, separado do threadpool
+    do Starlette; só as consultas por chave, em O(1) ou O(log n), rodam direto
+    no laço de eventos, sem troca de thread. Quem decide é o método
+    bloqueante() do banco envolvido. Uma operação que roda no laço mas encontra a trava do
+    banco ocupada (uma escrita em lote ou a cópia de um snapshot em outra
+    thread) não espera por ela ali: é repassada ao executor.
+    """
+
+    def __init__(self, banco: Any, threads: int):
+        self.banco = banco
+        self._threads = threads
+        self._executor = None
+
+    def _obter_executor(self) -> ThreadPoolExecutor:
+        # Criado só no primeiro uso, para não deixar threads paradas no backend em memória
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._threads, thread_name_prefix="banco")
+        return self._executor
+
+    async def _no_executor(self, funcao: Callable[[], Any]) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._obter_executor(), _no_perfil(funcao))
+
+    def __getattr__(self, nome: str) -> Callable[..., Awaitable[Any]]:
+        metodo = getattr(self.banco, nome)
+        if self.banco.bloqueante(nome):
+            @wraps(metodo)
+            async def corrotina(*args, **kwargs):
+                return await self._no_executor(partial(metodo, *args, **kwargs))
+        else:
+            @wraps(metodo)
+            async def corrotina(*args, **kwargs):
+                try:
+                    with sem_espera():
+                        return metodo(*args, **kwargs)
+                except TravaOcupada:
+                    return await self._no_executor(partial(metodo, *args, **kwargs))
+        # Guarda a corrotina na instância, para que as próximas chamadas não passem por aqui
+        setattr(self, nome, corrotina)
+        return corrotina
+
+    def fechar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
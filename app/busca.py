@@ -0,0 +1,210 @@
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.indices import IndiceOrdenado
+from app.models import Veiculo
+
+
+@lru_cache(maxsize=65536)
+def normalizar(texto: str) -> str:
+    """
+    Remove acentos e diferenças de maiúsculas/minúsculas ("Citroën" -> "citroen")
+    """
+    if texto.isascii():
+        return texto.lower().strip()
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold().strip()
+
+
+class TriePrefixos:
+    """
+    Árvore de prefixos que devolve os IDs cujos textos começam com um prefixo
+
+    Cada nó guarda os IDs de toda a sua subárvore, então a busca custa apenas
+    O(tamanho do prefixo), sem percorrer os descendentes.
+    """
+
+    def __init__(self):
+        self._raiz: Tuple[Dict[str, tuple], Set[int]] = ({}, set())
+
+    def adicionar(self, texto: str, registro_id: int) -> None:
+        self.adicionar_varios(texto, (registro_id,))
+
+    def adicionar_varios(self, texto: str, registro_ids: Iterable[int]) -> None:
+        """
+        Associa vários IDs ao mesmo texto, percorrendo a árvore uma única vez
+        """
+        no = self._raiz
+        no[1].update(registro_ids)
+        for caractere in texto:
+            no = no[0].setdefault(caractere, ({}, set()))
+            no[1].update(registro_ids)
+
+    def remover(self, texto: str, registro_id: int) -> None:
+        caminho = [self._raiz]
+        for caractere in texto:
+            proximo = caminho[-1][0].get(caractere)
+            if proximo is None:
+                break
+            caminho.append(proximo)
+        for no in caminho:
+            no[1].discard(registro_id)
+        # Nós que ficaram vazios são podados, de baixo para cima
+        for pai, caractere, no in zip(reversed(caminho[:-1]), reversed(texto[:len(caminho) - 1]), reversed(caminho[1:])):
+            if no[1]:
+                break
+            del pai[0][caractere]
+
+    def buscar(self, prefixo: str) -> Set[int]:
+        no = self._raiz
+        for caractere in prefixo:
+            no = no[0].get(caractere)
+            if no is None:
+                return set()
+        return no[1]
+
+
+def inicios_palavras(texto: str) -> List[str]:
+    # "corolla cross" é encontrado tanto por "cor" quanto por "cro"
+    return [texto[i:] for i in range(len(texto)) if texto[i] != " " and (i == 0 or texto[i - 1] == " ")]
+
+
+class IndiceVeiculos:
+    """
+    Índices de busca do estoque de veículos
+
+    Marca, tipo e disponibilidade ficam em índices invertidos (valor -> IDs),
+    ano e preço em índices ordenados e o modelo em uma árvore de prefixos.
+    Uma busca parte do critério mais seletivo e intersecta os demais.
+    """
+
+    def __init__(self):
+        self._por_marca: Dict[str, Set[int]] = {}
+        self._por_tipo: Dict[str, Set[int]] = {}
+        self._por_disponivel: Dict[bool, Set[int]] = {True: set(), False: set()}
+        self._ano = IndiceOrdenado()
+        self._preco = IndiceOrdenado()
+        self._modelo = TriePrefixos()
+        # Nome de exibição de cada marca normalizada, usado nas facetas
+        self._nomes_marcas: Dict[str, str] = {}
+        # ID -> (marca normalizada, tipo, ano, preço), para filtrar e contar facetas sem consultar a tabela
+        self._atributos: Dict[int, Tuple[str, str, int, float]] = {}
+
+    def adicionar(self, veiculo: Veiculo) -> None:
+        self.adicionar_lote([veiculo])
+
+    def adicionar_lote(self, veiculos: List[Veiculo]) -> None:
+        """
+        Indexa vários veículos, agrupando os que compartilham o mesmo modelo
+        """
+        por_modelo: Dict[str, List[int]] = {}
+        for veiculo in veiculos:
+            marca = normalizar(veiculo.marca)
+            tipo = veiculo.tipo.value
+            self._nomes_marcas.setdefault(marca, veiculo.marca)
+            self._por_marca.setdefault(marca, set()).add(veiculo.id)
+            self._por_tipo.setdefault(tipo, set()).add(veiculo.id)
+            self._por_disponivel[veiculo.disponivel].add(veiculo.id)
+            por_modelo.setdefault(normalizar(veiculo.modelo), []).append(veiculo.id)
+            self._atributos[veiculo.id] = (marca, tipo, veiculo.ano, veiculo.preco)
+        self._ano.adicionar_lote([(veiculo.ano, veiculo.id) for veiculo in veiculos])
+        self._preco.adicionar_lote([(veiculo.preco, veiculo.id) for veiculo in veiculos])
+        for modelo, ids in por_modelo.items():
+            for texto in inicios_palavras(modelo):
+                self._modelo.adicionar_varios(texto, ids)
+
+    def definir_disponivel(self, veiculo_id: int, disponivel: bool) -> None:
+        """
+        Troca a disponibilidade de um veículo já indexado; nenhum outro índice depende dela
+        """
+        self._por_disponivel[not disponivel].discard(veiculo_id)
+        self._por_disponivel[disponivel].add(veiculo_id)
+
+    def remover(self, veiculo: Veiculo) -> None:
+        marca = normalizar(veiculo.marca)
+        tipo = veiculo.tipo.value
+        for indice, chave in ((self._por_marca, marca), (self._por_tipo, tipo)):
+            ids = indice.get(chave)
+            if ids is not None:
+                ids.discard(veiculo.id)
+                if not ids:
+                    del indice[chave]
+        if marca not in self._por_marca:
+            self._nomes_marcas.pop(marca, None)
+        self._por_disponivel[veiculo.disponivel].discard(veiculo.id)
+        self._ano.remover(veiculo.ano, veiculo.id)
+        self._preco.remover(veiculo.preco, veiculo.id)
+        for texto in inicios_palavras(normalizar(veiculo.modelo)):
+            self._modelo.remover(texto, veiculo.id)
+        self._atributos.pop(veiculo.id, None)
+
+    def buscar(
+        self,
+        marca: Optional[str] = None,
+        modelo: Optional[str] = None,
+        tipo: Optional[str] = None,
+        ano_min: Optional[int] = None,
+        ano_max: Optional[int] = None,
+        preco_min: Optional[float] = None,
+        preco_max: Optional[float] = None,
+        disponivel: Optional[bool] = None
+    ) -> Set[int]:
+        """
+        IDs dos veículos que atendem a todos os critérios informados
+        """
+        conjuntos: List[Set[int]] = []
+        if marca is not None:
+            conjuntos.append(self._por_marca.get(normalizar(marca), set()))
+        if tipo is not None:
+            conjuntos.append(self._por_tipo.get(tipo, set()))
+        if disponivel is not None:
+            conjuntos.append(self._por_disponivel[disponivel])
+        if modelo is not None and normalizar(modelo):
+            conjuntos.append(self._modelo.buscar(normalizar(modelo)))
+
+        # Faixas são resolvidas pelo índice apenas quando são mais seletivas que os conjuntos
+        faixas = []
+        if ano_min is not None or ano_max is not None:
+            faixas.append((self._ano.contar(ano_min, ano_max), self._ano, ano_min, ano_max, 2))
+        if preco_min is not None or preco_max is not None:
+            faixas.append((self._preco.contar(preco_min, preco_max), self._preco, preco_min, preco_max, 3))
+        faixas.sort(key=lambda faixa: faixa[0])
+        menor_conjunto = min((len(c) for c in conjuntos), default=None)
+        while faixas and (menor_conjunto is None or faixas[0][0] < menor_conjunto):
+            _, indice, minimo, maximo, _ = faixas.pop(0)
+            conjuntos.append(set(indice.intervalo(minimo, maximo)))
+            menor_conjunto = len(conjuntos[-1]) if menor_conjunto is None else min(menor_conjunto, len(conjuntos[-1]))
+
+        if not conjuntos:
+            resultado = set(self._atributos)
+        else:
+            conjuntos.sort(key=len)
+            resultado = set(conjuntos[0])
+            for conjunto in conjuntos[1:]:
+                resultado &= conjunto
+                if not resultado:
+                    break
+        for _, _, minimo, maximo, posicao in faixas:
+            resultado = {
+                registro_id for registro_id in resultado
+                if (minimo is None or self._atributos[registro_id][posicao] >= minimo)
+                and (maximo is None or self._atributos[registro_id][posicao] <= maximo)
+            }
+        return resultado
+
+    def facetas(self, ids: Set[int]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Quantidade de veículos por marca e por tipo entre os IDs informados
+        """
+        por_marca: Dict[str, int] = {}
+        por_tipo: Dict[str, int] = {}
+        for registro_id in ids:
+            marca, tipo, _, _ = self._atributos[registro_id]
+            por_marca[marca] = por_marca.get(marca, 0) + 1
+            por_tipo[tipo] = por_tipo.get(tipo, 0) + 1
+        ordenar = lambda contagens: sorted(contagens.items(), key=lambda item: (-item[1], item[0]))
+        return (
+            {self._nomes_marcas[marca]: quantidade for marca, quantidade in ordenar(por_marca)},
+            dict(ordenar(por_tipo))
+        )
@@ -0,0 +1,168 @@
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from functools import partial, wraps
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Union
+
+from fastapi import Request, Response, status
+from app import config
+from app.assincrono import em_thread
+from app.paginacao import LIMITE_MAXIMO
+from app.serializacao import serializar
+
+
+# Cabeçalhos produzidos pelas rotas que fazem parte da resposta guardada
+_CABECALHOS_GUARDADOS = ("x-next-cursor",)
+
+
+class RespostaGuardada(NamedTuple):
+    etag: str
+    corpo: bytes
+    cabecalhos: Dict[str, str]
+
+
+class CacheRespostas:
+    """
+    Cache LRU de corpos JSON já serializados, limitado pelo total de bytes
+
+    A chave é a rota com a query string; cada entrada guarda o ETag da versão
+    dos dados que a gerou, então uma entrada antiga nunca é servida para uma
+    versão nova, e acaba descartada pelo LRU.
+    """
+
+    def __init__(self, limite_bytes: int):
+        self.limite_bytes = limite_bytes
+        self._entradas: "OrderedDict[str, RespostaGuardada]" = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def obter(self, chave: str, etag: str) -> Optional[RespostaGuardada]:
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada.etag != etag:
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada
+
+    def guardar(self, chave: str, entrada: RespostaGuardada) -> None:
+        if len(entrada.corpo) > self.limite_bytes:
+            return
+        with self._trava:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior.corpo)
+            self._entradas[chave] = entrada
+            self._bytes += len(entrada.corpo)
+            while self._bytes > self.limite_bytes:
+                _, removida = self._entradas.popitem(last=False)
+                self._bytes -= len(removida.corpo)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+
+
+cache_respostas = CacheRespostas(config.CACHE_RESPOSTAS_BYTES)
+
+
+def _chave(request: Request) -> str:
+    # A ordem dos parâmetros não muda a resposta, então a query é normalizada
+    return request.url.path + "?" + "&".join(sorted(f"{nome}={valor}" for nome, valor in request.query_params.multi_items()))
+
+
+def _etag_aceito(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = {candidato.strip().removeprefix("W/") for candidato in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
+
+
+async def responder_com_cache(
+    request: Request,
+    response: Response,
+    versao: str,
+    gerar: Callable[[], Awaitable[object]]
+) -> Response:
+    """
+    Responde a partir do cache quando os dados não mudaram desde a última resposta
+
+    O ETag depende só da rota, da query e da versão das coleções envolvidas,
+    então um If-None-Match válido recebe 304 sem que nada seja consultado ou
+    serializado. Uma listagem maior que a página máxima (de uma rota sem
+    limite) é serializada fora do laço de eventos.
+    """
+    chave = _chave(request)
+    etag = '"' + hashlib.blake2b(f"{versao}|{chave}".encode(), digest_size=12).hexdigest() + '"'
+    cabecalhos_cache = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_aceito(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos_cache)
+
+    entrada = cache_respostas.obter(chave, etag)
+    if entrada is None:
+        resultado = await gerar()
+        if isinstance(resultado, Response):
+            corpo, origem = resultado.body, resultado.headers
+        else:
+            if isinstance(resultado, list) and len(resultado) > LIMITE_MAXIMO:
+                corpo = await em_thread(partial(serializar, resultado))
+            else:
+                corpo = serializar(resultado)
+            origem = response.headers
+        cabecalhos = {nome: origem[nome] for nome in _CABECALHOS_GUARDADOS if nome in origem}
+        entrada = RespostaGuardada(etag, corpo, cabecalhos)
+        cache_respostas.guardar(chave, entrada)
+
+    return Response(
+        content=entrada.corpo,
+        media_type="application/json",
+        headers={**entrada.cabecalhos, **cabecalhos_cache}
+    )
+
+
+def _localizar_parametro(assinatura: inspect.Signature, tipo: type) -> Optional[str]:
+    for parametro in assinatura.parameters.values():
+        if parametro.annotation is tipo:
+            return parametro.name
+    return None
+
+
+def em_cache(versao: Callable[[], Union[str, Awaitable[str]]]) -> Callable:
+    """
+    Decorador de rotas GET assíncronas que passam a responder com ETag e cache de respostas
+
+    versao retorna a versão atual das coleções lidas pela rota (ou uma
+    corrotina que a calcula). Request e Response são injetados
+    automaticamente quando a rota não os declara.
+    """
+    def decorador(rota: Callable) -> Callable:
+        assinatura = inspect.signature(rota)
+        nome_request = _localizar_parametro(assinatura, Request)
+        nome_response = _localizar_parametro(assinatura, Response)
+        extras = []
+        if nome_request is None:
+            extras.append(inspect.Parameter("_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        if nome_response is None:
+            extras.append(inspect.Parameter("_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+        @wraps(rota)
+        async def envolvida(**kwargs):
+            request = kwargs[nome_request] if nome_request else kwargs.pop("_request")
+            response = kwargs[nome_response] if nome_response else kwargs.pop("_response")
+            atual = versao()
+            if inspect.isawaitable(atual):
+                atual = await atual
+            return await responder_com_cache(request, response, atual, lambda: rota(**kwargs))
+
+        envolvida.__signature__ = assinatura.replace(parameters=[*assinatura.parameters.values(), *extras])
+        return envolvida
+    return decorador
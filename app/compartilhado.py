@@ -0,0 +1,1108 @@
+import fcntl
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from contextlib import suppress
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.analise import ColunasVeiculos, ColunasVendas, ReceitaDiaria
+from app.busca import inicios_palavras, normalizar
+from app.database import ENTIDADES, Database, _iterar_paginas
+from app.indices import chave_cpf, chave_email
+from app.metricas import contar_linhas
+from app.models import (
+    Funcionario, EstatisticasCargo, EstatisticasGerais, Veiculo, Cliente, Venda, Cargo, TipoVeiculo, ResumoVendas,
+    RankingVendedor, BuscaVeiculos, ReceitaVendas
+)
+from app.persistencia import ArmazenamentoWAL
+from app.publicacao import DiretorioPublicacoes, Publicacao
+from app.tabela import Fatia, TabelaMapeada, TextosMapeados, codificar_textos, inserir_textos, juntar_textos
+
+
+# Métodos de escrita, executados sempre pelo processo escritor
+_ESCRITAS = frozenset(
+    nome
+    for entidade, (singular, _) in ENTIDADES.items()
+    for nome in (
+        f"add_{singular}", f"add_{entidade}", f"update_{singular}", f"update_{entidade}", f"delete_{singular}", f"delete_{entidade}"
+    )
+)
+
+# Mensagens entre os processos: tamanho + conteúdo serializado com pickle
+_TAMANHO = struct.Struct("<Q")
+
+# Códigos dos enums nas colunas (veja tabela._Coluna)
+_CARGOS = list(Cargo)
+_TIPOS = list(TipoVeiculo)
+
+# Maior caractere possível: prefixo + _ULTIMO fica depois de todos os textos que começam com o prefixo
+_ULTIMO = chr(0x10FFFF)
+
+# Colunas com índice ordenado publicado (veja _indice_ordenado), além de marca e modelo dos veículos
+_ORDENADOS = {
+    "funcionarios": ("cargo", "salario", "data_contratacao"),
+    "veiculos": ("tipo", "ano", "preco", "disponivel"),
+    "vendas": ("veiculo_id", "cliente_id", "funcionario_id"),
+}
+
+# Colunas com índice de chaves únicas publicado (veja _indice_unico), com a chave de cada uma
+_UNICOS = {
+    ("funcionarios", "email"): chave_email,
+    ("clientes", "email"): chave_email,
+    ("clientes", "cpf"): chave_cpf,
+}
+
+# Seções derivadas de cada coleção, cada uma em uma parte própria da publicação
+_DERIVADAS = {
+    "funcionarios": ("cargos",),
+    "veiculos": ("analise.veiculos",),
+    "clientes": (),
+    "vendas": ("analise.vendas", "receita_diaria", "ranking"),
+}
+
+
+def _ler(conexao: socket.socket, tamanho: int) -> bytes:
+    dados = bytearray()
+    while len(dados) < tamanho:
+        parte = conexao.recv(tamanho - len(dados))
+        if not parte:
+            raise ConnectionError("Conexão encerrada pelo outro processo")
+        dados += parte
+    return bytes(dados)
+
+
+def _enviar(conexao: socket.socket, mensagem: Any) -> None:
+    dados = pickle.dumps(mensagem, protocol=pickle.HIGHEST_PROTOCOL)
+    conexao.sendall(_TAMANHO.pack(len(dados)) + dados)
+
+
+def _receber(conexao: socket.socket) -> Any:
+    tamanho, = _TAMANHO.unpack(_ler(conexao, _TAMANHO.size))
+    return pickle.loads(_ler(conexao, tamanho))
+
+
+def _com_prefixo(prefixo: str, secoes: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {f"{prefixo}.{nome}": dados for nome, dados in secoes.items()}
+
+
+def _sem_prefixo(prefixo: str, secoes: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {nome[len(prefixo) + 1:]: dados for nome, dados in secoes.items() if nome.startswith(f"{prefixo}.")}
+
+
+def _textos(secoes: Dict[str, np.ndarray], nome: str) -> TextosMapeados:
+    return TextosMapeados(secoes[f"{nome}.texto"], secoes[f"{nome}.offsets"], secoes.get(f"{nome}.nulos"))
+
+
+# Seções derivadas, calculadas pelo escritor para que os leitores não montem índices
+#
+# Cada função recebe opcionalmente o índice anterior, já publicado: os valores
+# são então só os dos registros incluídos depois (sempre no fim da tabela), que
+# são intercalados nele. O resultado é idêntico ao da reconstrução completa.
+
+def _indice_unico(
+    textos: Sequence[str],
+    chave: Callable[[str], str],
+    anterior: Optional[Dict[str, np.ndarray]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Chaves únicas (e-mail, CPF) em ordem, com a posição do registro de cada uma
+
+    Entre registros com a mesma chave, o de menor ID vem primeiro e é o
+    encontrado pela busca, como no backend SQLite.
+    """
+    chaves = [chave(texto) for texto in textos]
+    ordem = sorted(range(len(chaves)), key=chaves.__getitem__)
+    ordenadas = [chaves[posicao] for posicao in ordem]
+    if anterior is None:
+        return {**_com_prefixo("chaves", codificar_textos(ordenadas)), "posicoes": np.array(ordem, dtype=np.int64)}
+    # Uma chave nova entra depois das iguais já publicadas, que são de registros mais antigos
+    existentes = _textos(anterior, "chaves")
+    pontos = [bisect_right(existentes, chave) for chave in ordenadas]
+    return {
+        **_com_prefixo("chaves", inserir_textos(_sem_prefixo("chaves", anterior), pontos, ordenadas)),
+        "posicoes": np.insert(anterior["posicoes"], pontos, np.array(ordem, dtype=np.int64) + len(existentes)),
+    }
+
+
+def _indice_marcas(marcas: Sequence[str], anterior: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Código da marca normalizada de cada veículo, e o nome de exibição de cada código
+    """
+    codigos: Dict[str, int] = {}
+    exibicao: List[str] = []
+    if anterior is not None:
+        codigos = {normalizada: codigo for codigo, normalizada in enumerate(_textos(anterior, "normalizada"))}
+        exibicao = list(_textos(anterior, "exibicao"))
+    por_texto: Dict[str, int] = {}
+    por_veiculo = np.empty(len(marcas), dtype=np.int32)
+    for posicao, marca in enumerate(marcas):
+        codigo = por_texto.get(marca)
+        if codigo is None:
+            normalizada = normalizar(marca)
+            codigo = codigos.get(normalizada)
+            if codigo is None:
+                codigo = codigos[normalizada] = len(exibicao)
+                exibicao.append(marca)
+            por_texto[marca] = codigo
+        por_veiculo[posicao] = codigo
+    return {
+        "codigo": por_veiculo if anterior is None else np.concatenate((anterior["codigo"], por_veiculo)),
+        **_com_prefixo("normalizada", codificar_textos(list(codigos))),
+        **_com_prefixo("exibicao", codificar_textos(exibicao)),
+    }
+
+
+def _indice_modelos(modelos: Sequence[str], anterior: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Código do modelo normalizado de cada veículo e os inícios de palavra de cada modelo, em ordem
+    """
+    codigos: Dict[str, int] = {}
+    if anterior is not None:
+        codigos = {normalizado: codigo for codigo, normalizado in enumerate(_textos(anterior, "normalizado"))}
+    por_veiculo = np.fromiter(
+        (codigos.setdefault(normalizar(modelo), len(codigos)) for modelo in modelos), dtype=np.int32, count=len(modelos)
+    )
+    inicios = sorted((inicio, codigo) for modelo, codigo in codigos.items() for inicio in inicios_palavras(modelo))
+    return {
+        "codigo": por_veiculo if anterior is None else np.concatenate((anterior["codigo"], por_veiculo)),
+        **_com_prefixo("normalizado", codificar_textos(list(codigos))),
+        **_com_prefixo("inicios", codificar_textos([inicio for inicio, _ in inicios])),
+        "inicios.modelo": np.array([codigo for _, codigo in inicios], dtype=np.int32),
+    }
+
+
+def _indice_ordenado(valores: np.ndarray, anterior: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Posições dos registros ordenadas pelo valor, com os valores nessa ordem
+
+    A ordenação estável mantém a ordem de ID entre valores iguais, e uma
+    faixa de valores sai de duas buscas binárias nas chaves.
+    """
+    ordem = np.argsort(valores, kind="stable")
+    if anterior is None:
+        return {"ordem": ordem, "chaves": valores[ordem]}
+    # Os registros novos vêm depois de todos os publicados, então ficam por último entre valores iguais
+    chaves = valores[ordem]
+    pontos = np.searchsorted(anterior["chaves"], chaves, side="right")
+    return {
+        "ordem": np.insert(anterior["ordem"], pontos, ordem + len(anterior["ordem"])),
+        "chaves": np.insert(anterior["chaves"], pontos, chaves),
+    }
+
+
+def _secoes_coluna(
+    entidade: str,
+    campo: str,
+    fatia: Fatia,
+    publicadas: Optional[Dict[str, np.ndarray]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Seções de um campo da tabela (veja Fatia.secoes), com o índice publicado dele, se houver
+
+    publicadas são as seções da coleção na publicação anterior, sem o prefixo
+    da coleção. Com elas, a fatia traz só os registros incluídos depois: o
+    campo deles é codificado e acrescentado no fim da coluna publicada, e
+    intercalado no índice, sem recodificar nem reordenar o que já estava lá.
+    """
+    secoes = fatia.secoes([campo])
+    anterior = _sem_prefixo(f"{campo}.indice", publicadas) if publicadas is not None else None
+    indice: Dict[str, np.ndarray] = {}
+    if (entidade, campo) in _UNICOS:
+        indice = _indice_unico(_textos(secoes, campo)[:], _UNICOS[(entidade, campo)], anterior)
+    elif entidade == "veiculos" and campo in ("marca", "modelo"):
+        indice = (_indice_marcas if campo == "marca" else _indice_modelos)(_textos(secoes, campo)[:], anterior)
+        # Marca e modelo são ordenados pelo código normalizado
+        codigos = indice["codigo"][len(anterior["codigo"]):] if anterior is not None else indice["codigo"]
+        indice.update(_indice_ordenado(codigos, anterior))
+    elif campo in _ORDENADOS.get(entidade, ()):
+        indice = _indice_ordenado(secoes[campo], anterior)
+    if publicadas is not None:
+        if campo in secoes:
+            secoes = {campo: np.concatenate((publicadas[campo], secoes[campo]))}
+        else:
+            secoes = _com_prefixo(campo, juntar_textos(_sem_prefixo(campo, publicadas), _sem_prefixo(campo, secoes)))
+    secoes.update(_com_prefixo(f"{campo}.indice", indice))
+    return secoes
+
+
+class _Publicador:
+    """
+    Publica o estado do Database do escritor como gerações imutáveis
+
+    Quem escreve chama aguardar_publicacao(), que só retorna quando uma
+    geração com a escrita já foi publicada. Uma thread dedicada espera um
+    pouco para reunir as escritas que chegam juntas e publica todas em uma
+    única geração, como um group commit.
+
+    Cada campo de cada coleção, com o seu índice, é uma parte da publicação
+    em arquivo próprio, assim como cada grupo de seções derivadas (agregados
+    por cargo, colunas de análise, receita diária e ranking). Uma geração só
+    grava as partes que mudaram. Registros incluídos são codificados e
+    intercalados nos índices já publicados (lidos da geração anterior, que
+    continua mapeada), sem recodificar nem reordenar os demais; ainda assim
+    cada parte alterada é regravada inteira, então uma inclusão custa O(n)
+    em bytes copiados na coleção que ela altera (uma venda altera as vendas
+    e o veículo vendido). Um campo alterado no lugar (a disponibilidade do
+    veículo vendido, por exemplo) tem a sua parte reconstruída, e uma
+    remoção reconstrói todas as partes da coleção.
+    """
+
+    def __init__(self, banco: Database, publicacoes: DiretorioPublicacoes, intervalo_ms: float):
+        self._banco = banco
+        self._publicacoes = publicacoes
+        self._intervalo = intervalo_ms / 1000
+        # Versão da tabela e último ID de cada coleção na geração anterior (veja Database.capturar)
+        self._tabelas_publicadas: Dict[str, Tuple[int, int]] = {}
+        self._anterior: Optional[Publicacao] = None
+        self._solicitadas = 0
+        self._publicadas = 0
+        self._erro: Optional[BaseException] = None
+        self._encerrar = False
+        self._condicao = threading.Condition()
+        self.publicar()
+        self._thread = threading.Thread(target=self._publicar_continuamente, name="publicacao", daemon=True)
+        self._thread.start()
+
+    def publicar(self) -> int:
+        """
+        Captura o estado do banco e o publica como uma nova geração
+        """
+        captura = self._banco.capturar(self._tabelas_publicadas)
+        partes: Dict[str, Optional[Dict[str, np.ndarray]]] = {}
+        for entidade, tabela in captura["tabelas"].items():
+            campos = list(ENTIDADES[entidade][1].model_fields)
+            if tabela is None:
+                partes.update(dict.fromkeys([*(f"{entidade}.{campo}" for campo in campos), *_DERIVADAS[entidade]]))
+                continue
+            novos = tabela["novos"]
+            publicadas = self._anterior.secoes(f"{entidade}.") if novos is not None and len(novos) else None
+            for campo in campos:
+                if novos is None or campo in tabela["alterados"]:
+                    secoes = _secoes_coluna(entidade, campo, tabela["completa"])
+                elif publicadas is not None:
+                    secoes = _secoes_coluna(entidade, campo, novos, publicadas)
+                else:
+                    secoes = None
+                partes[f"{entidade}.{campo}"] = _com_prefixo(entidade, secoes) if secoes is not None else None
+            if entidade == "funcionarios":
+                agregados = list(zip(*captura["agregados_cargos"])) or [(), (), (), (), ()]
+                partes["cargos"] = {
+                    "cargos.cargo": np.array([_CARGOS.index(Cargo(cargo)) for cargo in agregados[0]], dtype=np.int64),
+                    "cargos.quantidade": np.array(agregados[1], dtype=np.int64),
+                    "cargos.salario_total": np.array(agregados[2], dtype=np.float64),
+                    "cargos.salario_minimo": np.array(agregados[3], dtype=np.float64),
+                    "cargos.salario_maximo": np.array(agregados[4], dtype=np.float64),
+                }
+            elif entidade == "veiculos":
+                partes["analise.veiculos"] = _com_prefixo("analise.veiculos", captura["colunas_veiculos"])
+            elif entidade == "vendas":
+                partes["analise.vendas"] = _com_prefixo("analise.vendas", captura["colunas_vendas"])
+                partes["receita_diaria"] = _com_prefixo("receita_diaria", captura["receita_diaria"])
+                ranking = list(zip(*captura["ranking"])) or [(), (), (), ()]
+                partes["ranking"] = {
+                    "ranking.funcionario": np.array(ranking[0], dtype=np.int64),
+                    "ranking.quantidade": np.array(ranking[1], dtype=np.int64),
+                    "ranking.receita": np.array(ranking[2], dtype=np.float64),
+                    "ranking.desconto_medio": np.array(ranking[3], dtype=np.float64),
+                }
+        metadados = {
+            "instancia": captura["instancia"],
+            "versoes": captura["versoes"],
+            "nomes_marcas": captura["nomes_marcas"],
+        }
+        geracao = self._publicacoes.publicar(partes, metadados)
+        self._anterior = self._publicacoes.abrir(geracao)
+        self._tabelas_publicadas = {
+            entidade: tabela["publicada"] if tabela is not None else self._tabelas_publicadas[entidade]
+            for entidade, tabela in captura["tabelas"].items()
+        }
+        return geracao
+
+    def aguardar_publicacao(self) -> None:
+        """
+        Bloqueia até que as escritas já concluídas façam parte de uma geração publicada
+        """
+        with self._condicao:
+            self._solicitadas += 1
+            pedido = self._solicitadas
+            self._condicao.notify_all()
+            while self._publicadas < pedido and self._erro is None:
+                self._condicao.wait()
+            if self._publicadas < pedido:
+                raise RuntimeError("Falha ao publicar os dados") from self._erro
+
+    def _publicar_continuamente(self) -> None:
+        try:
+            while True:
+                with self._condicao:
+                    while self._publicadas == self._solicitadas and not self._encerrar:
+                        self._condicao.wait()
+                    if self._publicadas == self._solicitadas:
+                        break
+                # Espera um pouco para que outras escritas entrem na mesma geração
+                if self._intervalo:
+                    time.sleep(self._intervalo)
+                with self._condicao:
+                    alvo = self._solicitadas
+                self.publicar()
+                with self._condicao:
+                    self._publicadas = alvo
+                    self._condicao.notify_all()
+        except BaseException as erro:
+            with self._condicao:
+                self._erro = erro
+                self._condicao.notify_all()
+
+    def fechar(self) -> None:
+        with self._condicao:
+            self._encerrar = True
+            self._condicao.notify_all()
+        self._thread.join()
+
+
+class _Atendimento(socketserver.BaseRequestHandler):
+    """
+    Atende as escritas de um processo leitor, uma por vez, na mesma conexão
+    """
+
+    def handle(self) -> None:
+        while True:
+            try:
+                nome, args, kwargs = _receber(self.request)
+            except ConnectionError:
+                return
+            try:
+                resposta = (True, self.server.escritor.executar(nome, args, kwargs))
+            except Exception as erro:
+                resposta = (False, erro)
+            _enviar(self.request, resposta)
+
+
+class _Escritor:
+    """
+    Papel do processo que detém a trava de escrita do diretório
+
+    Mantém o Database completo, com o WAL para durabilidade, publica as
+    gerações lidas por todos os processos e recebe, por um socket Unix, as
+    escritas dos demais.
+    """
+
+    def __init__(
+        self,
+        trava: int,
+        armazenamento: ArmazenamentoWAL,
+        publicacoes: DiretorioPublicacoes,
+        caminho_socket: str,
+        intervalo_publicacao_ms: float
+    ):
+        self._trava = trava
+        self._caminho_socket = caminho_socket
+        self.banco = Database(armazenamento)
+        self.publicador = _Publicador(self.banco, publicacoes, intervalo_publicacao_ms)
+        # Um socket que sobrou de um escritor encerrado não tem mais ninguém do outro lado
+        with suppress(FileNotFoundError):
+            os.remove(caminho_socket)
+        self._servidor = socketserver.ThreadingUnixStreamServer(caminho_socket, _Atendimento)
+        self._servidor.daemon_threads = True
+        self._servidor.escritor = self
+        threading.Thread(target=self._servidor.serve_forever, name="escritor", daemon=True).start()
+
+    def executar(self, nome: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Aplica a escrita e retorna depois que ela está gravada no WAL e publicada
+        """
+        if nome not in _ESCRITAS:
+            raise ValueError(f"Operação de escrita desconhecida: {nome}")
+        resultado = getattr(self.banco, nome)(*args, **kwargs)
+        self.publicador.aguardar_publicacao()
+        return resultado
+
+    def fechar(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        with suppress(FileNotFoundError):
+            os.remove(self._caminho_socket)
+        self.publicador.fechar()
+        self.banco.fechar()
+        # Fechar o descritor libera a trava para outro processo
+        os.close(self._trava)
+
+
+class _ChaveUnica:
+    """
+    Busca em um índice gravado por _indice_unico
+    """
+
+    def __init__(self, secoes: Dict[str, np.ndarray]):
+        self._chaves = _textos(secoes, "chaves")
+        self._posicoes = secoes["posicoes"]
+
+    def posicao(self, chave: str) -> Optional[int]:
+        indice = bisect_left(self._chaves, chave)
+        if indice < len(self._chaves) and self._chaves[indice] == chave:
+            return int(self._posicoes[indice])
+        return None
+
+
+class _IndiceOrdenado:
+    """
+    Busca em um índice gravado por _indice_ordenado
+
+    Um critério é uma faixa (mínimo, máximo), com None para o lado aberto, ou
+    um array de valores aceitos (códigos de modelo, por exemplo).
+    """
+
+    def __init__(self, secoes: Dict[str, np.ndarray], valores: np.ndarray):
+        self.ordem = secoes["ordem"]
+        self.chaves = secoes["chaves"]
+        # Valor de cada posição da tabela, para conferir candidatos vindos de outro índice
+        self.valores = valores
+
+    def limites(self, criterio: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Início e fim, nas chaves, de cada trecho que atende ao critério
+        """
+        if isinstance(criterio, tuple):
+            minimo, maximo = criterio
+            inicio = 0 if minimo is None else int(np.searchsorted(self.chaves, minimo, side="left"))
+            fim = len(self.chaves) if maximo is None else int(np.searchsorted(self.chaves, maximo, side="right"))
+            return np.array([inicio]), np.array([max(inicio, fim)])
+        aceitos = np.unique(criterio)
+        return np.searchsorted(self.chaves, aceitos, side="left"), np.searchsorted(self.chaves, aceitos, side="right")
+
+    def posicoes(self, criterio: Any) -> np.ndarray:
+        """
+        Posições que atendem ao critério, em ordem de valor (e de ID entre valores iguais)
+        """
+        inicios, fins = self.limites(criterio)
+        if len(inicios) == 1:
+            return self.ordem[int(inicios[0]):int(fins[0])]
+        return np.concatenate([self.ordem[inicio:fim] for inicio, fim in zip(inicios.tolist(), fins.tolist())] or [self.ordem[:0]])
+
+    def aceita(self, posicoes: np.ndarray, criterio: Any) -> np.ndarray:
+        valores = self.valores[posicoes]
+        if not isinstance(criterio, tuple):
+            return np.isin(valores, criterio)
+        mascara = np.ones(len(posicoes), dtype=bool)
+        _restringir(mascara, valores, *criterio)
+        return mascara
+
+    def quantidades(self, tamanho: int) -> np.ndarray:
+        """
+        Quantidade de registros com cada código de 0 a tamanho - 1
+        """
+        return np.diff(np.searchsorted(self.chaves, np.arange(tamanho + 1), side="left"))
+
+
+def _selecionar(criterios: Sequence[Tuple[_IndiceOrdenado, Any]]) -> np.ndarray:
+    """
+    Posições, em ordem de ID, dos registros que atendem a todos os critérios
+
+    O critério com menos registros, medido pelas buscas binárias, fornece os
+    candidatos, e só eles são conferidos contra os demais; o custo é o da
+    faixa mais estreita, não o da tabela.
+    """
+    tamanhos = [int(np.sum(fins - inicios)) for inicios, fins in (indice.limites(criterio) for indice, criterio in criterios)]
+    escolhido = tamanhos.index(min(tamanhos))
+    indice, criterio = criterios[escolhido]
+    posicoes = np.sort(indice.posicoes(criterio))
+    contar_linhas(len(posicoes))
+    for numero, (indice, criterio) in enumerate(criterios):
+        if numero != escolhido and len(posicoes):
+            posicoes = posicoes[indice.aceita(posicoes, criterio)]
+    return posicoes
+
+
+class _Geracao:
+    """
+    Uma geração publicada, aberta para leitura
+
+    Tabelas, colunas de análise e índices são vistas sobre as seções do
+    arquivo mapeado; só o que é pequeno (marcas, ranking) é copiado.
+    """
+
+    def __init__(self, numero: int, publicacao: Publicacao):
+        self.numero = numero
+        self.instancia: str = publicacao.metadados["instancia"]
+        self.versoes: Dict[str, int] = publicacao.metadados["versoes"]
+        self.tabelas: Dict[str, TabelaMapeada] = {
+            entidade: TabelaMapeada(modelo, publicacao.secoes(f"{entidade}.").get)
+            for entidade, (_, modelo) in ENTIDADES.items()
+        }
+
+        colunas_veiculos = ColunasVeiculos.de_secoes(publicacao.secoes("analise.veiculos."), publicacao.metadados["nomes_marcas"])
+        self.colunas_vendas = ColunasVendas.de_secoes(publicacao.secoes("analise.vendas."), colunas_veiculos)
+        self.receita_diaria = ReceitaDiaria.de_secoes(publicacao.secoes("receita_diaria."))
+        ranking = publicacao.secoes("ranking.")
+        self.ranking: List[Tuple[int, int, float, float]] = list(zip(
+            ranking["funcionario"].tolist(),
+            ranking["quantidade"].tolist(),
+            ranking["receita"].tolist(),
+            ranking["desconto_medio"].tolist()
+        ))
+
+        self.chaves_unicas = {
+            (entidade, campo): _ChaveUnica(publicacao.secoes(f"{entidade}.{campo}.indice."))
+            for entidade, campo in _UNICOS
+        }
+
+        marcas = publicacao.secoes("veiculos.marca.indice.")
+        self.marca = marcas["codigo"]
+        self.codigos_marcas = {normalizada: codigo for codigo, normalizada in enumerate(_textos(marcas, "normalizada"))}
+        self.nomes_marcas = list(_textos(marcas, "exibicao"))
+
+        modelos = publicacao.secoes("veiculos.modelo.indice.")
+        self.modelo = modelos["codigo"]
+        self._inicios_modelos = _textos(modelos, "inicios")
+        self._modelo_dos_inicios = modelos["inicios.modelo"]
+
+        self.indices: Dict[Tuple[str, str], _IndiceOrdenado] = {
+            (entidade, campo): _IndiceOrdenado(
+                publicacao.secoes(f"{entidade}.{campo}.indice."), self.tabelas[entidade].coluna(campo)
+            )
+            for entidade, campos in _ORDENADOS.items()
+            for campo in campos
+        }
+        self.indices[("veiculos", "marca")] = _IndiceOrdenado(marcas, self.marca)
+        self.indices[("veiculos", "modelo")] = _IndiceOrdenado(modelos, self.modelo)
+
+        cargos = publicacao.secoes("cargos.")
+        self.agregados_cargos: List[Tuple[int, int, float, float, float]] = list(zip(
+            cargos["cargo"].tolist(),
+            cargos["quantidade"].tolist(),
+            cargos["salario_total"].tolist(),
+            cargos["salario_minimo"].tolist(),
+            cargos["salario_maximo"].tolist()
+        ))
+
+    def modelos_com_prefixo(self, prefixo: str) -> np.ndarray:
+        """
+        Códigos dos modelos com alguma palavra começando pelo prefixo (já normalizado)
+        """
+        inicio = bisect_left(self._inicios_modelos, prefixo)
+        fim = bisect_left(self._inicios_modelos, prefixo + _ULTIMO, inicio)
+        return self._modelo_dos_inicios[inicio:fim]
+
+
+def _restringir(mascara: np.ndarray, valores: np.ndarray, minimo: Any, maximo: Any) -> None:
+    if minimo is not None:
+        mascara &= valores >= minimo
+    if maximo is not None:
+        mascara &= valores <= maximo
+
+
+def _ordinal(data: Optional[date]) -> Optional[int]:
+    return data.toordinal() if data is not None else None
+
+
+def _paginar(tabela: TabelaMapeada, criterios: Sequence[Tuple[_IndiceOrdenado, Any]], apos_id: Optional[int], limite: Optional[int]) -> np.ndarray:
+    """
+    Posições da página (em ordem de ID, depois de apos_id) dos registros que atendem aos critérios
+
+    Sem critérios a página sai direto da ordem da tabela, em O(limite).
+    """
+    if not criterios:
+        inicio = 0 if apos_id is None else int(np.searchsorted(tabela.ids, apos_id, side="right"))
+        fim = len(tabela) if limite is None else min(inicio + limite, len(tabela))
+        contar_linhas(fim - inicio)
+        return np.arange(inicio, fim)
+    posicoes = _selecionar(criterios)
+    if apos_id is not None:
+        posicoes = posicoes[np.searchsorted(tabela.ids[posicoes], apos_id, side="right"):]
+    return posicoes[:limite]
+
+
+def _codigo_cargo(cargo: str) -> int:
+    # Um cargo inexistente recebe um código que não aparece na coluna
+    try:
+        return _CARGOS.index(Cargo(cargo))
+    except ValueError:
+        return -2
+
+
+class DatabaseCompartilhado:
+    """
+    Implementação do Database para vários workers do uvicorn sobre o mesmo diretório
+
+    Os dados são publicados em gerações imutáveis (veja app.publicacao) que
+    cada processo mapeia em memória: todos leem as mesmas páginas do cache
+    do sistema operacional, sem cópia e sem travas, e a memória de cada
+    worker não cresce com os dados. Um único processo, o que obtém a trava
+    de escrita do diretório, mantém o Database com WAL, aplica todas as
+    escritas e publica uma nova geração depois delas; os demais enviam as
+    escritas a ele por um socket Unix. Uma escrita só retorna depois de
+    publicada, então a próxima leitura de qualquer worker já a enxerga. Se o
+    escritor termina, o primeiro worker que precisar escrever assume o papel.
+    """
+
+    def __init__(
+        self,
+        diretorio: str,
+        criar_armazenamento: Callable[[], ArmazenamentoWAL],
+        intervalo_publicacao_ms: float = 5
+    ):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._criar_armazenamento = criar_armazenamento
+        self._intervalo_publicacao_ms = intervalo_publicacao_ms
+        self._publicacoes = DiretorioPublicacoes(os.path.join(diretorio, "publicacao"))
+        self._caminho_trava = os.path.join(diretorio, "escritor.lock")
+        self._caminho_socket = os.path.join(diretorio, "escritor.sock")
+        self._escritor: Optional[_Escritor] = None
+        self._trava_escritor = threading.Lock()
+        self._geracao: Optional[_Geracao] = None
+        self._local = threading.local()
+        self._conexoes: List[socket.socket] = []
+        self._trava_conexoes = threading.Lock()
+        self._assumir_escrita()
+        self._atual()
+
+    @property
+    def escritor(self) -> bool:
+        """
+        Indica se este processo é o escritor
+        """
+        return self._escritor is not None
+
+    # Gerações
+
+    def _atual(self) -> _Geracao:
+        """
+        A geração publicada mais recente, aberta de novo só quando o número no controle muda
+        """
+        geracao = self._geracao
+        if geracao is not None and geracao.numero == self._publicacoes.geracao_atual():
+            return geracao
+        prazo = time.monotonic() + 60
+        while True:
+            numero = self._publicacoes.geracao_atual()
+            if numero:
+                # O arquivo pode ter sido substituído entre a leitura do número e a abertura
+                with suppress(FileNotFoundError):
+                    self._geracao = geracao = _Geracao(numero, self._publicacoes.abrir(numero))
+                    return geracao
+            if time.monotonic() > prazo:
+                raise RuntimeError(f"Nenhuma publicação disponível em {self._publicacoes.diretorio}")
+            time.sleep(0.05)
+
+    # Escrita
+
+    def _assumir_escrita(self) -> None:
+        """
+        Torna este processo o escritor, se nenhum outro detém a trava do diretório
+        """
+        descritor = os.open(self._caminho_trava, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(descritor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(descritor)
+            return
+        self._escritor = _Escritor(
+            descritor, self._criar_armazenamento(), self._publicacoes, self._caminho_socket, self._intervalo_publicacao_ms
+        )
+
+    def _conexao(self) -> Optional[socket.socket]:
+        """
+        Conexão desta thread com o escritor, ou None se não há escritor atendendo
+        """
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is not None:
+            # Uma conexão encerrada pelo outro lado aparece como fim de arquivo, sem bloquear
+            try:
+                encerrada = conexao.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+            except BlockingIOError:
+                encerrada = False
+            except OSError:
+                encerrada = True
+            if not encerrada:
+                return conexao
+            self._descartar(conexao)
+        conexao = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conexao.connect(self._caminho_socket)
+        except OSError:
+            conexao.close()
+            return None
+        self._local.conexao = conexao
+        with self._trava_conexoes:
+            self._conexoes.append(conexao)
+        return conexao
+
+    def _descartar(self, conexao: socket.socket) -> None:
+        conexao.close()
+        self._local.conexao = None
+        with self._trava_conexoes:
+            self._conexoes.remove(conexao)
+
+    def _escrever(self, nome: str, args: tuple, kwargs: dict) -> Any:
+        prazo = time.monotonic() + 30
+        while self._escritor is None:
+            conexao = self._conexao()
+            if conexao is None:
+                # Sem escritor atendendo: este processo tenta assumir o papel
+                with self._trava_escritor:
+                    if self._escritor is None:
+                        self._assumir_escrita()
+                if self._escritor is None:
+                    if time.monotonic() > prazo:
+                        raise ConnectionError("Nenhum processo escritor disponível")
+                    time.sleep(0.05)
+                continue
+            try:
+                _enviar(conexao, (nome, args, kwargs))
+                sucesso, resultado = _receber(conexao)
+            except OSError:
+                # A escrita pode ter sido aplicada ou não; repeti-la poderia duplicá-la
+                self._descartar(conexao)
+                raise ConnectionError("A conexão com o processo escritor foi perdida durante a escrita")
+            if not sucesso:
+                raise resultado
+            return resultado
+        return self._escritor.executar(nome, args, kwargs)
+
+    def esta_vazio(self) -> bool:
+        return not any(len(tabela) for tabela in self._atual().tabelas.values())
+
+    def versao_colecoes(self, *colecoes: str) -> str:
+        """
+        Identifica o estado atual das coleções: muda a cada alteração em qualquer uma delas
+        """
+        geracao = self._atual()
+        return "-".join([geracao.instancia, *(str(geracao.versoes[colecao]) for colecao in colecoes)])
+
+    def fechar(self) -> None:
+        with self._trava_conexoes:
+            for conexao in self._conexoes:
+                conexao.close()
+            self._conexoes.clear()
+        self._local = threading.local()
+        if self._escritor is not None:
+            self._escritor.fechar()
+            self._escritor = None
+
+    def bloqueante(self, operacao: str) -> bool:
+        """
+        Escritas esperam o escritor (WAL e publicação), e as leituras marcadas
+        como pesadas no Database percorrem a memória mapeada proporcionalmente
+        aos dados; as consultas por chave ficam no laço de eventos
+        """
+        return operacao in _ESCRITAS or getattr(getattr(Database, operacao, None), "pesada", False)
+
+    # Leituras genéricas
+
+    def _listar(self, entidade: str, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Any]:
+        return self._atual().tabelas[entidade].fatia(apos_id, limite).registros()
+
+    def _obter(self, entidade: str, registro_id: int) -> Optional[Any]:
+        return self._atual().tabelas[entidade].obter(registro_id)
+
+    def _obter_por_chave(self, entidade: str, campo: str, chave: str) -> Optional[Any]:
+        geracao = self._atual()
+        posicao = geracao.chaves_unicas[(entidade, campo)].posicao(chave)
+        return geracao.tabelas[entidade].de_posicoes([posicao]).registros()[0] if posicao is not None else None
+
+    # Funcionários
+
+    def get_all_funcionarios(self) -> List[Funcionario]:
+        return self._listar("funcionarios")
+
+    def get_funcionario_by_id(self, funcionario_id: int) -> Optional[Funcionario]:
+        return self._obter("funcionarios", funcionario_id)
+
+    def get_funcionario_by_email(self, email: str) -> Optional[Funcionario]:
+        return self._obter_por_chave("funcionarios", "email", chave_email(email))
+
+    def _filtrar_ordenado(self, campo: str, minimo: Any, maximo: Any) -> List[Funcionario]:
+        # O índice publicado já está na ordem do resultado (valor, depois ID)
+        geracao = self._atual()
+        posicoes = geracao.indices[("funcionarios", campo)].posicoes((minimo, maximo))
+        contar_linhas(len(posicoes))
+        return geracao.tabelas["funcionarios"].de_posicoes(posicoes).registros()
+
+    def filtrar_por_salario(self, salario_min: Optional[float] = None, salario_max: Optional[float] = None) -> List[Funcionario]:
+        """
+        Filtra funcionários por faixa salarial, ordenados pelo salário
+        """
+        return self._filtrar_ordenado("salario", salario_min, salario_max)
+
+    def filtrar_por_data_contratacao(self, data_inicial: Optional[date] = None, data_final: Optional[date] = None) -> List[Funcionario]:
+        """
+        Filtra funcionários por período de contratação, ordenados pela data
+        """
+        return self._filtrar_ordenado("data_contratacao", _ordinal(data_inicial), _ordinal(data_final))
+
+    def filtrar_por_cargo(self, cargo: str) -> List[Funcionario]:
+        """
+        Filtra funcionários por cargo
+        """
+        return self.consultar_funcionarios(cargo=cargo)
+
+    def consultar_funcionarios(
+        self,
+        cargo: Optional[str] = None,
+        salario_min: Optional[float] = None,
+        salario_max: Optional[float] = None,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None,
+        apos_id: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> List[Funcionario]:
+        """
+        Filtra funcionários combinando todos os critérios, a partir do índice publicado mais seletivo
+        """
+        geracao = self._atual()
+        tabela = geracao.tabelas["funcionarios"]
+        criterios = []
+        if cargo is not None:
+            codigo = _codigo_cargo(cargo)
+            criterios.append((geracao.indices[("funcionarios", "cargo")], (codigo, codigo)))
+        if salario_min is not None or salario_max is not None:
+            criterios.append((geracao.indices[("funcionarios", "salario")], (salario_min, salario_max)))
+        if data_inicial is not None or data_final is not None:
+            criterios.append((geracao.indices[("funcionarios", "data_contratacao")], (_ordinal(data_inicial), _ordinal(data_final))))
+        return tabela.de_posicoes(_paginar(tabela, criterios, apos_id, limite)).registros()
+
+    def calcular_estatisticas(self) -> EstatisticasGerais:
+        """
+        Calcula estatísticas gerais e por cargo dos funcionários
+
+        Os agregados de cada cargo são os mantidos pelo escritor e publicados
+        com os funcionários, então o custo depende apenas da quantidade de cargos.
+        """
+        agregados = self._atual().agregados_cargos
+        contar_linhas(len(agregados))
+        estatisticas_por_cargo = [
+            EstatisticasCargo(
+                cargo=_CARGOS[codigo].value,
+                quantidade=quantidade,
+                salario_total=total,
+                salario_medio=total / quantidade if quantidade else 0,
+                salario_minimo=minimo,
+                salario_maximo=maximo
+            )
+            for codigo, quantidade, total, minimo, maximo in agregados
+        ]
+        total_funcionarios = sum(e.quantidade for e in estatisticas_por_cargo)
+        total_salarios = sum(e.salario_total for e in estatisticas_por_cargo)
+        return EstatisticasGerais(
+            total_funcionarios=total_funcionarios,
+            total_salarios=total_salarios,
+            salario_medio=total_salarios / total_funcionarios if total_funcionarios > 0 else 0,
+            estatisticas_por_cargo=estatisticas_por_cargo
+        )
+
+    # Veículos
+
+    def get_all_veiculos(self) -> List[Veiculo]:
+        return self._listar("veiculos")
+
+    def listar_veiculos(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Veiculo]:
+        return self._listar("veiculos", apos_id, limite)
+
+    def exportar_veiculos(self, id_inicial: Optional[int] = None, id_final: Optional[int] = None) -> Iterator[Veiculo]:
+        apos_id = None if id_inicial is None else id_inicial - 1
+        return _iterar_paginas(self.listar_veiculos, apos_id, id_final)
+
+    def buscar_veiculos(
+        self,
+        marca: Optional[str] = None,
+        modelo: Optional[str] = None,
+        tipo: Optional[TipoVeiculo] = None,
+        ano_min: Optional[int] = None,
+        ano_max: Optional[int] = None,
+        preco_min: Optional[float] = None,
+        preco_max: Optional[float] = None,
+        disponivel: Optional[bool] = None,
+        apos_id: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> BuscaVeiculos:
+        """
+        Busca no estoque com facetas por marca e tipo, a partir do índice publicado mais seletivo
+
+        Marca e modelo ignoram acentos e maiúsculas; o modelo casa pelo início
+        de qualquer palavra. Os itens vêm em ordem de ID, a partir de apos_id.
+        Sem nenhum critério, total e facetas saem dos índices, sem percorrer o estoque.
+        """
+        geracao = self._atual()
+        tabela = geracao.tabelas["veiculos"]
+        indices = {campo: geracao.indices[("veiculos", campo)] for campo in ("marca", "modelo", "tipo")}
+        criterios = []
+        if marca is not None:
+            codigo = geracao.codigos_marcas.get(normalizar(marca), -1)
+            criterios.append((indices["marca"], (codigo, codigo)))
+        if modelo is not None and normalizar(modelo):
+            criterios.append((indices["modelo"], geracao.modelos_com_prefixo(normalizar(modelo))))
+        if tipo is not None:
+            codigo = _TIPOS.index(TipoVeiculo(tipo))
+            criterios.append((indices["tipo"], (codigo, codigo)))
+        for campo, minimo, maximo in (("ano", ano_min, ano_max), ("preco", preco_min, preco_max), ("disponivel", disponivel, disponivel)):
+            if minimo is not None or maximo is not None:
+                criterios.append((geracao.indices[("veiculos", campo)], (minimo, maximo)))
+
+        if criterios:
+            posicoes = _selecionar(criterios)
+            total = len(posicoes)
+            por_marca = np.bincount(geracao.marca[posicoes], minlength=len(geracao.nomes_marcas))
+            por_tipo = np.bincount(tabela.coluna("tipo")[posicoes], minlength=len(_TIPOS))
+            inicio = 0 if apos_id is None else int(np.searchsorted(tabela.ids[posicoes], apos_id, side="right"))
+            pagina = posicoes[inicio:]
+        else:
+            total = len(tabela)
+            por_marca = indices["marca"].quantidades(len(geracao.nomes_marcas))
+            por_tipo = indices["tipo"].quantidades(len(_TIPOS))
+            inicio = 0 if apos_id is None else int(np.searchsorted(tabela.ids, apos_id, side="right"))
+            pagina = np.arange(inicio, len(tabela) if limite is None else min(inicio + limite, len(tabela)))
+            contar_linhas(len(pagina))
+        normalizadas = list(geracao.codigos_marcas)
+        marcas = sorted((-quantidade, normalizadas[codigo], codigo) for codigo, quantidade in enumerate(por_marca.tolist()) if quantidade)
+        tipos = sorted((-quantidade, _TIPOS[codigo].value) for codigo, quantidade in enumerate(por_tipo.tolist()) if quantidade)
+
+        return BuscaVeiculos(
+            total=total,
+            itens=tabela.de_posicoes(pagina[:limite]).registros(),
+            facetas_marca={geracao.nomes_marcas[codigo]: -quantidade for quantidade, _, codigo in marcas},
+            facetas_tipo={valor: -quantidade for quantidade, valor in tipos}
+        )
+
+    def get_veiculo_by_id(self, veiculo_id: int) -> Optional[Veiculo]:
+        return self._obter("veiculos", veiculo_id)
+
+    # Clientes
+
+    def get_all_clientes(self) -> List[Cliente]:
+        return self._listar("clientes")
+
+    def listar_clientes(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Cliente]:
+        return self._listar("clientes", apos_id, limite)
+
+    def exportar_clientes(self, id_inicial: Optional[int] = None, id_final: Optional[int] = None) -> Iterator[Cliente]:
+        apos_id = None if id_inicial is None else id_inicial - 1
+        return _iterar_paginas(self.listar_clientes, apos_id, id_final)
+
+    def get_cliente_by_id(self, cliente_id: int) -> Optional[Cliente]:
+        return self._obter("clientes", cliente_id)
+
+    def get_cliente_by_cpf(self, cpf: str) -> Optional[Cliente]:
+        return self._obter_por_chave("clientes", "cpf", chave_cpf(cpf))
+
+    def get_cliente_by_email(self, email: str) -> Optional[Cliente]:
+        return self._obter_por_chave("clientes", "email", chave_email(email))
+
+    # Vendas
+
+    def get_all_vendas(self) -> List[Venda]:
+        return self._listar("vendas")
+
+    def listar_vendas(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Venda]:
+        return self._listar("vendas", apos_id, limite)
+
+    def exportar_vendas(
+        self,
+        id_inicial: Optional[int] = None,
+        id_final: Optional[int] = None,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> Iterator[Venda]:
+        """
+        Percorre as vendas em ordem de ID, filtrando por faixa de ID e período
+        """
+        apos_id = None if id_inicial is None else id_inicial - 1
+        for venda in _iterar_paginas(self.listar_vendas, apos_id, id_final):
+            if data_inicial is not None and venda.data_venda < data_inicial:
+                continue
+            if data_final is not None and venda.data_venda > data_final:
+                continue
+            yield venda
+
+    def get_venda_by_id(self, venda_id: int) -> Optional[Venda]:
+        return self._obter("vendas", venda_id)
+
+    def _vendas_relacionadas(self, entidade: str, campo: str, registro_id: int) -> Optional[List[Venda]]:
+        geracao = self._atual()
+        if registro_id not in geracao.tabelas[entidade]:
+            return None
+        posicoes = geracao.indices[("vendas", campo)].posicoes((registro_id, registro_id))
+        return geracao.tabelas["vendas"].de_posicoes(posicoes).registros()
+
+    def get_vendas_by_cliente(self, cliente_id: int) -> Optional[List[Venda]]:
+        """
+        Vendas do cliente em ordem de ID, ou None se o cliente não existe
+        """
+        return self._vendas_relacionadas("clientes", "cliente_id", cliente_id)
+
+    def get_vendas_by_funcionario(self, funcionario_id: int) -> Optional[List[Venda]]:
+        """
+        Vendas feitas pelo funcionário em ordem de ID, ou None se o funcionário não existe
+        """
+        return self._vendas_relacionadas("funcionarios", "funcionario_id", funcionario_id)
+
+    def get_vendas_by_veiculo(self, veiculo_id: int) -> Optional[List[Venda]]:
+        """
+        Histórico de vendas do veículo em ordem de ID, ou None se o veículo não existe
+        """
+        return self._vendas_relacionadas("veiculos", "veiculo_id", veiculo_id)
+
+    def analisar_vendas(
+        self,
+        dimensao: str,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> List[ResumoVendas]:
+        """
+        Receita, quantidade e desconto das vendas agrupados por mes, vendedor, tipo, marca ou total
+        """
+        return self._atual().colunas_vendas.agrupar(dimensao, data_inicial, data_final)
+
+    def receita_por_periodo(
+        self,
+        inicio: Optional[date] = None,
+        fim: Optional[date] = None,
+        granularidade: str = "dia"
+    ) -> ReceitaVendas:
+        """
+        Quantidade e receita das vendas por dia, mês ou ano, somadas das árvores publicadas pelo escritor
+        """
+        return self._atual().receita_diaria.resumir(inicio, fim, granularidade)
+
+    def ranking_vendedores(self, limite: int = 10) -> List[RankingVendedor]:
+        """
+        Os vendedores com maior receita, com quantidade de vendas e desconto médio
+
+        O ranking é o mantido pelo escritor, com o desconto de cada venda
+        calculado sobre o preço do veículo no momento da venda.
+        """
+        geracao = self._atual()
+        funcionarios = geracao.tabelas["funcionarios"]
+        return [
+            RankingVendedor(
+                posicao=posicao,
+                funcionario_id=funcionario_id,
+                nome=funcionarios.valor(funcionario_id, "nome"),
+                cargo=funcionarios.valor(funcionario_id, "cargo"),
+                quantidade_vendas=quantidade,
+                receita=receita,
+                desconto_medio=desconto_medio
+            )
+            for posicao, (funcionario_id, quantidade, receita, desconto_medio) in enumerate(geracao.ranking[:limite], start=1)
+        ]
+
+
+def _escrita(nome: str) -> Callable[..., Any]:
+    def metodo(self: DatabaseCompartilhado, *args, **kwargs) -> Any:
+        return self._escrever(nome, args, kwargs)
+    metodo.__name__ = metodo.__qualname__ = nome
+    return metodo
+
+
+# add_funcionario, add_funcionarios, update_funcionario, update_funcionarios, ... são todos repassados ao escritor
+for _nome in _ESCRITAS:
+    setattr(DatabaseCompartilhado, _nome, _escrita(_nome))
+del _nome
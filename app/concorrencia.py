@@ -0,0 +1,198 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator, Optional
+
+
+class TravaOcupada(Exception):
+    """
+    A trava está ocupada e a thread atual não pode esperar por ela (veja sem_espera)
+    """
+
+
+_thread_atual = threading.local()
+
+
+@contextmanager
+def sem_espera() -> Iterator[None]:
+    """
+    Dentro do bloco, quem precisaria esperar pela trava recebe TravaOcupada
+
+    Usado pelo laço de eventos, que não pode ficar parado enquanto outra
+    thread escreve. A exceção é levantada antes de a trava ser obtida, então
+    nada foi lido nem alterado e a operação pode ser repetida em outra thread.
+    """
+    anterior = getattr(_thread_atual, "sem_espera", False)
+    _thread_atual.sem_espera = True
+    try:
+        yield
+    finally:
+        _thread_atual.sem_espera = anterior
+
+
+def _recusar_espera() -> None:
+    if getattr(_thread_atual, "sem_espera", False):
+        raise TravaOcupada()
+
+
+class TravaLeituraEscrita:
+    """
+    Trava de leitura e escrita (reader-writer lock)
+
+    Qualquer quantidade de leitores pode entrar ao mesmo tempo; um escritor
+    entra sozinho. Escritores aguardando têm preferência sobre novos leitores,
+    para que um fluxo contínuo de leituras não impeça as escritas. A thread que
+    detém a escrita pode reentrar, tanto para ler quanto para escrever. Dentro
+    de sem_espera(), uma entrada que teria de esperar levanta TravaOcupada.
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escritores_aguardando = 0
+        self._escritor: Optional[int] = None
+        self._profundidade_escrita = 0
+
+    @contextmanager
+    def leitura(self) -> Iterator[None]:
+        if self._escritor == threading.get_ident():
+            yield
+            return
+        with self._condicao:
+            if self._escritor is not None or self._escritores_aguardando:
+                _recusar_espera()
+            while self._escritor is not None or self._escritores_aguardando:
+                self._condicao.wait()
+            self._leitores += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._leitores -= 1
+                if not self._leitores:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def escrita(self) -> Iterator[None]:
+        thread = threading.get_ident()
+        with self._condicao:
+            if self._escritor != thread:
+                if self._escritor is not None or self._leitores:
+                    _recusar_espera()
+                self._escritores_aguardando += 1
+                try:
+                    while self._escritor is not None or self._leitores:
+                        self._condicao.wait()
+                finally:
+                    self._escritores_aguardando -= 1
+                self._escritor = thread
+            self._profundidade_escrita += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._profundidade_escrita -= 1
+                if not self._profundidade_escrita:
+                    self._escritor = None
+                    self._condicao.notify_all()
+
+    def escrevendo(self) -> bool:
+        """
+        Indica se a thread atual detém a trava de escrita
+        """
+        return self._escritor == threading.get_ident()
+
+
+def _aguardar_escritas(banco) -> None:
+    """
+    Recusa a leitura se o armazenamento falhou, e espera que a última escrita concluída seja durável
+
+    A escrita libera a trava antes do fsync, para que outras escritas entrem
+    no mesmo grupo; quem lê espera, já sob a trava de leitura, pelo fsync
+    que a torna durável. Como nenhuma escrita nova entra enquanto há
+    leitores, a espera é a do grupo em andamento. Dentro de sem_espera()
+    ela levanta TravaOcupada, e a thread que detém a escrita lê sem esperar.
+    """
+    banco._armazenamento.verificar()
+    sequencia = banco._sequencia_escrita
+    if banco._trava.escrevendo() or banco._armazenamento.duravel(sequencia):
+        return
+    _recusar_espera()
+    banco._armazenamento.aguardar(sequencia)
+
+
+def leitura(metodo: Callable) -> Callable:
+    """
+    Executa o método do Database sob a trava de leitura
+
+    Depois de uma falha de gravação no armazenamento a leitura é recusada,
+    porque a memória pode conter uma alteração que não chegou ao disco; antes
+    disso, ela só começa quando as escritas já concluídas estão em disco.
+    """
+    @wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        with self._trava.leitura():
+            _aguardar_escritas(self)
+            return metodo(self, *args, **kwargs)
+    return envolvido
+
+
+def leitura_fatiada(metodo: Callable) -> Callable:
+    """
+    Como leitura, para métodos que retornam uma Fatia da tabela (ou None)
+
+    Sob a trava só as colunas são copiadas; os modelos são montados depois
+    que ela é liberada, sem bloquear as escritas.
+    """
+    @wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        with self._trava.leitura():
+            _aguardar_escritas(self)
+            fatia = metodo(self, *args, **kwargs)
+        return fatia.registros() if fatia is not None else None
+    return envolvido
+
+
+def escrita(metodo: Callable) -> Callable:
+    """
+    Executa o método do Database sob a trava de escrita
+
+    A espera pela gravação no armazenamento acontece depois que a trava é
+    liberada, para que várias escritas possam compartilhar o mesmo fsync; as
+    leituras esperam pelo mesmo fsync (veja _aguardar_escritas). A escrita
+    só retorna, com sucesso ou erro, quando tudo o que ela pode ter visto
+    está em disco. Se o armazenamento já falhou, ela é recusada antes de
+    alterar a memória.
+    """
+    @wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        externa = not self._trava.escrevendo()
+        sequencia = 0
+        try:
+            with self._trava.escrita():
+                if externa:
+                    self._armazenamento.verificar()
+                try:
+                    return metodo(self, *args, **kwargs)
+                finally:
+                    if externa:
+                        if self._sequencia_pendente:
+                            self._sequencia_escrita, self._sequencia_pendente = self._sequencia_pendente, 0
+                        sequencia = self._sequencia_escrita
+        finally:
+            if sequencia:
+                self._armazenamento.aguardar(sequencia)
+    envolvido.aguarda_armazenamento = True
+    return envolvido
+
+
+def pesada(metodo: Callable) -> Callable:
+    """
+    Marca uma leitura do Database cujo custo cresce com os dados ou com o resultado
+
+    Listagens sem limite, filtros, buscas e análises não rodam no laço de
+    eventos do DatabaseAssincrono, e sim no executor (veja Database.bloqueante).
+    Só as consultas por chave, em O(1) ou O(log n), ficam sem a marca.
+    """
+    metodo.pesada = True
+    return metodo
@@ -0,0 +1,41 @@
+import os
+
+from dotenv import load_dotenv
+
+
+# Lê as variáveis de um arquivo .env, se existir
+load_dotenv()
+
+# Onde os dados ficam guardados: "memoria" (padrão, sem persistência), "wal", "sqlite" ou "compartilhado"
+# ("wal" publicado para vários workers; veja app.compartilhado)
+BACKEND = os.getenv("CONCESSIONARIA_BACKEND", "memoria")
+
+# Diretório do log de escrita antecipada (WAL) e dos snapshots
+DIRETORIO_DADOS = os.getenv("CONCESSIONARIA_DIRETORIO_DADOS", "dados")
+
+# Janela, em milissegundos, para agrupar gravações em um único fsync (group commit)
+WAL_INTERVALO_COMMIT_MS = float(os.getenv("CONCESSIONARIA_WAL_INTERVALO_COMMIT_MS", "2"))
+
+# Quantidade de operações no WAL que dispara um novo snapshot
+WAL_OPERACOES_POR_SNAPSHOT = int(os.getenv("CONCESSIONARIA_WAL_OPERACOES_POR_SNAPSHOT", "100000"))
+
+# Backend "compartilhado": janela, em milissegundos, para reunir várias escritas em uma mesma publicação
+PUBLICACAO_INTERVALO_MS = float(os.getenv("CONCESSIONARIA_PUBLICACAO_INTERVALO_MS", "5"))
+
+# Arquivo do banco quando o backend é "sqlite" (compartilhável entre vários workers)
+SQLITE_CAMINHO = os.getenv("CONCESSIONARIA_SQLITE_CAMINHO", os.path.join(DIRETORIO_DADOS, "concessionaria.db"))
+
+# Tamanho máximo, em bytes, das respostas guardadas no cache HTTP (0 desativa o armazenamento)
+CACHE_RESPOSTAS_BYTES = int(os.getenv("CONCESSIONARIA_CACHE_RESPOSTAS_BYTES", str(32 * 1024 * 1024)))
+
+# Threads do executor que atende as operações bloqueantes do banco (escritas, leituras pesadas, consultas ao SQLite)
+THREADS_BANCO = int(os.getenv("CONCESSIONARIA_THREADS_BANCO", "8"))
+
+# Token das rotas de administração e do perfilamento sob demanda (vazio desativa ambos)
+ADMIN_TOKEN = os.getenv("CONCESSIONARIA_ADMIN_TOKEN", "")
+
+# Fração das requisições perfiladas por sorteio (0 desativa a amostragem)
+PERFIL_AMOSTRAGEM = float(os.getenv("CONCESSIONARIA_PERFIL_AMOSTRAGEM", "0"))
+
+# Quantidade de perfis guardados; os mais antigos são descartados
+PERFIL_CAPACIDADE = int(os.getenv("CONCESSIONARIA_PERFIL_CAPACIDADE", "32"))
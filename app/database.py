@@ -1,122 +1,720 @@
-from app.models import Funcionario, EstatisticasCargo, EstatisticasGerais, Veiculo, Cliente, Venda
-from typing import List, Optional, Dict
+from app.models import Funcionario, EstatisticasCargo, EstatisticasGerais, Veiculo, Cliente, Venda, ResumoVendas, RankingVendedor, BuscaVeiculos, TipoVeiculo, ReceitaVendas
+from app.tabela import Fatia, Tabela, de_linha, de_linhas, de_linhas_leves, para_linha
+from app.indices import IndiceOrdenado, IndiceUnico, AgregadoSalarial, RankingVendedores, chave_cpf, chave_email
+from app.persistencia import Armazenamento, ArmazenamentoWAL
+from app.concorrencia import TravaLeituraEscrita, leitura, leitura_fatiada, escrita, pesada
+from app.analise import ColunasVeiculos, ColunasVendas, ReceitaDiaria
+from app.busca import IndiceVeiculos
+from app.erros import ErroIntegridade, nao_encontrado
+from app.assincrono import DatabaseAssincrono
+from app.metricas import contar_linhas, instrumentar
+from app import config
+from typing import Any, Callable, Collection, Iterator, List, Optional, Dict, Tuple, Type
+from bisect import bisect_right
 from datetime import date
+from pydantic import BaseModel
+import gc
+import logging
+import os
+import numpy as np
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# Nome da coleção -> (nome no singular usado nos métodos, modelo)
+ENTIDADES: Dict[str, Tuple[str, Type[BaseModel]]] = {
+    "funcionarios": ("funcionario", Funcionario),
+    "veiculos": ("veiculo", Veiculo),
+    "clientes": ("cliente", Cliente),
+    "vendas": ("venda", Venda),
+}
+
+
+def _associar(indice: Dict[Any, Dict[int, None]], chave: Any, registro_id: int) -> None:
+    indice.setdefault(chave, {})[registro_id] = None
+
+
+def _desassociar(indice: Dict[Any, Dict[int, None]], chave: Any, registro_id: int) -> None:
+    ids = indice.get(chave)
+    if ids is not None:
+        ids.pop(registro_id, None)
+        if not ids:
+            del indice[chave]
+
+
+def _iterar_paginas(
+    listar: Callable[[Optional[int], int], List[BaseModel]],
+    apos_id: Optional[int],
+    ate_id: Optional[int],
+    lote: int = 1000
+) -> Iterator[BaseModel]:
+    """
+    Percorre uma coleção em ordem de ID, buscando-a em páginas
+
+    Cada página é lida sob a trava de leitura e a próxima parte do último ID
+    visto, então a iteração convive com inclusões e remoções simultâneas.
+    """
+    while True:
+        pagina = listar(apos_id, lote)
+        for registro in pagina:
+            if ate_id is not None and registro.id > ate_id:
+                return
+            yield registro
+        if len(pagina) < lote:
+            return
+        apos_id = pagina[-1].id
 
 
 class Database:
-    def __init__(self):
-        self.funcionarios: List[Funcionario] = []
-        self.veiculos: List[Veiculo] = []
-        self.clientes: List[Cliente] = []
-        self.vendas: List[Venda] = []
-        self.counter = 1
-        self.veiculo_counter = 1
-        self.cliente_counter = 1
-        self.venda_counter = 1
+    def __init__(self, armazenamento: Optional[Armazenamento] = None):
+        self.funcionarios: Tabela[Funcionario] = Tabela(Funcionario)
+        self.veiculos: Tabela[Veiculo] = Tabela(Veiculo)
+        self.clientes: Tabela[Cliente] = Tabela(Cliente)
+        self.vendas: Tabela[Venda] = Tabela(Venda)
+
+        # Índices secundários dos funcionários
+        self._indice_salario = IndiceOrdenado()
+        self._indice_contratacao = IndiceOrdenado()
+        self._funcionarios_por_cargo: Dict[str, Dict[int, None]] = {}
+        self._agregados_por_cargo: Dict[str, AgregadoSalarial] = {}
+
+        # Índices únicos: e-mail em minúsculas e CPF apenas com dígitos -> ID
+        self._funcionarios_por_email = IndiceUnico()
+        self._clientes_por_email = IndiceUnico()
+        self._clientes_por_cpf = IndiceUnico()
+
+        # Índices de busca do estoque de veículos
+        self._indice_veiculos = IndiceVeiculos()
+
+        # Cópia colunar de vendas e veículos para as análises de vendas
+        self._colunas_veiculos = ColunasVeiculos()
+        self._colunas_vendas = ColunasVendas(self._colunas_veiculos)
+
+        # Ranking dos vendedores pela receita, atualizado a cada venda
+        self._ranking_vendedores = RankingVendedores()
+
+        # Quantidade e receita das vendas por dia, para somas de intervalos em O(log d)
+        self._receita_diaria = ReceitaDiaria()
+
+        # Índices reversos: ID do veículo, cliente ou funcionário -> IDs das vendas
+        self._vendas_por_veiculo: Dict[int, Dict[int, None]] = {}
+        self._vendas_por_cliente: Dict[int, Dict[int, None]] = {}
+        self._vendas_por_funcionario: Dict[int, Dict[int, None]] = {}
+
+        # Versão de cada coleção, incrementada a cada alteração (usada nos ETags);
+        # o identificador da instância evita reaproveitar versões de outra execução
+        self._versoes: Dict[str, int] = dict.fromkeys(ENTIDADES, 0)
+        self._instancia = os.urandom(6).hex()
+
+        # Persistência: sem armazenamento, os dados ficam apenas em memória
+        self._armazenamento = armazenamento or Armazenamento()
+        self._restaurando = False
+        self._sequencia_pendente = 0
+        # Sequência da última escrita concluída; leituras esperam que ela esteja em disco
+        self._sequencia_escrita = 0
+
+        # Leituras ocorrem em paralelo; cada escrita é atômica e exclusiva
+        self._trava = TravaLeituraEscrita()
+        if armazenamento is not None:
+            self._recuperar()
+
+    def _indexar_veiculo(self, veiculo: Veiculo) -> None:
+        self._indice_veiculos.adicionar(veiculo)
+        self._colunas_veiculos.definir(veiculo)
+
+    def _indexar_veiculos(self, veiculos: List[Veiculo]) -> None:
+        self._indice_veiculos.adicionar_lote(veiculos)
+        self._colunas_veiculos.definir_lote(veiculos)
+
+    def _desindexar_veiculo(self, veiculo: Veiculo) -> None:
+        self._indice_veiculos.remover(veiculo)
+        self._colunas_veiculos.remover(veiculo.id)
+
+    def _indexar_venda(self, venda: Venda) -> None:
+        # O preço de tabela é o atual do veículo
+        preco = self.veiculos.valor(venda.veiculo_id, "preco")
+        desconto = preco - venda.valor_venda if preco is not None else None
+        self._colunas_vendas.adicionar(venda, preco)
+        self._ranking_vendedores.adicionar(venda.id, venda.funcionario_id, venda.valor_venda, desconto)
+        self._receita_diaria.adicionar(venda)
+        _associar(self._vendas_por_veiculo, venda.veiculo_id, venda.id)
+        _associar(self._vendas_por_cliente, venda.cliente_id, venda.id)
+        _associar(self._vendas_por_funcionario, venda.funcionario_id, venda.id)
+
+    def _indexar_vendas(self, vendas: List[Venda], descontos: Optional[Dict[int, float]] = None) -> None:
+        """
+        Indexa várias vendas, com uma construção em lote por estrutura
+
+        descontos são os já calculados (de um snapshot); as demais vendas usam
+        o preço atual do veículo, como em _indexar_venda.
+        """
+        descontos = descontos or {}
+        veiculo_ids = np.fromiter((venda.veiculo_id for venda in vendas), dtype=np.int64, count=len(vendas))
+        precos = self._colunas_veiculos.coluna(self._colunas_veiculos.preco, veiculo_ids, np.nan).tolist()
+        descontos_vendas: List[Optional[float]] = []
+        for posicao, venda in enumerate(vendas):
+            desconto = descontos.get(venda.id)
+            if desconto is not None:
+                precos[posicao] = venda.valor_venda + desconto
+            elif precos[posicao] == precos[posicao]:
+                desconto = precos[posicao] - venda.valor_venda
+            descontos_vendas.append(desconto)
+        self._colunas_vendas.adicionar_lote(vendas, precos)
+        self._ranking_vendedores.adicionar_lote(
+            (venda.id, venda.funcionario_id, venda.valor_venda, desconto) for venda, desconto in zip(vendas, descontos_vendas)
+        )
+        self._receita_diaria.adicionar_lote(vendas)
+        por_veiculo = self._vendas_por_veiculo.setdefault
+        por_cliente = self._vendas_por_cliente.setdefault
+        por_funcionario = self._vendas_por_funcionario.setdefault
+        for venda in vendas:
+            por_veiculo(venda.veiculo_id, {})[venda.id] = None
+            por_cliente(venda.cliente_id, {})[venda.id] = None
+            por_funcionario(venda.funcionario_id, {})[venda.id] = None
+
+    def _desindexar_venda(self, venda: Venda) -> None:
+        self._colunas_vendas.remover(venda.id)
+        self._ranking_vendedores.remover(venda.id)
+        self._receita_diaria.remover(venda.id)
+        _desassociar(self._vendas_por_veiculo, venda.veiculo_id, venda.id)
+        _desassociar(self._vendas_por_cliente, venda.cliente_id, venda.id)
+        _desassociar(self._vendas_por_funcionario, venda.funcionario_id, venda.id)
+
+    # Integridade referencial das vendas
+    def _conflito_venda(
+        self,
+        venda: Venda,
+        anterior: Optional[Venda] = None,
+        reservados: Collection[int] = ()
+    ) -> Optional[str]:
+        """
+        Motivo pelo qual a venda não pode ser registrada, ou None se ela é válida
+
+        reservados são os veículos já vendidos por itens anteriores do mesmo lote.
+        """
+        if venda.cliente_id not in self.clientes:
+            return f"Cliente com ID {venda.cliente_id} não encontrado"
+        if venda.funcionario_id not in self.funcionarios:
+            return f"Funcionário com ID {venda.funcionario_id} não encontrado"
+        disponivel = self.veiculos.valor(venda.veiculo_id, "disponivel")
+        if disponivel is None:
+            return f"Veículo com ID {venda.veiculo_id} não encontrado"
+        mesmo_veiculo = anterior is not None and anterior.veiculo_id == venda.veiculo_id
+        if not mesmo_veiculo and (not disponivel or venda.veiculo_id in reservados):
+            return f"Veículo com ID {venda.veiculo_id} não está disponível para venda"
+        return None
+
+    def _definir_disponibilidade(self, veiculo_id: int, disponivel: bool) -> None:
+        # Só a coluna e o índice de disponibilidade mudam; os modelos já entregues a leitores são cópias
+        atual = self.veiculos.valor(veiculo_id, "disponivel")
+        if atual is None or atual == disponivel:
+            return
+        if disponivel and veiculo_id in self._vendas_por_veiculo:
+            return
+        self.veiculos.definir_valor(veiculo_id, "disponivel", disponivel)
+        self._indice_veiculos.definir_disponivel(veiculo_id, disponivel)
+        self._versoes["veiculos"] += 1
+
+    def _verificar_sem_vendas(self, indice: Dict[int, Dict[int, None]], registro_id: int, descricao: str) -> None:
+        if not self._restaurando and registro_id in indice:
+            raise ErroIntegridade(f"{descricao} com ID {registro_id} possui vendas registradas e não pode ser removido")
+
+    # Atualização e remoção, isoladas ou em lote
+    def _atualizar(self, entidade: str, registro_id: int, registro: BaseModel) -> Optional[BaseModel]:
+        atualizado = getattr(self, f"_atualizar_{ENTIDADES[entidade][0]}")(registro_id, registro)
+        if atualizado is not None:
+            self._registrar("update", entidade, atualizado)
+        return atualizado
+
+    def _remover(self, entidade: str, registro_id: int) -> bool:
+        removido = getattr(self, f"_remover_{ENTIDADES[entidade][0]}")(registro_id)
+        if removido:
+            self._registrar("delete", entidade, registro_id)
+        return removido
+
+    def _atualizar_lote(self, entidade: str, registros: List[BaseModel]) -> Dict[int, str]:
+        """
+        Atualiza cada registro (pelo seu id) e retorna os erros por posição
+
+        Os itens são aplicados em ordem, dentro da mesma escrita: um item
+        rejeitado não altera nada e não impede os demais, e todos os
+        atualizados vão para um único registro do WAL.
+        """
+        atualizar = getattr(self, f"_atualizar_{ENTIDADES[entidade][0]}")
+        erros: Dict[int, str] = {}
+        atualizados = []
+        for posicao, registro in enumerate(registros):
+            try:
+                atualizado = atualizar(registro.id, registro)
+            except ErroIntegridade as erro:
+                erros[posicao] = str(erro)
+                continue
+            if atualizado is None:
+                erros[posicao] = nao_encontrado(registro.id)
+            else:
+                atualizados.append(atualizado)
+        if atualizados:
+            self._registrar("update_lote", entidade, atualizados)
+        return erros
+
+    def _remover_lote(self, entidade: str, registro_ids: List[int]) -> Dict[int, str]:
+        """
+        Remove cada ID e retorna os erros por posição, como _atualizar_lote
+        """
+        remover = getattr(self, f"_remover_{ENTIDADES[entidade][0]}")
+        erros: Dict[int, str] = {}
+        removidos = []
+        for posicao, registro_id in enumerate(registro_ids):
+            try:
+                removido = remover(registro_id)
+            except ErroIntegridade as erro:
+                erros[posicao] = str(erro)
+                continue
+            if removido:
+                removidos.append(registro_id)
+            else:
+                erros[posicao] = nao_encontrado(registro_id)
+        if removidos:
+            self._registrar("delete_lote", entidade, removidos)
+        return erros
+
+    # Persistência
+    def _registrar(self, operacao: str, entidade: str, dados: Any) -> None:
+        """
+        Repassa uma alteração já aplicada em memória ao armazenamento
+
+        Registros (ou listas de registros) são convertidos em tuplas de valores.
+        A espera pela gravação fica a cargo do decorador de escrita.
+        """
+        self._versoes[entidade] += 1
+        if self._restaurando:
+            return
+        if isinstance(dados, BaseModel):
+            dados = para_linha(dados)
+        elif isinstance(dados, list) and dados and isinstance(dados[0], BaseModel):
+            dados = [para_linha(registro) for registro in dados]
+        sequencia = self._armazenamento.anexar(operacao, entidade, dados)
+        if self._armazenamento.precisa_snapshot():
+            self._iniciar_snapshot()
+        self._sequencia_pendente = sequencia
+
+    def _iniciar_snapshot(self) -> None:
+        # O estado é capturado junto com a troca de segmento do WAL e gravado em segundo plano
+        segmento = self._armazenamento.rotacionar()
+        estado = {entidade: (getattr(self, entidade).proximo_id, getattr(self, entidade).fatia()) for entidade in ENTIDADES}
+        descontos = self._ranking_vendedores.descontos()
+        threading.Thread(
+            target=self._gravar_snapshot, args=(estado, descontos, segmento), name="snapshot", daemon=True
+        ).start()
+
+    def _gravar_snapshot(self, estado: Dict[str, Tuple[int, Fatia]], descontos: Dict[int, float], segmento: int) -> None:
+        """
+        Grava o snapshot na thread de segundo plano
+
+        Uma falha não chega a nenhuma requisição: ela é registrada no log e o
+        snapshot é cancelado, e o WAL continua cobrindo as alterações até que
+        o próximo snapshot seja gravado.
+        """
+        try:
+            compacto: Dict[str, Any] = {
+                entidade: {"proximo_id": proximo_id, "linhas": list(fatia.linhas())}
+                for entidade, (proximo_id, fatia) in estado.items()
+            }
+            # O desconto depende do preço do veículo na data da venda, que o registro da venda não guarda
+            compacto["descontos_vendas"] = descontos
+            self._armazenamento.gravar_snapshot(compacto, segmento)
+        except Exception:
+            logger.exception("Falha ao gravar o snapshot do segmento %d do WAL", segmento)
+            self._armazenamento.cancelar_snapshot()
+
+    def _recuperar(self) -> None:
+        """
+        Reconstrói o estado a partir do último snapshot e das operações registradas depois dele
+
+        As linhas do snapshot vão direto para as colunas das tabelas e cada
+        índice é construído em lote, sem montar os modelos. As operações do
+        WAL passam pelos métodos de escrita, cujas versões em lote também
+        indexam em lote.
+        """
+        estado, operacoes = self._armazenamento.recuperar()
+        self._restaurando = True
+        # Milhões de objetos novos disparariam coletas de lixo inúteis durante a carga
+        coleta_ativa = gc.isenabled()
+        gc.disable()
+        try:
+            if estado is not None:
+                # Snapshots antigos não guardam os descontos; eles são recalculados com o preço atual
+                descontos = estado.get("descontos_vendas", {})
+                for entidade, (_, modelo) in ENTIDADES.items():
+                    linhas = estado[entidade]["linhas"]
+                    getattr(self, entidade).restaurar(linhas, estado[entidade]["proximo_id"])
+                    registros = de_linhas_leves(modelo, linhas)
+                    # Cada coleção é indexada de uma vez, com uma ordenação ou construção em lote por índice
+                    if entidade == "vendas":
+                        self._indexar_vendas(registros, descontos)
+                    else:
+                        getattr(self, f"_indexar_{entidade}")(registros)
+            for operacao, entidade, dados in operacoes:
+                self._aplicar(operacao, entidade, dados)
+        finally:
+            self._restaurando = False
+            if coleta_ativa:
+                gc.enable()
+
+    def _aplicar(self, operacao: str, entidade: str, dados: Any) -> None:
+        singular, modelo = ENTIDADES[entidade]
+        tabela = getattr(self, entidade)
+        if operacao == "add":
+            registro = de_linha(modelo, dados)
+            tabela.proximo_id = registro.id
+            getattr(self, f"add_{singular}")(registro)
+        elif operacao == "add_lote":
+            registros = de_linhas(modelo, dados)
+            if registros:
+                tabela.proximo_id = registros[0].id
+                getattr(self, f"add_{entidade}")(registros)
+        elif operacao == "update":
+            registro = de_linha(modelo, dados)
+            getattr(self, f"update_{singular}")(registro.id, registro)
+        elif operacao == "update_lote":
+            getattr(self, f"update_{entidade}")(de_linhas(modelo, dados))
+        elif operacao == "delete":
+            getattr(self, f"delete_{singular}")(dados)
+        elif operacao == "delete_lote":
+            getattr(self, f"delete_{entidade}")(dados)
+
+    @leitura
+    def esta_vazio(self) -> bool:
+        return not any(len(getattr(self, entidade)) for entidade in ENTIDADES)
+
+    def versao_colecoes(self, *colecoes: str) -> str:
+        """
+        Identifica o estado atual das coleções: muda a cada alteração em qualquer uma delas
+        """
+        return "-".join([self._instancia, *(str(self._versoes[colecao]) for colecao in colecoes)])
+
+    def fechar(self) -> None:
+        """
+        Conclui as gravações pendentes no armazenamento
+        """
+        self._armazenamento.fechar()
+
+    def bloqueante(self, operacao: str) -> bool:
+        """
+        Indica se a operação deve rodar fora do laço de eventos
+
+        Todas as escritas (que podem aguardar o fsync do WAL ou percorrer um
+        lote inteiro) e as leituras marcadas com pesada; as consultas por
+        chave ficam no laço.
+        """
+        metodo = getattr(type(self), operacao, None)
+        return getattr(metodo, "aguarda_armazenamento", False) or getattr(metodo, "pesada", False)
+
+    @leitura
+    def capturar(self, publicadas: Optional[Dict[str, Tuple[int, int]]] = None) -> Dict[str, Any]:
+        """
+        Cópia do estado atual para uma publicação compartilhada (veja app.compartilhado)
+
+        Sob a trava só as colunas são copiadas; a conversão para o formato da
+        publicação é feita depois, sem bloquear as escritas. publicadas traz,
+        para cada coleção da publicação anterior, o par em "publicada" que
+        esta captura devolveu (versão da tabela e último ID). Coleções que
+        ainda estão naquela versão não são copiadas: ficam como None, e as
+        colunas derivadas delas (agregados por cargo, análises, receita
+        diária, ranking) são omitidas. Nas demais, "alterados" lista os
+        campos alterados no lugar desde então e "novos" traz só os registros
+        incluídos depois; "completa", a tabela inteira, só é copiada quando
+        há campos alterados, quando houve remoções ("alterados" e "novos"
+        None) ou quando as inclusões são muitas para valer a pena
+        acrescentá-las ao que já foi publicado.
+        """
+        publicadas = publicadas or {}
+        tabelas: Dict[str, Optional[Dict[str, Any]]] = {}
+        for entidade in ENTIDADES:
+            tabela: Tabela = getattr(self, entidade)
+            versao, ultimo_id = publicadas.get(entidade, (None, 0))
+            if versao == tabela.versao:
+                tabelas[entidade] = None
+                continue
+            alterados = tabela.alteracoes(versao) if versao is not None else None
+            novos = tabela.fatia(ultimo_id) if alterados is not None else None
+            # Uma carga grande sai mais barata reconstruída do que intercalada nos índices publicados
+            if novos is not None and len(novos) * 8 > len(tabela):
+                alterados = novos = None
+            tabelas[entidade] = {
+                "publicada": (tabela.versao, tabela.proximo_id - 1),
+                "alterados": alterados,
+                "novos": novos,
+                "completa": tabela.fatia() if alterados != [] else None,
+            }
+        captura = {
+            "instancia": self._instancia,
+            "versoes": dict(self._versoes),
+            "tabelas": tabelas,
+            "nomes_marcas": list(self._colunas_veiculos.nomes_marcas),
+        }
+        if tabelas["funcionarios"] is not None:
+            captura["agregados_cargos"] = [
+                (cargo, agregado.quantidade, agregado.salario_total, agregado.salario_minimo, agregado.salario_maximo)
+                for cargo, agregado in self._agregados_por_cargo.items()
+            ]
+        if tabelas["veiculos"] is not None:
+            captura["colunas_veiculos"] = self._colunas_veiculos.secoes()
+        if tabelas["vendas"] is not None:
+            captura["colunas_vendas"] = self._colunas_vendas.secoes()
+            captura["receita_diaria"] = self._receita_diaria.secoes()
+            captura["ranking"] = [
+                (funcionario_id, desempenho.quantidade, desempenho.receita, desempenho.desconto_medio)
+                for funcionario_id, desempenho in self._ranking_vendedores.primeiros(len(self._ranking_vendedores))
+            ]
+        return captura
+
+    def _conflito_funcionario(
+        self,
+        funcionario: Funcionario,
+        funcionario_id: Optional[int] = None,
+        reservados: Collection[str] = ()
+    ) -> Optional[str]:
+        email = chave_email(funcionario.email)
+        if self._funcionarios_por_email.conflita(email, funcionario_id) or email in reservados:
+            return f"Já existe um funcionário com o e-mail {funcionario.email}"
+        return None
+
+    def _indexar_funcionario(self, funcionario: Funcionario) -> None:
+        self._funcionarios_por_email.adicionar(chave_email(funcionario.email), funcionario.id)
+        self._indice_salario.adicionar(funcionario.salario, funcionario.id)
+        self._indice_contratacao.adicionar(funcionario.data_contratacao, funcionario.id)
+        self._funcionarios_por_cargo.setdefault(funcionario.cargo.value, {})[funcionario.id] = None
+        self._agregados_por_cargo.setdefault(funcionario.cargo.value, AgregadoSalarial()).adicionar(funcionario.salario)
+
+    def _indexar_funcionarios(self, funcionarios: List[Funcionario]) -> None:
+        self._funcionarios_por_email.adicionar_lote([(chave_email(funcionario.email), funcionario.id) for funcionario in funcionarios])
+        self._indice_salario.adicionar_lote([(funcionario.salario, funcionario.id) for funcionario in funcionarios])
+        self._indice_contratacao.adicionar_lote([(funcionario.data_contratacao, funcionario.id) for funcionario in funcionarios])
+        salarios_por_cargo: Dict[str, List[float]] = {}
+        for funcionario in funcionarios:
+            self._funcionarios_por_cargo.setdefault(funcionario.cargo.value, {})[funcionario.id] = None
+            salarios_por_cargo.setdefault(funcionario.cargo.value, []).append(funcionario.salario)
+        for cargo, salarios in salarios_por_cargo.items():
+            self._agregados_por_cargo.setdefault(cargo, AgregadoSalarial()).adicionar_lote(salarios)
+
+    def _desindexar_funcionario(self, funcionario: Funcionario) -> None:
+        self._funcionarios_por_email.remover(chave_email(funcionario.email), funcionario.id)
+        self._indice_salario.remover(funcionario.salario, funcionario.id)
+        self._indice_contratacao.remover(funcionario.data_contratacao, funcionario.id)
+        ids_cargo = self._funcionarios_por_cargo.get(funcionario.cargo.value)
+        if ids_cargo is not None:
+            ids_cargo.pop(funcionario.id, None)
+            if not ids_cargo:
+                del self._funcionarios_por_cargo[funcionario.cargo.value]
+        agregado = self._agregados_por_cargo.get(funcionario.cargo.value)
+        if agregado is not None:
+            agregado.remover(funcionario.salario)
+            if not agregado.quantidade:
+                del self._agregados_por_cargo[funcionario.cargo.value]
     
+    @pesada
+    @leitura_fatiada
     def get_all_funcionarios(self) -> List[Funcionario]:
-        return self.funcionarios
+        return self.funcionarios.fatia()
     
+    @leitura
     def get_funcionario_by_id(self, funcionario_id: int) -> Optional[Funcionario]:
-        for funcionario in self.funcionarios:
-            if funcionario.id == funcionario_id:
-                return funcionario
-        return None
+        return self.funcionarios.obter(funcionario_id)
     
+    @leitura
+    def get_funcionario_by_email(self, email: str) -> Optional[Funcionario]:
+        funcionario_id = self._funcionarios_por_email.obter(chave_email(email))
+        return self.funcionarios.obter(funcionario_id) if funcionario_id is not None else None
+
+    @escrita
     def add_funcionario(self, funcionario: Funcionario) -> Funcionario:
-        funcionario.id = self.counter
-        self.counter += 1
-        self.funcionarios.append(funcionario)
+        if not self._restaurando:
+            conflito = self._conflito_funcionario(funcionario)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+        self.funcionarios.inserir(funcionario)
+        self._indexar_funcionario(funcionario)
+        self._registrar("add", "funcionarios", funcionario)
         return funcionario
+
+    @escrita
+    def add_funcionarios(self, funcionarios: List[Funcionario]) -> List[Funcionario]:
+        if not self._restaurando:
+            erros: Dict[int, str] = {}
+            reservados: Dict[str, None] = {}
+            for posicao, funcionario in enumerate(funcionarios):
+                conflito = self._conflito_funcionario(funcionario, reservados=reservados)
+                if conflito is not None:
+                    erros[posicao] = conflito
+                else:
+                    reservados[chave_email(funcionario.email)] = None
+            if erros:
+                raise ErroIntegridade("Funcionários inválidos no lote", erros)
+        self.funcionarios.inserir_lote(funcionarios)
+        self._indexar_funcionarios(funcionarios)
+        self._registrar("add_lote", "funcionarios", funcionarios)
+        return funcionarios
     
+    def _atualizar_funcionario(self, funcionario_id: int, updated_funcionario: Funcionario) -> Optional[Funcionario]:
+        anterior = self.funcionarios.obter(funcionario_id)
+        if anterior is None:
+            return None
+        if not self._restaurando:
+            conflito = self._conflito_funcionario(updated_funcionario, funcionario_id)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+        self._desindexar_funcionario(anterior)
+        self.funcionarios.substituir(funcionario_id, updated_funcionario)
+        self._indexar_funcionario(updated_funcionario)
+        return updated_funcionario
+
+    def _remover_funcionario(self, funcionario_id: int) -> bool:
+        self._verificar_sem_vendas(self._vendas_por_funcionario, funcionario_id, "Funcionário")
+        funcionario = self.funcionarios.remover(funcionario_id)
+        if funcionario is None:
+            return False
+        self._desindexar_funcionario(funcionario)
+        return True
+
+    @escrita
     def update_funcionario(self, funcionario_id: int, updated_funcionario: Funcionario) -> Optional[Funcionario]:
-        for i, funcionario in enumerate(self.funcionarios):
-            if funcionario.id == funcionario_id:
-                updated_funcionario.id = funcionario_id
-                self.funcionarios[i] = updated_funcionario
-                return updated_funcionario
-        return None
-    
+        return self._atualizar("funcionarios", funcionario_id, updated_funcionario)
+
+    @escrita
+    def update_funcionarios(self, funcionarios: List[Funcionario]) -> Dict[int, str]:
+        return self._atualizar_lote("funcionarios", funcionarios)
+
+    @escrita
     def delete_funcionario(self, funcionario_id: int) -> bool:
-        for i, funcionario in enumerate(self.funcionarios):
-            if funcionario.id == funcionario_id:
-                self.funcionarios.pop(i)
-                return True
-        return False
+        return self._remover("funcionarios", funcionario_id)
+
+    @escrita
+    def delete_funcionarios(self, funcionario_ids: List[int]) -> Dict[int, str]:
+        return self._remover_lote("funcionarios", funcionario_ids)
     
+    @pesada
+    @leitura_fatiada
     def filtrar_por_salario(self, salario_min: Optional[float] = None, salario_max: Optional[float] = None) -> List[Funcionario]:
         """
-        Filtra funcionários por faixa salarial
-        """
-        resultado = self.funcionarios.copy()
-        
-        if salario_min is not None:
-            resultado = [f for f in resultado if f.salario >= salario_min]
-        
-        if salario_max is not None:
-            resultado = [f for f in resultado if f.salario <= salario_max]
-            
-        return resultado
+        Filtra funcionários por faixa salarial, ordenados pelo salário
+        """
+        ids = self._indice_salario.intervalo(salario_min, salario_max)
+        return self.funcionarios.selecionar(ids)
     
+    @pesada
+    @leitura_fatiada
     def filtrar_por_data_contratacao(self, data_inicial: Optional[date] = None, data_final: Optional[date] = None) -> List[Funcionario]:
         """
-        Filtra funcionários por período de contratação
-        """
-        resultado = self.funcionarios.copy()
-        
-        if data_inicial is not None:
-            resultado = [f for f in resultado if f.data_contratacao >= data_inicial]
-        
-        if data_final is not None:
-            resultado = [f for f in resultado if f.data_contratacao <= data_final]
-            
-        return resultado
+        Filtra funcionários por período de contratação, ordenados pela data
+        """
+        ids = self._indice_contratacao.intervalo(data_inicial, data_final)
+        return self.funcionarios.selecionar(ids)
     
+    @pesada
+    @leitura_fatiada
     def filtrar_por_cargo(self, cargo: str) -> List[Funcionario]:
         """
-        Filtra funcionários por cargo
+        Filtra funcionários por cargo, em ordem de ID
+        """
+        # O grupo guarda a ordem de inserção: um funcionário atualizado vai para o fim dele
+        ids = sorted(self._funcionarios_por_cargo.get(cargo, ()))
+        return self.funcionarios.selecionar(ids)
+
+    @pesada
+    @leitura_fatiada
+    def consultar_funcionarios(
+        self,
+        cargo: Optional[str] = None,
+        salario_min: Optional[float] = None,
+        salario_max: Optional[float] = None,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None,
+        apos_id: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> List[Funcionario]:
+        """
+        Filtra funcionários combinando todos os critérios em uma única passada
+
+        Usa como ponto de partida o índice mais seletivo (cargo, faixa salarial
+        ou período de contratação) e aplica os demais critérios apenas sobre
+        esses candidatos. O resultado vem ordenado pelo ID e pode ser paginado
+        com apos_id e limite.
         """
-        return [f for f in self.funcionarios if f.cargo.value == cargo]
+        por_salario = salario_min is not None or salario_max is not None
+        por_data = data_inicial is not None or data_final is not None
+
+        # Estima o tamanho de cada conjunto de candidatos sem percorrê-lo
+        candidatos = []
+        if cargo is not None:
+            ids_cargo = self._funcionarios_por_cargo.get(cargo, {})
+            candidatos.append((len(ids_cargo), lambda: ids_cargo.keys()))
+        if por_salario:
+            candidatos.append((
+                self._indice_salario.contar(salario_min, salario_max),
+                lambda: self._indice_salario.intervalo(salario_min, salario_max)
+            ))
+        if por_data:
+            candidatos.append((
+                self._indice_contratacao.contar(data_inicial, data_final),
+                lambda: self._indice_contratacao.intervalo(data_inicial, data_final)
+            ))
+
+        if not candidatos:
+            return self.funcionarios.fatia(apos_id, limite)
+
+        # Os demais critérios são conferidos campo a campo, sem montar os modelos
+        quantidade, gerar_ids = min(candidatos, key=lambda candidato: candidato[0])
+        contar_linhas(quantidade)
+        valor = self.funcionarios.valor
+        ids = []
+        for funcionario_id in gerar_ids():
+            if cargo is not None and valor(funcionario_id, "cargo").value != cargo:
+                continue
+            if por_salario:
+                salario = valor(funcionario_id, "salario")
+                if salario_min is not None and salario < salario_min:
+                    continue
+                if salario_max is not None and salario > salario_max:
+                    continue
+            if por_data:
+                data_contratacao = valor(funcionario_id, "data_contratacao")
+                if data_inicial is not None and data_contratacao < data_inicial:
+                    continue
+                if data_final is not None and data_contratacao > data_final:
+                    continue
+            ids.append(funcionario_id)
+
+        ids.sort()
+        inicio = 0 if apos_id is None else bisect_right(ids, apos_id)
+        fim = None if limite is None else inicio + limite
+        return self.funcionarios.selecionar(ids[inicio:fim])
     
+    @leitura
     def calcular_estatisticas(self) -> EstatisticasGerais:
         """
         Calcula estatísticas gerais e por cargo dos funcionários
+
+        Os agregados de cada cargo são mantidos a cada inclusão, atualização e
+        remoção, então o custo depende apenas da quantidade de cargos.
         """
-        if not self.funcionarios:
-            return EstatisticasGerais(
-                total_funcionarios=0,
-                total_salarios=0,
-                salario_medio=0,
-                estatisticas_por_cargo=[]
-            )
-        
-        # Agrupa funcionários por cargo
-        funcionarios_por_cargo: Dict[str, List[Funcionario]] = {}
-        for f in self.funcionarios:
-            cargo = f.cargo.value
-            if cargo not in funcionarios_por_cargo:
-                funcionarios_por_cargo[cargo] = []
-            funcionarios_por_cargo[cargo].append(f)
-        
-        # Calcula estatísticas por cargo
-        estatisticas_por_cargo = []
-        for cargo, funcionarios in funcionarios_por_cargo.items():
-            qtd = len(funcionarios)
-            salario_total = sum(f.salario for f in funcionarios)
-            salario_medio = salario_total / qtd if qtd > 0 else 0
-            
-            estatisticas_por_cargo.append(EstatisticasCargo(
+        estatisticas_por_cargo = [
+            EstatisticasCargo(
                 cargo=cargo,
-                quantidade=qtd,
-                salario_total=salario_total,
-                salario_medio=salario_medio
-            ))
-        
-        # Calcula estatísticas gerais
-        total_funcionarios = len(self.funcionarios)
-        total_salarios = sum(f.salario for f in self.funcionarios)
+                quantidade=agregado.quantidade,
+                salario_total=agregado.salario_total,
+                salario_medio=agregado.salario_medio,
+                salario_minimo=agregado.salario_minimo,
+                salario_maximo=agregado.salario_maximo
+            )
+            for cargo, agregado in self._agregados_por_cargo.items()
+        ]
+
+        total_funcionarios = sum(e.quantidade for e in estatisticas_por_cargo)
+        total_salarios = sum(e.salario_total for e in estatisticas_por_cargo)
         salario_medio = total_salarios / total_funcionarios if total_funcionarios > 0 else 0
-        
+
         return EstatisticasGerais(
             total_funcionarios=total_funcionarios,
             total_salarios=total_salarios,
@@ -125,98 +723,464 @@ class Database:
         )
 
     # CRUD Veículos
+    @pesada
+    @leitura_fatiada
     def get_all_veiculos(self) -> List[Veiculo]:
-        return self.veiculos
+        return self.veiculos.fatia()
+
+    @pesada
+    @leitura_fatiada
+    def listar_veiculos(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Veiculo]:
+        return self.veiculos.fatia(apos_id, limite)
 
+    def exportar_veiculos(self, id_inicial: Optional[int] = None, id_final: Optional[int] = None) -> Iterator[Veiculo]:
+        apos_id = None if id_inicial is None else id_inicial - 1
+        return _iterar_paginas(self.listar_veiculos, apos_id, id_final)
+
+    @pesada
+    @leitura
+    def buscar_veiculos(
+        self,
+        marca: Optional[str] = None,
+        modelo: Optional[str] = None,
+        tipo: Optional[TipoVeiculo] = None,
+        ano_min: Optional[int] = None,
+        ano_max: Optional[int] = None,
+        preco_min: Optional[float] = None,
+        preco_max: Optional[float] = None,
+        disponivel: Optional[bool] = None,
+        apos_id: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> BuscaVeiculos:
+        """
+        Busca no estoque com facetas por marca e tipo, usando apenas os índices
+
+        Marca e modelo ignoram acentos e maiúsculas; o modelo casa pelo início
+        de qualquer palavra. Os itens vêm em ordem de ID, a partir de apos_id.
+        """
+        encontrados = self._indice_veiculos.buscar(
+            marca=marca,
+            modelo=modelo,
+            tipo=TipoVeiculo(tipo).value if tipo is not None else None,
+            ano_min=ano_min,
+            ano_max=ano_max,
+            preco_min=preco_min,
+            preco_max=preco_max,
+            disponivel=disponivel
+        )
+        contar_linhas(len(encontrados))
+        facetas_marca, facetas_tipo = self._indice_veiculos.facetas(encontrados)
+        ids = sorted(encontrados)
+        inicio = 0 if apos_id is None else bisect_right(ids, apos_id)
+        fim = len(ids) if limite is None else inicio + limite
+        return BuscaVeiculos(
+            total=len(ids),
+            itens=self.veiculos.selecionar(ids[inicio:fim]).registros(),
+            facetas_marca=facetas_marca,
+            facetas_tipo=facetas_tipo
+        )
+
+    @leitura
     def get_veiculo_by_id(self, veiculo_id: int) -> Optional[Veiculo]:
-        for veiculo in self.veiculos:
-            if veiculo.id == veiculo_id:
-                return veiculo
-        return None
+        return self.veiculos.obter(veiculo_id)
 
+    @escrita
     def add_veiculo(self, veiculo: Veiculo) -> Veiculo:
-        veiculo.id = self.veiculo_counter
-        self.veiculo_counter += 1
-        self.veiculos.append(veiculo)
+        self.veiculos.inserir(veiculo)
+        self._indexar_veiculo(veiculo)
+        self._registrar("add", "veiculos", veiculo)
         return veiculo
 
+    @escrita
+    def add_veiculos(self, veiculos: List[Veiculo]) -> List[Veiculo]:
+        self.veiculos.inserir_lote(veiculos)
+        self._indexar_veiculos(veiculos)
+        self._registrar("add_lote", "veiculos", veiculos)
+        return veiculos
+
+    def _atualizar_veiculo(self, veiculo_id: int, updated_veiculo: Veiculo) -> Optional[Veiculo]:
+        anterior = self.veiculos.obter(veiculo_id)
+        if anterior is None:
+            return None
+        # Um veículo com venda registrada nunca volta a ficar disponível
+        if updated_veiculo.disponivel and veiculo_id in self._vendas_por_veiculo:
+            updated_veiculo = updated_veiculo.model_copy(update={"disponivel": False})
+        self._desindexar_veiculo(anterior)
+        self.veiculos.substituir(veiculo_id, updated_veiculo)
+        self._indexar_veiculo(updated_veiculo)
+        return updated_veiculo
+
+    def _remover_veiculo(self, veiculo_id: int) -> bool:
+        self._verificar_sem_vendas(self._vendas_por_veiculo, veiculo_id, "Veículo")
+        veiculo = self.veiculos.remover(veiculo_id)
+        if veiculo is None:
+            return False
+        self._desindexar_veiculo(veiculo)
+        return True
+
+    @escrita
     def update_veiculo(self, veiculo_id: int, updated_veiculo: Veiculo) -> Optional[Veiculo]:
-        for i, veiculo in enumerate(self.veiculos):
-            if veiculo.id == veiculo_id:
-                updated_veiculo.id = veiculo_id
-                self.veiculos[i] = updated_veiculo
-                return updated_veiculo
-        return None
+        return self._atualizar("veiculos", veiculo_id, updated_veiculo)
+
+    @escrita
+    def update_veiculos(self, veiculos: List[Veiculo]) -> Dict[int, str]:
+        return self._atualizar_lote("veiculos", veiculos)
 
+    @escrita
     def delete_veiculo(self, veiculo_id: int) -> bool:
-        for i, veiculo in enumerate(self.veiculos):
-            if veiculo.id == veiculo_id:
-                self.veiculos.pop(i)
-                return True
-        return False
+        return self._remover("veiculos", veiculo_id)
+
+    @escrita
+    def delete_veiculos(self, veiculo_ids: List[int]) -> Dict[int, str]:
+        return self._remover_lote("veiculos", veiculo_ids)
 
     # CRUD Clientes
+    @pesada
+    @leitura_fatiada
     def get_all_clientes(self) -> List[Cliente]:
-        return self.clientes
+        return self.clientes.fatia()
+
+    @pesada
+    @leitura_fatiada
+    def listar_clientes(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Cliente]:
+        return self.clientes.fatia(apos_id, limite)
+
+    def exportar_clientes(self, id_inicial: Optional[int] = None, id_final: Optional[int] = None) -> Iterator[Cliente]:
+        apos_id = None if id_inicial is None else id_inicial - 1
+        return _iterar_paginas(self.listar_clientes, apos_id, id_final)
 
+    @leitura
     def get_cliente_by_id(self, cliente_id: int) -> Optional[Cliente]:
-        for cliente in self.clientes:
-            if cliente.id == cliente_id:
-                return cliente
+        return self.clientes.obter(cliente_id)
+
+    @leitura
+    def get_cliente_by_cpf(self, cpf: str) -> Optional[Cliente]:
+        cliente_id = self._clientes_por_cpf.obter(chave_cpf(cpf))
+        return self.clientes.obter(cliente_id) if cliente_id is not None else None
+
+    @leitura
+    def get_cliente_by_email(self, email: str) -> Optional[Cliente]:
+        cliente_id = self._clientes_por_email.obter(chave_email(email))
+        return self.clientes.obter(cliente_id) if cliente_id is not None else None
+
+    def _conflito_cliente(
+        self,
+        cliente: Cliente,
+        cliente_id: Optional[int] = None,
+        reservados: Collection[str] = ()
+    ) -> Optional[str]:
+        cpf = chave_cpf(cliente.cpf)
+        if self._clientes_por_cpf.conflita(cpf, cliente_id) or f"cpf:{cpf}" in reservados:
+            return f"Já existe um cliente com o CPF {cliente.cpf}"
+        email = chave_email(cliente.email)
+        if self._clientes_por_email.conflita(email, cliente_id) or f"email:{email}" in reservados:
+            return f"Já existe um cliente com o e-mail {cliente.email}"
         return None
 
+    def _indexar_cliente(self, cliente: Cliente) -> None:
+        self._clientes_por_cpf.adicionar(chave_cpf(cliente.cpf), cliente.id)
+        self._clientes_por_email.adicionar(chave_email(cliente.email), cliente.id)
+
+    def _indexar_clientes(self, clientes: List[Cliente]) -> None:
+        self._clientes_por_cpf.adicionar_lote([(chave_cpf(cliente.cpf), cliente.id) for cliente in clientes])
+        self._clientes_por_email.adicionar_lote([(chave_email(cliente.email), cliente.id) for cliente in clientes])
+
+    def _desindexar_cliente(self, cliente: Cliente) -> None:
+        self._clientes_por_cpf.remover(chave_cpf(cliente.cpf), cliente.id)
+        self._clientes_por_email.remover(chave_email(cliente.email), cliente.id)
+
+    @escrita
     def add_cliente(self, cliente: Cliente) -> Cliente:
-        cliente.id = self.cliente_counter
-        self.cliente_counter += 1
-        self.clientes.append(cliente)
+        if not self._restaurando:
+            conflito = self._conflito_cliente(cliente)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+        self.clientes.inserir(cliente)
+        self._indexar_cliente(cliente)
+        self._registrar("add", "clientes", cliente)
         return cliente
 
+    @escrita
+    def add_clientes(self, clientes: List[Cliente]) -> List[Cliente]:
+        if not self._restaurando:
+            erros: Dict[int, str] = {}
+            reservados: Dict[str, None] = {}
+            for posicao, cliente in enumerate(clientes):
+                conflito = self._conflito_cliente(cliente, reservados=reservados)
+                if conflito is not None:
+                    erros[posicao] = conflito
+                else:
+                    reservados[f"cpf:{chave_cpf(cliente.cpf)}"] = None
+                    reservados[f"email:{chave_email(cliente.email)}"] = None
+            if erros:
+                raise ErroIntegridade("Clientes inválidos no lote", erros)
+        self.clientes.inserir_lote(clientes)
+        self._indexar_clientes(clientes)
+        self._registrar("add_lote", "clientes", clientes)
+        return clientes
+
+    def _atualizar_cliente(self, cliente_id: int, updated_cliente: Cliente) -> Optional[Cliente]:
+        anterior = self.clientes.obter(cliente_id)
+        if anterior is None:
+            return None
+        if not self._restaurando:
+            conflito = self._conflito_cliente(updated_cliente, cliente_id)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+        self._desindexar_cliente(anterior)
+        self.clientes.substituir(cliente_id, updated_cliente)
+        self._indexar_cliente(updated_cliente)
+        return updated_cliente
+
+    def _remover_cliente(self, cliente_id: int) -> bool:
+        self._verificar_sem_vendas(self._vendas_por_cliente, cliente_id, "Cliente")
+        cliente = self.clientes.remover(cliente_id)
+        if cliente is None:
+            return False
+        self._desindexar_cliente(cliente)
+        return True
+
+    @escrita
     def update_cliente(self, cliente_id: int, updated_cliente: Cliente) -> Optional[Cliente]:
-        for i, cliente in enumerate(self.clientes):
-            if cliente.id == cliente_id:
-                updated_cliente.id = cliente_id
-                self.clientes[i] = updated_cliente
-                return updated_cliente
-        return None
+        return self._atualizar("clientes", cliente_id, updated_cliente)
+
+    @escrita
+    def update_clientes(self, clientes: List[Cliente]) -> Dict[int, str]:
+        return self._atualizar_lote("clientes", clientes)
 
+    @escrita
     def delete_cliente(self, cliente_id: int) -> bool:
-        for i, cliente in enumerate(self.clientes):
-            if cliente.id == cliente_id:
-                self.clientes.pop(i)
-                return True
-        return False
+        return self._remover("clientes", cliente_id)
+
+    @escrita
+    def delete_clientes(self, cliente_ids: List[int]) -> Dict[int, str]:
+        return self._remover_lote("clientes", cliente_ids)
 
     # CRUD Vendas
+    @pesada
+    @leitura_fatiada
     def get_all_vendas(self) -> List[Venda]:
-        return self.vendas
+        return self.vendas.fatia()
+
+    @pesada
+    @leitura_fatiada
+    def listar_vendas(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Venda]:
+        return self.vendas.fatia(apos_id, limite)
+
+    def exportar_vendas(
+        self,
+        id_inicial: Optional[int] = None,
+        id_final: Optional[int] = None,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> Iterator[Venda]:
+        """
+        Percorre as vendas em ordem de ID, filtrando por faixa de ID e período
+        """
+        apos_id = None if id_inicial is None else id_inicial - 1
+        for venda in _iterar_paginas(self.listar_vendas, apos_id, id_final):
+            if data_inicial is not None and venda.data_venda < data_inicial:
+                continue
+            if data_final is not None and venda.data_venda > data_final:
+                continue
+            yield venda
 
+    @leitura
     def get_venda_by_id(self, venda_id: int) -> Optional[Venda]:
-        for venda in self.vendas:
-            if venda.id == venda_id:
-                return venda
-        return None
+        return self.vendas.obter(venda_id)
 
+    @escrita
     def add_venda(self, venda: Venda) -> Venda:
-        venda.id = self.venda_counter
-        self.venda_counter += 1
-        self.vendas.append(venda)
+        """
+        Registra a venda e marca o veículo como indisponível, na mesma escrita
+
+        Veículo, cliente e funcionário precisam existir e o veículo precisa
+        estar disponível; caso contrário, ErroIntegridade é lançado. Ao
+        reaplicar o WAL, a validação é dispensada e a troca de disponibilidade
+        é refeita a partir da própria venda.
+        """
+        if not self._restaurando:
+            conflito = self._conflito_venda(venda)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+        self.vendas.inserir(venda)
+        self._indexar_venda(venda)
+        self._definir_disponibilidade(venda.veiculo_id, False)
+        self._registrar("add", "vendas", venda)
         return venda
 
+    @escrita
+    def add_vendas(self, vendas: List[Venda]) -> List[Venda]:
+        if not self._restaurando:
+            erros: Dict[int, str] = {}
+            reservados: Dict[int, None] = {}
+            for posicao, venda in enumerate(vendas):
+                conflito = self._conflito_venda(venda, reservados=reservados)
+                if conflito is not None:
+                    erros[posicao] = conflito
+                else:
+                    reservados[venda.veiculo_id] = None
+            if erros:
+                raise ErroIntegridade("Vendas inválidas no lote", erros)
+        self.vendas.inserir_lote(vendas)
+        self._indexar_vendas(vendas)
+        for registro in vendas:
+            self._definir_disponibilidade(registro.veiculo_id, False)
+        self._registrar("add_lote", "vendas", vendas)
+        return vendas
+
+    def _atualizar_venda(self, venda_id: int, updated_venda: Venda) -> Optional[Venda]:
+        anterior = self.vendas.obter(venda_id)
+        if anterior is None:
+            return None
+        if not self._restaurando:
+            conflito = self._conflito_venda(updated_venda, anterior)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+        self._desindexar_venda(anterior)
+        self.vendas.substituir(venda_id, updated_venda)
+        self._indexar_venda(updated_venda)
+        if anterior.veiculo_id != updated_venda.veiculo_id:
+            self._definir_disponibilidade(anterior.veiculo_id, True)
+            self._definir_disponibilidade(updated_venda.veiculo_id, False)
+        return updated_venda
+
+    def _remover_venda(self, venda_id: int) -> bool:
+        venda = self.vendas.remover(venda_id)
+        if venda is None:
+            return False
+        self._desindexar_venda(venda)
+        self._definir_disponibilidade(venda.veiculo_id, True)
+        return True
+
+    @escrita
     def update_venda(self, venda_id: int, updated_venda: Venda) -> Optional[Venda]:
-        for i, venda in enumerate(self.vendas):
-            if venda.id == venda_id:
-                updated_venda.id = venda_id
-                self.vendas[i] = updated_venda
-                return updated_venda
-        return None
+        return self._atualizar("vendas", venda_id, updated_venda)
+
+    @escrita
+    def update_vendas(self, vendas: List[Venda]) -> Dict[int, str]:
+        return self._atualizar_lote("vendas", vendas)
 
+    @escrita
     def delete_venda(self, venda_id: int) -> bool:
-        for i, venda in enumerate(self.vendas):
-            if venda.id == venda_id:
-                self.vendas.pop(i)
-                return True
-        return False
+        """
+        Remove a venda e devolve o veículo ao estoque
+        """
+        return self._remover("vendas", venda_id)
+
+    @escrita
+    def delete_vendas(self, venda_ids: List[int]) -> Dict[int, str]:
+        """
+        Remove as vendas e devolve os veículos ao estoque
+        """
+        return self._remover_lote("vendas", venda_ids)
+
+    def _vendas_relacionadas(self, indice: Dict[int, Dict[int, None]], tabela: Tabela, registro_id: int) -> Optional[Fatia[Venda]]:
+        if registro_id not in tabela:
+            return None
+        return self.vendas.selecionar(sorted(indice.get(registro_id, ())))
+
+    @pesada
+    @leitura_fatiada
+    def get_vendas_by_cliente(self, cliente_id: int) -> Optional[List[Venda]]:
+        """
+        Vendas do cliente em ordem de ID, ou None se o cliente não existe
+        """
+        return self._vendas_relacionadas(self._vendas_por_cliente, self.clientes, cliente_id)
+
+    @pesada
+    @leitura_fatiada
+    def get_vendas_by_funcionario(self, funcionario_id: int) -> Optional[List[Venda]]:
+        """
+        Vendas feitas pelo funcionário em ordem de ID, ou None se o funcionário não existe
+        """
+        return self._vendas_relacionadas(self._vendas_por_funcionario, self.funcionarios, funcionario_id)
+
+    @pesada
+    @leitura_fatiada
+    def get_vendas_by_veiculo(self, veiculo_id: int) -> Optional[List[Venda]]:
+        """
+        Histórico de vendas do veículo em ordem de ID, ou None se o veículo não existe
+        """
+        return self._vendas_relacionadas(self._vendas_por_veiculo, self.veiculos, veiculo_id)
+
+    @pesada
+    @leitura
+    def analisar_vendas(
+        self,
+        dimensao: str,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> List[ResumoVendas]:
+        """
+        Receita, quantidade e desconto das vendas agrupados por mes, vendedor, tipo, marca ou total
+        """
+        return self._colunas_vendas.agrupar(dimensao, data_inicial, data_final)
+
+    @pesada
+    @leitura
+    def receita_por_periodo(
+        self,
+        inicio: Optional[date] = None,
+        fim: Optional[date] = None,
+        granularidade: str = "dia"
+    ) -> ReceitaVendas:
+        """
+        Quantidade e receita das vendas por dia, mês ou ano, somadas das árvores de receita diária
+        """
+        return self._receita_diaria.resumir(inicio, fim, granularidade)
+
+    @pesada
+    @leitura
+    def ranking_vendedores(self, limite: int = 10) -> List[RankingVendedor]:
+        """
+        Os vendedores com maior receita, com quantidade de vendas e desconto médio
+
+        O desconto de cada venda é calculado sobre o preço do veículo no momento
+        em que a venda foi registrada.
+        """
+        ranking = []
+        for posicao, (funcionario_id, desempenho) in enumerate(self._ranking_vendedores.primeiros(limite), start=1):
+            funcionario = self.funcionarios.obter(funcionario_id)
+            ranking.append(RankingVendedor(
+                posicao=posicao,
+                funcionario_id=funcionario_id,
+                nome=funcionario.nome if funcionario is not None else None,
+                cargo=funcionario.cargo if funcionario is not None else None,
+                quantidade_vendas=desempenho.quantidade,
+                receita=desempenho.receita,
+                desconto_medio=desempenho.desconto_medio
+            ))
+        return ranking
+
+
+def criar_database():
+    """
+    Cria o banco de dados de acordo com o backend configurado
+    """
+    def armazenamento_wal() -> ArmazenamentoWAL:
+        return ArmazenamentoWAL(
+            config.DIRETORIO_DADOS,
+            intervalo_commit_ms=config.WAL_INTERVALO_COMMIT_MS,
+            operacoes_por_snapshot=config.WAL_OPERACOES_POR_SNAPSHOT
+        )
+
+    if config.BACKEND == "sqlite":
+        from app.sqlite_db import DatabaseSQLite
+        return DatabaseSQLite(config.SQLITE_CAMINHO)
+    if config.BACKEND == "compartilhado":
+        from app.compartilhado import DatabaseCompartilhado
+        return DatabaseCompartilhado(config.DIRETORIO_DADOS, armazenamento_wal, config.PUBLICACAO_INTERVALO_MS)
+    if config.BACKEND == "wal":
+        return Database(armazenamento_wal())
+    if config.BACKEND != "memoria":
+        raise ValueError(f"Backend desconhecido: {config.BACKEND}")
+    return Database()
+
 
+# Criando uma instância global do banco de dados, com os métodos medidos para /metrics
+db = instrumentar(criar_database())
 
-# Criando uma instância global do banco de dados
-db = Database() 
\ No newline at end of file
+# A mesma instância, com métodos assíncronos para as rotas
+db_assincrono = DatabaseAssincrono(db, config.THREADS_BANCO)
+ 
\ No newline at end of file
@@ -0,0 +1,22 @@
+from typing import Dict, Optional
+
+
+class ErroIntegridade(Exception):
+    """
+    Operação rejeitada por violar a integridade dos dados (referências entre
+    registros ou campos que devem ser únicos)
+
+    Em operações em lote, erros associa a posição de cada item rejeitado à
+    sua mensagem; nada do lote é gravado.
+    """
+
+    def __init__(self, mensagem: str, erros: Optional[Dict[int, str]] = None):
+        super().__init__(mensagem)
+        self.erros = erros or {}
+
+
+def nao_encontrado(registro_id: int) -> str:
+    """
+    Mensagem de um item de lote cujo registro não existe
+    """
+    return f"Registro com ID {registro_id} não encontrado"
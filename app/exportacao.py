@@ -0,0 +1,30 @@
+from typing import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+
+LINHAS_POR_BLOCO = 500
+
+
+def _linhas_ndjson(registros: Iterable[BaseModel]) -> Iterator[bytes]:
+    bloco = []
+    for registro in registros:
+        bloco.append(registro.model_dump_json())
+        # Agrupa as linhas para não enviar um pedaço minúsculo por registro
+        if len(bloco) >= LINHAS_POR_BLOCO:
+            yield ("\n".join(bloco) + "\n").encode()
+            bloco = []
+    if bloco:
+        yield ("\n".join(bloco) + "\n").encode()
+
+
+def resposta_ndjson(registros: Iterable[BaseModel], nome_arquivo: str) -> StreamingResponse:
+    """
+    Transmite os registros como NDJSON (um objeto JSON por linha) sem montar a resposta em memória
+    """
+    return StreamingResponse(
+        _linhas_ndjson(registros),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
@@ -0,0 +1,265 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class IndiceOrdenado:
+    """
+    Índice secundário ordenado por uma chave (salário, data, ...)
+
+    Guarda pares (chave, id) em uma lista ordenada, permitindo consultas por
+    faixa com bisseção em O(log n + k).
+    """
+
+    def __init__(self):
+        self._entradas: List[Tuple[Any, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def adicionar(self, chave: Any, registro_id: int) -> None:
+        insort(self._entradas, (chave, registro_id))
+
+    def adicionar_lote(self, entradas: List[Tuple[Any, int]]) -> None:
+        """
+        Inclui vários pares (chave, id) de uma vez
+
+        Lotes grandes são anexados e a lista é reordenada uma única vez, em vez
+        de deslocar a lista a cada inclusão.
+        """
+        if len(entradas) < 64:
+            for chave, registro_id in entradas:
+                self.adicionar(chave, registro_id)
+            return
+        self._entradas.extend(entradas)
+        self._entradas.sort()
+
+    def remover(self, chave: Any, registro_id: int) -> None:
+        posicao = bisect_left(self._entradas, (chave, registro_id))
+        if posicao < len(self._entradas) and self._entradas[posicao] == (chave, registro_id):
+            del self._entradas[posicao]
+
+    def _limites(self, minimo: Optional[Any], maximo: Optional[Any]) -> Tuple[int, int]:
+        inicio = 0 if minimo is None else bisect_left(self._entradas, (minimo,))
+        fim = len(self._entradas) if maximo is None else bisect_right(self._entradas, (maximo, float("inf")))
+        return inicio, max(inicio, fim)
+
+    def contar(self, minimo: Optional[Any] = None, maximo: Optional[Any] = None) -> int:
+        """
+        Quantidade de registros na faixa, em O(log n)
+        """
+        inicio, fim = self._limites(minimo, maximo)
+        return fim - inicio
+
+    def intervalo(self, minimo: Optional[Any] = None, maximo: Optional[Any] = None) -> List[int]:
+        """
+        IDs dos registros com chave entre minimo e maximo (inclusive), na ordem da chave
+        """
+        inicio, fim = self._limites(minimo, maximo)
+        return [registro_id for _, registro_id in self._entradas[inicio:fim]]
+
+    def primeiros(self, quantidade: int) -> List[int]:
+        """
+        IDs dos registros com as menores chaves, em O(quantidade)
+        """
+        return [registro_id for _, registro_id in self._entradas[:quantidade]]
+
+
+def chave_cpf(cpf: str) -> str:
+    """
+    CPF apenas com os dígitos ("123.456.789-00" -> "12345678900")
+    """
+    return re.sub(r"\D", "", cpf)
+
+
+def chave_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class IndiceUnico:
+    """
+    Índice de hash de uma chave única (CPF, e-mail, ...) para o ID do registro
+
+    Consultas e verificações de duplicidade custam O(1).
+    """
+
+    def __init__(self):
+        self._ids: Dict[Any, int] = {}
+
+    def obter(self, chave: Any) -> Optional[int]:
+        return self._ids.get(chave)
+
+    def conflita(self, chave: Any, registro_id: Optional[int] = None) -> bool:
+        """
+        Indica se a chave já pertence a outro registro
+        """
+        existente = self._ids.get(chave)
+        return existente is not None and existente != registro_id
+
+    def adicionar(self, chave: Any, registro_id: int) -> None:
+        # Dados antigos podem ter duplicatas; a chave continua com o primeiro registro
+        self._ids.setdefault(chave, registro_id)
+
+    def adicionar_lote(self, entradas: List[Tuple[Any, int]]) -> None:
+        """
+        Inclui vários pares (chave, id) de uma vez, com a mesma regra de adicionar
+
+        O dicionário é montado de trás para frente, então a primeira ocorrência
+        de cada chave prevalece, e as chaves já indexadas não são substituídas.
+        """
+        novos = dict(reversed(entradas))
+        novos.update(self._ids)
+        self._ids = novos
+
+    def remover(self, chave: Any, registro_id: int) -> None:
+        if self._ids.get(chave) == registro_id:
+            del self._ids[chave]
+
+
+class AgregadoSalarial:
+    """
+    Agregados incrementais de um grupo de salários (quantidade, soma, mínimo e máximo)
+
+    Os salários ficam em uma lista ordenada para que mínimo e máximo continuem
+    disponíveis em O(1) mesmo depois de remoções.
+    """
+
+    def __init__(self):
+        self._salarios: List[float] = []
+        self.salario_total = 0.0
+
+    @property
+    def quantidade(self) -> int:
+        return len(self._salarios)
+
+    @property
+    def salario_medio(self) -> float:
+        return self.salario_total / len(self._salarios) if self._salarios else 0
+
+    @property
+    def salario_minimo(self) -> float:
+        return self._salarios[0] if self._salarios else 0
+
+    @property
+    def salario_maximo(self) -> float:
+        return self._salarios[-1] if self._salarios else 0
+
+    def adicionar(self, salario: float) -> None:
+        insort(self._salarios, salario)
+        self.salario_total += salario
+
+    def adicionar_lote(self, salarios: List[float]) -> None:
+        # Uma única ordenação para o lote inteiro, em vez de deslocar a lista a cada salário
+        self._salarios.extend(salarios)
+        self._salarios.sort()
+        self.salario_total = sum(salarios, self.salario_total)
+
+    def remover(self, salario: float) -> None:
+        posicao = bisect_left(self._salarios, salario)
+        if posicao < len(self._salarios) and self._salarios[posicao] == salario:
+            del self._salarios[posicao]
+            self.salario_total = self.salario_total - salario if self._salarios else 0.0
+
+
+class DesempenhoVendedor:
+    """
+    Totais de vendas de um vendedor
+    """
+
+    __slots__ = ("quantidade", "receita", "desconto_total", "vendas_com_desconto")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.receita = 0.0
+        self.desconto_total = 0.0
+        # Vendas cujo veículo era conhecido, as únicas que entram no desconto médio
+        self.vendas_com_desconto = 0
+
+    @property
+    def desconto_medio(self) -> float:
+        return self.desconto_total / self.vendas_com_desconto if self.vendas_com_desconto else 0.0
+
+
+class RankingVendedores:
+    """
+    Ranking materializado dos vendedores pela receita de vendas
+
+    Cada venda incluída ou removida ajusta apenas os totais do seu vendedor e
+    a posição dele no índice ordenado, então os N primeiros saem em O(N).
+    """
+
+    def __init__(self):
+        self._vendas: Dict[int, Tuple[int, float, Optional[float]]] = {}
+        self._vendedores: Dict[int, DesempenhoVendedor] = {}
+        self._ordem = IndiceOrdenado()
+
+    def __len__(self) -> int:
+        return len(self._vendedores)
+
+    def adicionar(self, venda_id: int, funcionario_id: int, valor: float, desconto: Optional[float]) -> None:
+        self._vendas[venda_id] = (funcionario_id, valor, desconto)
+        desempenho = self._vendedores.get(funcionario_id)
+        if desempenho is None:
+            desempenho = self._vendedores[funcionario_id] = DesempenhoVendedor()
+        else:
+            self._ordem.remover(-desempenho.receita, funcionario_id)
+        desempenho.quantidade += 1
+        desempenho.receita += valor
+        if desconto is not None:
+            desempenho.desconto_total += desconto
+            desempenho.vendas_com_desconto += 1
+        self._ordem.adicionar(-desempenho.receita, funcionario_id)
+
+    def adicionar_lote(self, vendas: Iterable[Tuple[int, int, float, Optional[float]]]) -> None:
+        """
+        Inclui várias vendas (id, funcionário, valor, desconto) de uma vez
+
+        Os totais são acumulados venda a venda, mas cada vendedor afetado sai
+        do índice ordenado e volta a ele uma única vez, com uma só ordenação.
+        """
+        afetados: Dict[int, DesempenhoVendedor] = {}
+        for venda_id, funcionario_id, valor, desconto in vendas:
+            self._vendas[venda_id] = (funcionario_id, valor, desconto)
+            desempenho = afetados.get(funcionario_id)
+            if desempenho is None:
+                desempenho = self._vendedores.get(funcionario_id)
+                if desempenho is None:
+                    desempenho = self._vendedores[funcionario_id] = DesempenhoVendedor()
+                else:
+                    self._ordem.remover(-desempenho.receita, funcionario_id)
+                afetados[funcionario_id] = desempenho
+            desempenho.quantidade += 1
+            desempenho.receita += valor
+            if desconto is not None:
+                desempenho.desconto_total += desconto
+                desempenho.vendas_com_desconto += 1
+        self._ordem.adicionar_lote([(-desempenho.receita, funcionario_id) for funcionario_id, desempenho in afetados.items()])
+
+    def remover(self, venda_id: int) -> None:
+        entrada = self._vendas.pop(venda_id, None)
+        if entrada is None:
+            return
+        funcionario_id, valor, desconto = entrada
+        desempenho = self._vendedores[funcionario_id]
+        self._ordem.remover(-desempenho.receita, funcionario_id)
+        desempenho.quantidade -= 1
+        if not desempenho.quantidade:
+            del self._vendedores[funcionario_id]
+            return
+        desempenho.receita -= valor
+        if desconto is not None:
+            desempenho.desconto_total -= desconto
+            desempenho.vendas_com_desconto -= 1
+        self._ordem.adicionar(-desempenho.receita, funcionario_id)
+
+    def descontos(self) -> Dict[int, float]:
+        """
+        Desconto de cada venda (calculado no momento em que ela foi registrada), para gravação em snapshots
+        """
+        return {venda_id: desconto for venda_id, (_, _, desconto) in self._vendas.items() if desconto is not None}
+
+    def primeiros(self, quantidade: int) -> List[Tuple[int, DesempenhoVendedor]]:
+        """
+        Os vendedores com maior receita, em ordem decrescente
+        """
+        return [(funcionario_id, self._vendedores[funcionario_id]) for funcionario_id in self._ordem.primeiros(quantidade)]
@@ -0,0 +1,167 @@
+import json
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.assincrono import em_thread
+from app.erros import ErroIntegridade
+from app.models import ResultadoItemLote, ResultadoLote
+from app.serializacao import resposta_json
+
+
+_adaptadores: Dict[Any, TypeAdapter] = {}
+
+
+def _adaptador(tipo: Any) -> TypeAdapter:
+    # Montar um TypeAdapter é caro, então cada tipo é construído uma única vez
+    if tipo not in _adaptadores:
+        _adaptadores[tipo] = TypeAdapter(List[tipo])
+    return _adaptadores[tipo]
+
+
+def ler_corpo(corpo: bytes, content_type: Optional[str]) -> Tuple[List[Any], Dict[int, str]]:
+    """
+    Lê o corpo de uma requisição em lote, aceitando array JSON ou NDJSON
+
+    Retorna os itens lidos e os erros de sintaxe por posição (somente no
+    NDJSON, em que cada linha é independente).
+    """
+    if content_type and "ndjson" in content_type:
+        itens: List[Any] = []
+        erros: Dict[int, str] = {}
+        for linha in corpo.splitlines():
+            if not linha.strip():
+                continue
+            try:
+                itens.append(json.loads(linha))
+            except ValueError as erro:
+                erros[len(itens)] = f"JSON inválido: {erro}"
+                itens.append(None)
+        return itens, erros
+
+    try:
+        itens = json.loads(corpo)
+    except ValueError as erro:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"JSON inválido: {erro}")
+    if not isinstance(itens, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O corpo deve ser um array JSON ou NDJSON")
+    return itens, {}
+
+
+def validar_lote(itens: List[Any], tipo: Any, erros: Dict[int, str]) -> Dict[int, Any]:
+    """
+    Valida o lote inteiro de uma vez e retorna os itens válidos por posição
+
+    As mensagens dos itens inválidos são acrescentadas em erros.
+    """
+    posicoes = [i for i in range(len(itens)) if i not in erros]
+    validos = [itens[i] for i in posicoes]
+    try:
+        return dict(zip(posicoes, _adaptador(tipo).validate_python(validos)))
+    except ValidationError as erro:
+        invalidos: Dict[int, List[str]] = {}
+        for detalhe in erro.errors():
+            campo = ".".join(str(parte) for parte in detalhe["loc"][1:]) or "item"
+            invalidos.setdefault(detalhe["loc"][0], []).append(f"{campo}: {detalhe['msg']}")
+        for posicao_validos, mensagens in invalidos.items():
+            erros[posicoes[posicao_validos]] = "; ".join(mensagens)
+
+    # Apenas quando há erros o restante do lote é validado novamente
+    posicoes = [i for i in posicoes if i not in erros]
+    validados = _adaptador(tipo).validate_python([itens[i] for i in posicoes])
+    return dict(zip(posicoes, validados))
+
+
+def _ler_lote(corpo: bytes, content_type: Optional[str], tipo: Any) -> Tuple[int, Dict[int, Any], Dict[int, str]]:
+    # Total de itens, válidos por posição e erros por posição
+    itens, erros = ler_corpo(corpo, content_type)
+    return len(itens), validar_lote(itens, tipo, erros), erros
+
+
+def _resultado(total: int, sucessos: Dict[int, Optional[int]], erros: Dict[int, str]) -> Response:
+    itens = [
+        ResultadoItemLote(indice=i, id=sucessos[i], sucesso=True) if i in sucessos
+        else ResultadoItemLote(indice=i, sucesso=False, erro=erros.get(i, "Item não processado"))
+        for i in range(total)
+    ]
+    return resposta_json(ResultadoLote(total=total, sucessos=len(sucessos), falhas=total - len(sucessos), itens=itens))
+
+
+async def criar_em_lote(
+    corpo: bytes,
+    content_type: Optional[str],
+    modelo: Type[BaseModel],
+    adicionar: Callable[[List[BaseModel]], Awaitable[List[BaseModel]]]
+) -> Response:
+    """
+    Valida e cadastra um lote de registros, que recebem um bloco contíguo de IDs
+
+    Se o banco rejeitar alguns itens por integridade, eles são marcados como
+    falhas e o restante do lote é enviado novamente. A leitura, a validação
+    e a montagem do resultado, proporcionais ao lote, rodam fora do laço de
+    eventos (veja em_thread).
+    """
+    total, validos, erros = await em_thread(partial(_ler_lote, corpo, content_type, modelo))
+    criados: List[BaseModel] = []
+    while validos:
+        try:
+            criados = await adicionar(list(validos.values()))
+            break
+        except ErroIntegridade as erro:
+            if not erro.erros:
+                raise
+            posicoes = list(validos)
+            for indice, mensagem in erro.erros.items():
+                erros[posicoes[indice]] = mensagem
+                del validos[posicoes[indice]]
+    sucessos = {posicao: registro.id for posicao, registro in zip(validos, criados)}
+    return await em_thread(partial(_resultado, total, sucessos, erros))
+
+
+async def atualizar_em_lote(
+    corpo: bytes,
+    content_type: Optional[str],
+    modelo: Type[BaseModel],
+    atualizar: Callable[[List[BaseModel]], Awaitable[Dict[int, str]]]
+) -> Response:
+    """
+    Valida e atualiza um lote de registros; cada item deve trazer o seu id
+
+    Os itens válidos são enviados ao banco de uma vez, que os aplica em uma
+    única escrita e devolve as falhas (inexistentes ou conflitos) por posição.
+    """
+    total, validos, erros = await em_thread(partial(_ler_lote, corpo, content_type, modelo))
+    for posicao, registro in list(validos.items()):
+        if registro.id is None:
+            erros[posicao] = "id: obrigatório na atualização em lote"
+            del validos[posicao]
+    return await _aplicar_lote(total, validos, erros, atualizar, lambda registro: registro.id)
+
+
+async def remover_em_lote(
+    corpo: bytes,
+    content_type: Optional[str],
+    remover: Callable[[List[int]], Awaitable[Dict[int, str]]]
+) -> Response:
+    """
+    Remove um lote de registros a partir de uma lista de IDs, em uma única escrita
+    """
+    total, validos, erros = await em_thread(partial(_ler_lote, corpo, content_type, int))
+    return await _aplicar_lote(total, validos, erros, remover, lambda registro_id: registro_id)
+
+
+async def _aplicar_lote(
+    total: int,
+    validos: Dict[int, Any],
+    erros: Dict[int, str],
+    aplicar: Callable[[List[Any]], Awaitable[Dict[int, str]]],
+    registro_id: Callable[[Any], int]
+) -> Response:
+    posicoes = list(validos)
+    falhas = await aplicar(list(validos.values())) if validos else {}
+    for indice, mensagem in falhas.items():
+        erros[posicoes[indice]] = mensagem
+    sucessos = {posicao: registro_id(item) for posicao, item in validos.items() if posicao not in erros}
+    return await em_thread(partial(_resultado, total, sucessos, erros))
@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import router
+from app.routes import router, router_admin
 from app.seed import seed_database
+from app.database import db, db_assincrono
+from app.metricas import TIPO_CONTEUDO, MiddlewareMetricas, registro_metricas
+from app.perfilamento import MiddlewarePerfil, perfilamento_ativo
 
 
 app = FastAPI(
@@ -20,12 +23,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Perfilamento sob demanda; sem token de administração nem amostragem, nem chega a ser instalado
+if perfilamento_ativo():
+    app.add_middleware(MiddlewarePerfil)
+
+# Métricas por rota; adicionado por último, envolve os demais middlewares e mede a requisição inteira
+app.add_middleware(MiddlewareMetricas)
+
 # Incluindo as rotas da API
 app.include_router(router)
+app.include_router(router_admin)
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Bem-vindo à API da Concessionária de Veículos",
         "docs": "/docs",
@@ -33,10 +44,31 @@ def read_root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metricas():
+    """
+    Métricas da API no formato de texto do Prometheus
+    """
+    return Response(content=registro_metricas.texto(), media_type=TIPO_CONTEUDO)
+
+
 @app.on_event("startup")
 def startup_event():
     """
     Função executada na inicialização da API
     """
-    # Popula o banco de dados com dados iniciais
-    seed_database() 
\ No newline at end of file
+    # Popula o banco de dados com dados iniciais, caso nada tenha sido recuperado do disco;
+    # com vários workers sobre os mesmos dados, só o processo escritor faz isso
+    if db.esta_vazio() and getattr(db, "escritor", True):
+        seed_database()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Função executada no encerramento da API
+    """
+    # Termina as operações em andamento no executor e garante que as gravações pendentes cheguem ao disco
+    db_assincrono.fechar()
+    db.fechar()
+ 
\ No newline at end of file
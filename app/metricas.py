@@ -0,0 +1,289 @@
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from types import GeneratorType
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+# Tipo de conteúdo do formato de texto de exposição do Prometheus (o Starlette acrescenta o charset)
+TIPO_CONTEUDO = "text/plain; version=0.0.4"
+
+# Limites dos histogramas: segundos para as requisições, frações de milissegundo para o banco, bytes para os corpos
+LIMITES_REQUISICAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_BANCO = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+LIMITES_BYTES = (0, 128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608, 33554432)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class _Metrica:
+    """
+    Série de valores por combinação de rótulos, protegida por uma trava própria
+    """
+
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], Any] = {}
+        self._trava = threading.Lock()
+
+    def _seletor(self, valores: Tuple[str, ...], extra: str = "") -> str:
+        pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.rotulos, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def _amostras(self) -> Iterator[str]:
+        with self._trava:
+            valores = list(self._valores.items())
+        for rotulos, valor in valores:
+            yield f"{self.nome}{self._seletor(rotulos)} {_numero(valor)}"
+
+    def texto(self) -> str:
+        return "\n".join([f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}", *self._amostras()])
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def incrementar(self, rotulos: Tuple[str, ...] = (), valor: float = 1) -> None:
+        with self._trava:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def somar(self, rotulos: Tuple[str, ...] = (), valor: float = 1) -> None:
+        with self._trava:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+
+class Histograma(_Metrica):
+    """
+    Distribuição de valores em faixas fixas, com soma e contagem
+
+    Cada observação incrementa só a sua faixa; as contagens acumuladas que o
+    formato exige (le="...") são calculadas apenas na exposição.
+    """
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, limites: Sequence[float], rotulos: Sequence[str] = ()):
+        super().__init__(nome, descricao, rotulos)
+        self.limites = tuple(limites)
+
+    def observar(self, rotulos: Tuple[str, ...], valor: float) -> None:
+        faixa = bisect_left(self.limites, valor)
+        with self._trava:
+            serie = self._valores.get(rotulos)
+            if serie is None:
+                serie = self._valores[rotulos] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][faixa] += 1
+            serie[1] += valor
+
+    def _amostras(self) -> Iterator[str]:
+        with self._trava:
+            valores = [(rotulos, list(contagens), soma) for rotulos, (contagens, soma) in self._valores.items()]
+        for rotulos, contagens, soma in valores:
+            acumulado = 0
+            for limite, contagem in zip((*self.limites, float("inf")), contagens):
+                acumulado += contagem
+                faixa = self._seletor(rotulos, f'le="{_numero(limite)}"')
+                yield f"{self.nome}_bucket{faixa} {acumulado}"
+            yield f"{self.nome}_sum{self._seletor(rotulos)} {_numero(soma)}"
+            yield f"{self.nome}_count{self._seletor(rotulos)} {acumulado}"
+
+
+class RegistroMetricas:
+    """
+    Conjunto das métricas expostas em /metrics
+
+    Cada worker do uvicorn tem o seu próprio registro, então cada resposta
+    traz só as métricas do processo que a atendeu.
+    """
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+
+    def registrar(self, metrica: _Metrica) -> _Metrica:
+        self._metricas.append(metrica)
+        return metrica
+
+    def texto(self) -> str:
+        return "\n".join(metrica.texto() for metrica in self._metricas) + "\n"
+
+
+registro_metricas = RegistroMetricas()
+
+REQUISICOES = registro_metricas.registrar(Contador(
+    "concessionaria_http_requisicoes_total", "Requisições HTTP atendidas", ("metodo", "rota", "status")
+))
+DURACAO_REQUISICOES = registro_metricas.registrar(Histograma(
+    "concessionaria_http_requisicao_duracao_segundos", "Tempo de atendimento das requisições HTTP",
+    LIMITES_REQUISICAO, ("metodo", "rota")
+))
+EM_ANDAMENTO = registro_metricas.registrar(Medidor(
+    "concessionaria_http_requisicoes_em_andamento", "Requisições HTTP sendo atendidas no momento"
+))
+BYTES_REQUISICOES = registro_metricas.registrar(Histograma(
+    "concessionaria_http_requisicao_bytes", "Tamanho do corpo das requisições HTTP", LIMITES_BYTES, ("metodo", "rota")
+))
+BYTES_RESPOSTAS = registro_metricas.registrar(Histograma(
+    "concessionaria_http_resposta_bytes", "Tamanho do corpo das respostas HTTP", LIMITES_BYTES, ("metodo", "rota")
+))
+DURACAO_BANCO = registro_metricas.registrar(Histograma(
+    "concessionaria_banco_operacao_duracao_segundos", "Tempo de execução dos métodos do banco de dados",
+    LIMITES_BANCO, ("metodo",)
+))
+LINHAS_BANCO = registro_metricas.registrar(Contador(
+    "concessionaria_banco_linhas_lidas_total",
+    "Registros lidos pelos métodos do banco (examinados por filtros e agregações ou copiados para o resultado)",
+    ("metodo",)
+))
+
+
+class _Contagem(threading.local):
+    linhas = 0
+
+
+_contagem = _Contagem()
+
+
+def contar_linhas(quantidade: int) -> None:
+    """
+    Soma registros lidos à operação do banco em andamento na thread atual
+    """
+    _contagem.linhas += quantidade
+
+
+def _medir_iteracao(rotulos: Tuple[str, ...], iterador: Iterator[Any]) -> Iterator[Any]:
+    # Só o tempo gasto dentro do gerador é medido, não o de quem consome os itens;
+    # cada item entregue conta como um registro lido
+    duracao = 0.0
+    linhas = 0
+    relogio = time.perf_counter
+    try:
+        inicio = relogio()
+        for item in iterador:
+            duracao += relogio() - inicio
+            linhas += 1
+            yield item
+            inicio = relogio()
+        duracao += relogio() - inicio
+    finally:
+        DURACAO_BANCO.observar(rotulos, duracao)
+        if linhas:
+            LINHAS_BANCO.incrementar(rotulos, linhas)
+
+
+def _medir(metodo: Callable[..., Any]) -> Callable[..., Any]:
+    rotulos = (metodo.__name__,)
+
+    @wraps(metodo)
+    def medido(*args, **kwargs):
+        resultado = None
+        anterior, _contagem.linhas = _contagem.linhas, 0
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(*args, **kwargs)
+            return _medir_iteracao(rotulos, resultado) if type(resultado) is GeneratorType else resultado
+        finally:
+            duracao = time.perf_counter() - inicio
+            linhas = _contagem.linhas
+            # Uma chamada aninhada também conta para a operação que a fez
+            _contagem.linhas = anterior + linhas
+            if type(resultado) is not GeneratorType:
+                DURACAO_BANCO.observar(rotulos, duracao)
+                if linhas:
+                    LINHAS_BANCO.incrementar(rotulos, linhas)
+    return medido
+
+
+def instrumentar(banco: Any) -> Any:
+    """
+    Passa a medir tempo e registros lidos de todos os métodos públicos do banco
+
+    Os métodos medidos substituem os da classe apenas nesta instância, então
+    um Database usado internamente por outro backend não é contado duas vezes.
+    Exportações (geradores) são medidas ao longo de toda a iteração.
+    """
+    for nome, _ in inspect.getmembers(type(banco), inspect.isfunction):
+        if not nome.startswith("_") and nome != "bloqueante":
+            setattr(banco, nome, _medir(getattr(banco, nome)))
+    return banco
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mede as requisições HTTP por método e rota
+
+    A rota é o caminho declarado ("/api/veiculos/{veiculo_id}"), não o
+    pedido, para que a quantidade de séries não cresça com os IDs; caminhos
+    sem rota correspondente ficam como "desconhecida".
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self._rotas: Dict[Callable, str] = {}
+
+    def _rota(self, scope: dict) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "desconhecida"
+        rota = self._rotas.get(endpoint)
+        if rota is None:
+            self._rotas = {
+                getattr(candidata, "endpoint", None): candidata.path
+                for candidata in scope["app"].routes if hasattr(candidata, "path")
+            }
+            rota = self._rotas.get(endpoint, "desconhecida")
+        return rota
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recebidos = enviados = 0
+        codigo = 500
+
+        async def receber() -> dict:
+            nonlocal recebidos
+            mensagem = await receive()
+            recebidos += len(mensagem.get("body", b""))
+            return mensagem
+
+        async def enviar(mensagem: dict) -> None:
+            nonlocal codigo, enviados
+            if mensagem["type"] == "http.response.start":
+                codigo = mensagem["status"]
+            else:
+                enviados += len(mensagem.get("body", b""))
+            await send(mensagem)
+
+        EM_ANDAMENTO.somar((), 1)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receber, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            EM_ANDAMENTO.somar((), -1)
+            rotulos = (scope["method"], self._rota(scope))
+            REQUISICOES.incrementar((*rotulos, str(codigo)))
+            DURACAO_REQUISICOES.observar(rotulos, duracao)
+            BYTES_REQUISICOES.observar(rotulos, recebidos)
+            BYTES_RESPOSTAS.observar(rotulos, enviados)
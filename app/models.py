@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 
 
@@ -47,6 +47,8 @@ class EstatisticasCargo(BaseModel):
     quantidade: int
     salario_total: float
     salario_medio: float
+    salario_minimo: float
+    salario_maximo: float
 
 
 class EstatisticasGerais(BaseModel):
@@ -122,3 +124,85 @@ class Venda(BaseModel):
                 "valor_venda": 115000.00
             }
         } 
+
+
+class ResultadoItemLote(BaseModel):
+    indice: int = Field(..., description="Posição do item no lote enviado")
+    id: Optional[int] = None
+    sucesso: bool
+    erro: Optional[str] = None
+
+
+class ResultadoLote(BaseModel):
+    total: int
+    sucessos: int
+    falhas: int
+    itens: List[ResultadoItemLote]
+
+
+class ResumoVendas(BaseModel):
+    grupo: str = Field(..., description="Mês (AAAA-MM), ID do vendedor, tipo, marca ou 'total'")
+    quantidade: int
+    receita: float
+    preco_tabela: float = Field(..., description="Soma do preço de tabela dos veículos vendidos, no momento de cada venda")
+    desconto: float = Field(..., description="Preço de tabela menos o valor de venda")
+    desconto_percentual: float
+
+
+class RankingVendedor(BaseModel):
+    posicao: int
+    funcionario_id: int
+    nome: Optional[str] = Field(None, description="Nome do funcionário (vazio se ele foi removido)")
+    cargo: Optional[Cargo] = None
+    quantidade_vendas: int
+    receita: float
+    desconto_medio: float = Field(..., description="Desconto médio em relação ao preço de tabela do veículo")
+
+
+class GranularidadeReceita(str, Enum):
+    DIA = "dia"
+    MES = "mes"
+    ANO = "ano"
+
+
+class ReceitaPeriodo(BaseModel):
+    periodo: str = Field(..., description="Dia (AAAA-MM-DD), mês (AAAA-MM) ou ano (AAAA)")
+    inicio: date = Field(..., description="Primeiro dia do período dentro do intervalo")
+    fim: date = Field(..., description="Último dia do período dentro do intervalo")
+    quantidade: int
+    receita: float
+
+
+class ReceitaVendas(BaseModel):
+    inicio: Optional[date] = Field(None, description="Primeiro dia do intervalo (vazio se não há vendas)")
+    fim: Optional[date] = Field(None, description="Último dia do intervalo (vazio se não há vendas)")
+    granularidade: GranularidadeReceita
+    quantidade: int
+    receita: float
+    periodos: List[ReceitaPeriodo]
+
+
+class BuscaVeiculos(BaseModel):
+    total: int = Field(..., description="Quantidade de veículos que atendem aos critérios")
+    itens: List[Veiculo]
+    facetas_marca: Dict[str, int] = Field(..., description="Quantidade de resultados por marca")
+    facetas_tipo: Dict[str, int] = Field(..., description="Quantidade de resultados por tipo")
+
+
+class FormatoPerfil(str, Enum):
+    TEXTO = "texto"
+    PSTATS = "pstats"
+    COLAPSADO = "colapsado"
+
+
+class ResumoPerfil(BaseModel):
+    id: int
+    metodo: str
+    caminho: str
+    status: int
+    inicio: datetime = Field(..., description="Momento em que a requisição começou")
+    duracao_ms: float
+    origem: str = Field(..., description="'pedido' (token de administração) ou 'amostragem'")
+    concorrentes: int = Field(
+        ..., description="Outras requisições em andamento no worker durante a captura: não entram no perfil, mas contam na duração"
+    )
@@ -0,0 +1,83 @@
+import base64
+import binascii
+from functools import partial
+from typing import List, Optional, Set, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+
+from app.assincrono import em_thread
+from app.serializacao import resposta_json
+
+
+LIMITE_MAXIMO = 1000
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    """
+    Gera o cursor opaco que aponta para depois do registro informado
+    """
+    return base64.urlsafe_b64encode(f"id:{ultimo_id}".encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Recupera o ID contido em um cursor gerado por codificar_cursor
+    """
+    if not cursor:
+        return None
+    try:
+        conteudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefixo, valor = conteudo.split(":", 1)
+        if prefixo != "id":
+            raise ValueError(conteudo)
+        return int(valor)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def campos_projecao(fields: Optional[str], modelo: Type[BaseModel]) -> Optional[Set[str]]:
+    """
+    Converte o parâmetro fields (nomes separados por vírgula) no conjunto de campos a retornar
+
+    O campo id sempre é incluído, pois é ele que alimenta o cursor.
+    """
+    if not fields:
+        return None
+    campos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    desconhecidos = campos - set(modelo.model_fields)
+    if desconhecidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inexistentes: {', '.join(sorted(desconhecidos))}"
+        )
+    return campos | {"id"}
+
+
+async def responder_pagina(
+    response: Response,
+    itens: List[BaseModel],
+    limit: Optional[int],
+    fields: Optional[str],
+    modelo: Type[BaseModel]
+):
+    """
+    Monta a resposta de uma página de resultados
+
+    Os itens devem ter sido buscados com limit + 1 para saber se há uma próxima
+    página; nesse caso o cursor dela vai no cabeçalho X-Next-Cursor. Sem
+    limite, a projeção de uma listagem inteira é serializada fora do laço de
+    eventos.
+    """
+    campos = campos_projecao(fields, modelo)
+    cabecalhos = {}
+    if limit is not None and len(itens) > limit:
+        itens = itens[:limit]
+        cabecalhos["X-Next-Cursor"] = codificar_cursor(itens[-1].id)
+
+    if campos is None:
+        response.headers.update(cabecalhos)
+        return itens
+    if len(itens) > LIMITE_MAXIMO:
+        return await em_thread(partial(resposta_json, itens, campos, cabecalhos))
+    return resposta_json(itens, campos, cabecalhos)
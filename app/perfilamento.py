@@ -0,0 +1,296 @@
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Generator, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from app import config
+
+
+# Perfil da requisição em andamento no contexto atual (None fora de uma requisição perfilada)
+perfil_em_andamento: ContextVar[Optional["PerfilRequisicao"]] = ContextVar("perfil_em_andamento", default=None)
+
+
+def token_valido(token: Optional[str]) -> bool:
+    """
+    Confere o token de administração (CONCESSIONARIA_ADMIN_TOKEN), em tempo constante
+    """
+    return bool(config.ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode())
+
+
+class _PassosPerfilados:
+    """
+    Aguarda uma corrotina com o perfilador ligado só durante os passos dela
+
+    Cada vez que a corrotina é retomada pelo laço de eventos, o perfilador é
+    ligado, e ao devolver o controle (num await que suspende) é desligado:
+    as outras tarefas que rodam no laço nesse intervalo ficam de fora.
+    """
+
+    def __init__(self, corrotina: Awaitable[Any], perfil: cProfile.Profile):
+        self._corrotina = corrotina
+        self._perfil = perfil
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        passos = self._corrotina.__await__()
+        valor, erro = None, None
+        while True:
+            self._perfil.enable()
+            try:
+                sinal = passos.throw(erro) if erro is not None else passos.send(valor)
+            except StopIteration as fim:
+                return fim.value
+            finally:
+                self._perfil.disable()
+            try:
+                valor, erro = (yield sinal), None
+            except BaseException as excecao:
+                valor, erro = None, excecao
+
+
+class PerfilRequisicao:
+    """
+    cProfile de uma única requisição
+
+    Na thread do laço de eventos, só os passos da própria requisição são
+    perfilados (veja _PassosPerfilados), não os das requisições intercaladas
+    com ela; o trabalho que ela repassa a outras threads (veja
+    DatabaseAssincrono e em_thread) é perfilado na thread que o executa e
+    somado ao resultado no final. Tarefas que a requisição cria no laço
+    (as de uma resposta em streaming, por exemplo) não entram no perfil.
+    """
+
+    def __init__(self):
+        self._principal = cProfile.Profile()
+        self._threads: List[cProfile.Profile] = []
+
+    def executar(self, corrotina: Awaitable[Any]) -> Awaitable[Any]:
+        return _PassosPerfilados(corrotina, self._principal)
+
+    def parar(self) -> pstats.Stats:
+        estatisticas = pstats.Stats(self._principal)
+        for perfil in self._threads:
+            estatisticas.add(perfil)
+        return estatisticas
+
+    def na_thread(self, funcao: Callable[[], Any]) -> Callable[[], Any]:
+        """
+        Envolve uma função que vai rodar em outra thread para que ela também seja perfilada
+        """
+        def perfilada():
+            perfil = cProfile.Profile()
+            self._threads.append(perfil)
+            return perfil.runcall(funcao)
+        return perfilada
+
+
+class PerfilGuardado(NamedTuple):
+    id: int
+    metodo: str
+    caminho: str
+    status: int
+    inicio: float
+    duracao: float
+    origem: str
+    concorrentes: int
+    estatisticas: pstats.Stats
+
+
+class PerfisGuardados:
+    """
+    Os perfis mais recentes, em um buffer circular de tamanho fixo
+    """
+
+    def __init__(self, capacidade: int):
+        self._perfis: Deque[PerfilGuardado] = deque(maxlen=max(capacidade, 1))
+        self._trava = threading.Lock()
+
+    def guardar(self, perfil: PerfilGuardado) -> None:
+        with self._trava:
+            self._perfis.append(perfil)
+
+    def listar(self) -> List[PerfilGuardado]:
+        with self._trava:
+            return list(reversed(self._perfis))
+
+    def obter(self, perfil_id: int) -> Optional[PerfilGuardado]:
+        with self._trava:
+            return next((perfil for perfil in self._perfis if perfil.id == perfil_id), None)
+
+
+perfis_guardados = PerfisGuardados(config.PERFIL_CAPACIDADE)
+
+
+def perfilamento_ativo() -> bool:
+    """
+    Indica se alguma requisição pode ser perfilada: com token de administração ou amostragem configurados
+    """
+    return bool(config.ADMIN_TOKEN) or config.PERFIL_AMOSTRAGEM > 0
+
+
+def texto_pstats(estatisticas: pstats.Stats, ordenar: str, limite: int) -> str:
+    saida = io.StringIO()
+    estatisticas.stream = saida
+    estatisticas.sort_stats(ordenar).print_stats(limite)
+    return saida.getvalue()
+
+
+def binario_pstats(estatisticas: pstats.Stats) -> bytes:
+    # Mesmo conteúdo de Stats.dump_stats: abre com pstats.Stats(arquivo), snakeviz etc.
+    return marshal.dumps(estatisticas.stats)
+
+
+def _rotulo(funcao: Tuple[str, int, str]) -> str:
+    arquivo, linha, nome = funcao
+    if arquivo == "~":
+        rotulo = nome
+    else:
+        # Com o diretório, para distinguir app/main.py de pydantic/main.py
+        pasta, base = os.path.split(arquivo)
+        rotulo = f"{nome} ({os.path.basename(pasta)}/{base}:{linha})"
+    return rotulo.replace(";", ",")
+
+
+def pilhas_colapsadas(estatisticas: pstats.Stats, profundidade_maxima: int = 64) -> str:
+    """
+    Pilhas no formato "a;b;c microssegundos", aceito por flamegraph.pl e speedscope
+
+    O cProfile guarda só as arestas chamador -> chamado, não as pilhas, então
+    o tempo de uma função chamada por vários caminhos é dividido entre eles na
+    proporção do tempo de cada chamador: uma aproximação, exata quando cada
+    função tem um único chamador.
+    """
+    dados = estatisticas.stats
+    chamados: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+    for funcao, (_, _, _, _, chamadores) in dados.items():
+        for chamador, aresta in chamadores.items():
+            chamados.setdefault(chamador, []).append((funcao, aresta[3]))
+    raizes = [funcao for funcao, (_, _, _, _, chamadores) in dados.items() if not any(c in dados for c in chamadores)]
+
+    linhas: Dict[str, float] = {}
+
+    def visitar(funcao: Tuple, caminho: Tuple[Tuple, ...], rotulos: str, tempo: float) -> None:
+        _, _, proprio, acumulado, _ = dados[funcao]
+        if acumulado > 0:
+            linhas[rotulos] = linhas.get(rotulos, 0.0) + tempo * proprio / acumulado
+        if len(caminho) >= profundidade_maxima:
+            return
+        for filho, tempo_aresta in chamados.get(funcao, ()):
+            tempo_filho = tempo_aresta * tempo / acumulado if acumulado > 0 else 0.0
+            # Recursão e caminhos abaixo de 1 microssegundo são cortados
+            if filho in caminho or tempo_filho < 1e-6:
+                continue
+            visitar(filho, caminho + (filho,), f"{rotulos};{_rotulo(filho)}", tempo_filho)
+
+    for raiz in raizes:
+        visitar(raiz, (raiz,), _rotulo(raiz), dados[raiz][3])
+    return "".join(
+        f"{pilha} {round(tempo * 1e6)}\n"
+        for pilha, tempo in sorted(linhas.items()) if round(tempo * 1e6) > 0
+    )
+
+
+def _pedido(scope: dict) -> Optional[dict]:
+    """
+    Escopo a ser atendido com perfil, se a requisição pedir um com o token válido (None caso contrário)
+
+    O parâmetro perfilar é retirado da query string, para não chegar às rotas
+    nem às chaves do cache de respostas. A troca é feita no próprio escopo,
+    que é o mesmo dos middlewares externos: o Starlette grava nele a rota
+    atendida (usada pelas métricas).
+    """
+    for nome, valor in scope["headers"]:
+        if nome == b"x-perfilar":
+            return scope if token_valido(valor.decode("latin-1")) else None
+    if b"perfilar=" in scope["query_string"]:
+        parametros = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        token = next((valor for nome, valor in parametros if nome == "perfilar"), None)
+        if token_valido(token):
+            restantes = urlencode([(nome, valor) for nome, valor in parametros if nome != "perfilar"])
+            scope["query_string"] = restantes.encode("latin-1")
+            return scope
+    return None
+
+
+class MiddlewarePerfil:
+    """
+    Middleware ASGI que perfila as requisições pedidas pelo administrador ou sorteadas
+
+    Uma requisição é perfilada quando traz o token de administração no
+    cabeçalho X-Perfilar ou no parâmetro perfilar da query, ou quando é
+    sorteada pela taxa de amostragem. Só uma requisição por vez é perfilada,
+    para limitar o custo do cProfile; as demais seguem normalmente. A
+    resposta perfilada traz o cabeçalho X-Perfil-Id.
+
+    O perfil traz só o trabalho da própria requisição (veja PerfilRequisicao),
+    mas a duração dela inclui o tempo em que o laço atendeu outras: o perfil
+    guarda quantas outras requisições estavam em andamento durante a captura.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self._ocupado = threading.Lock()
+        self._ids = itertools.count(1)
+        # Requisições iniciadas e em andamento no laço de eventos deste worker
+        self._iniciadas = 0
+        self._em_andamento = 0
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self._iniciadas += 1
+        self._em_andamento += 1
+        try:
+            await self._atender(scope, receive, send)
+        finally:
+            self._em_andamento -= 1
+
+    async def _atender(self, scope: dict, receive: Callable, send: Callable) -> None:
+
+        origem = "pedido"
+        pedido = _pedido(scope)
+        if pedido is None:
+            if not (config.PERFIL_AMOSTRAGEM > 0 and random.random() < config.PERFIL_AMOSTRAGEM):
+                await self.app(scope, receive, send)
+                return
+            pedido, origem = scope, "amostragem"
+        if not self._ocupado.acquire(blocking=False):
+            await self.app(pedido, receive, send)
+            return
+
+        perfil_id = next(self._ids)
+        codigo = 500
+
+        async def enviar(mensagem: dict) -> None:
+            nonlocal codigo
+            if mensagem["type"] == "http.response.start":
+                codigo = mensagem["status"]
+                mensagem = {**mensagem, "headers": [*mensagem.get("headers", ()), (b"x-perfil-id", str(perfil_id).encode())]}
+            await send(mensagem)
+
+        perfil = PerfilRequisicao()
+        marcador = perfil_em_andamento.set(perfil)
+        inicio, relogio = time.time(), time.perf_counter()
+        # As que já estavam em andamento, mais as que começarem durante a captura
+        concorrentes, iniciadas = self._em_andamento - 1, self._iniciadas
+        try:
+            await perfil.executar(self.app(pedido, receive, enviar))
+        finally:
+            estatisticas = perfil.parar()
+            duracao = time.perf_counter() - relogio
+            concorrentes += self._iniciadas - iniciadas
+            perfil_em_andamento.reset(marcador)
+            self._ocupado.release()
+            perfis_guardados.guardar(PerfilGuardado(
+                perfil_id, scope["method"], scope["path"], codigo, inicio, duracao, origem, concorrentes, estatisticas
+            ))
@@ -0,0 +1,273 @@
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Cada registro do WAL é gravado como: tamanho (4 bytes) + CRC32 (4 bytes) + conteúdo
+_CABECALHO = struct.Struct("<II")
+
+
+class Armazenamento:
+    """
+    Interface dos mecanismos de persistência usados pelo Database
+
+    O Database aplica cada alteração em memória e a repassa ao armazenamento
+    com anexar(); aguardar() bloqueia até que a alteração esteja em disco, e
+    duravel() informa, sem bloquear, se ela já está. A trava de escrita é
+    liberada antes do fsync, mas as leituras esperam que a última escrita
+    concluída seja durável, então nunca veem uma alteração que uma queda
+    poderia desfazer. verificar() é chamado antes de
+    cada escrita e de cada leitura: depois que o armazenamento falha, ele
+    recusa ambas, porque a alteração que falhou continua na memória. O estado
+    válido passa a ser o que a recuperação encontrar no disco ao reiniciar.
+    """
+
+    def recuperar(self) -> Tuple[Optional[Dict[str, Any]], Iterator[Tuple[str, str, Any]]]:
+        """
+        Retorna o último snapshot (ou None) e as operações registradas depois dele
+        """
+        return None, iter(())
+
+    def verificar(self) -> None:
+        pass
+
+    def anexar(self, operacao: str, entidade: str, dados: Any) -> int:
+        return 0
+
+    def aguardar(self, sequencia: int) -> None:
+        pass
+
+    def duravel(self, sequencia: int) -> bool:
+        return True
+
+    def precisa_snapshot(self) -> bool:
+        return False
+
+    def rotacionar(self) -> int:
+        return 0
+
+    def gravar_snapshot(self, estado: Dict[str, Any], segmento: int) -> None:
+        pass
+
+    def cancelar_snapshot(self) -> None:
+        """
+        Desiste do snapshot iniciado por rotacionar(), para que um próximo seja tentado
+        """
+
+    def fechar(self) -> None:
+        pass
+
+
+class ArmazenamentoWAL(Armazenamento):
+    """
+    Persistência com log de escrita antecipada (WAL), group commit e snapshots
+
+    As operações são acumuladas em memória e uma thread dedicada as grava e
+    executa um único fsync para todo o grupo, liberando de uma vez todas as
+    requisições que aguardavam; uma escrita em lote é um único registro. Se
+    uma gravação falha, todas as operações seguintes (leituras inclusive)
+    são recusadas. Periodicamente o estado completo é gravado em
+    um snapshot compacto e os segmentos de WAL anteriores a ele são apagados,
+    então a recuperação lê o snapshot e reaplica apenas o final do log.
+    """
+
+    def __init__(self, diretorio: str, intervalo_commit_ms: float = 2, operacoes_por_snapshot: int = 100000):
+        self.diretorio = diretorio
+        self.intervalo_commit = intervalo_commit_ms / 1000
+        self.operacoes_por_snapshot = operacoes_por_snapshot
+        os.makedirs(diretorio, exist_ok=True)
+
+        segmentos = self._segmentos()
+        self._segmento = segmentos[-1] + 1 if segmentos else 1
+        self._pendentes: List[Tuple[int, bytes]] = []
+        self._sequencia = 0
+        self._sequencia_duravel = 0
+        self._sequencia_rotacao = 0
+        self._operacoes_desde_snapshot = 0
+        self._snapshot_em_andamento = False
+        self._erro: Optional[BaseException] = None
+        self._encerrar = False
+        self._condicao = threading.Condition()
+        self._thread = threading.Thread(target=self._gravar_continuamente, name="wal-group-commit", daemon=True)
+        self._thread.start()
+
+    # Arquivos
+
+    def _caminho_segmento(self, segmento: int) -> str:
+        return os.path.join(self.diretorio, f"wal.{segmento:08d}.log")
+
+    def _caminho_snapshot(self) -> str:
+        return os.path.join(self.diretorio, "snapshot.bin")
+
+    def _segmentos(self) -> List[int]:
+        return sorted(
+            int(nome[4:-4]) for nome in os.listdir(self.diretorio)
+            if nome.startswith("wal.") and nome.endswith(".log")
+        )
+
+    def _sincronizar_diretorio(self) -> None:
+        if hasattr(os, "O_DIRECTORY"):
+            descritor = os.open(self.diretorio, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(descritor)
+            finally:
+                os.close(descritor)
+
+    # Recuperação
+
+    def recuperar(self) -> Tuple[Optional[Dict[str, Any]], Iterator[Tuple[str, str, Any]]]:
+        estado = None
+        primeiro_segmento = 0
+        if os.path.exists(self._caminho_snapshot()):
+            with open(self._caminho_snapshot(), "rb") as arquivo:
+                estado = pickle.load(arquivo)
+            primeiro_segmento = estado["segmento"]
+        segmentos = [s for s in self._segmentos() if s >= primeiro_segmento and s < self._segmento]
+        return estado, self._ler_segmentos(segmentos)
+
+    def _ler_segmentos(self, segmentos: List[int]) -> Iterator[Tuple[str, str, Any]]:
+        for segmento in segmentos:
+            with open(self._caminho_segmento(segmento), "rb") as arquivo:
+                conteudo = arquivo.read()
+            posicao = 0
+            while posicao + _CABECALHO.size <= len(conteudo):
+                tamanho, crc = _CABECALHO.unpack_from(conteudo, posicao)
+                inicio = posicao + _CABECALHO.size
+                registro = conteudo[inicio:inicio + tamanho]
+                # Um registro incompleto ou corrompido indica uma gravação interrompida
+                if len(registro) < tamanho or zlib.crc32(registro) != crc:
+                    break
+                yield pickle.loads(registro)
+                posicao = inicio + tamanho
+
+    # Gravação
+
+    def verificar(self) -> None:
+        # Depois de uma falha de gravação o WAL não aceita mais nada; lido sem a trava, pois vale para toda leitura
+        erro = self._erro
+        if erro is not None:
+            raise RuntimeError("Falha ao gravar o WAL") from erro
+
+    def anexar(self, operacao: str, entidade: str, dados: Any) -> int:
+        conteudo = pickle.dumps((operacao, entidade, dados), protocol=pickle.HIGHEST_PROTOCOL)
+        registro = _CABECALHO.pack(len(conteudo), zlib.crc32(conteudo)) + conteudo
+        with self._condicao:
+            if self._erro is not None:
+                raise RuntimeError("Falha ao gravar o WAL") from self._erro
+            self._pendentes.append((self._segmento, registro))
+            self._sequencia += 1
+            self._operacoes_desde_snapshot += 1
+            self._condicao.notify_all()
+            return self._sequencia
+
+    def aguardar(self, sequencia: int) -> None:
+        with self._condicao:
+            while self._sequencia_duravel < sequencia and self._erro is None:
+                self._condicao.wait()
+            if self._erro is not None:
+                raise RuntimeError("Falha ao gravar o WAL") from self._erro
+
+    def duravel(self, sequencia: int) -> bool:
+        # Lido sem a trava: a sequência durável só cresce
+        return self._sequencia_duravel >= sequencia
+
+    def _gravar_continuamente(self) -> None:
+        arquivos: Dict[int, Any] = {}
+        try:
+            while True:
+                with self._condicao:
+                    while not self._pendentes and not self._encerrar:
+                        self._condicao.wait()
+                    if not self._pendentes and self._encerrar:
+                        break
+                # Espera um pouco para que outras requisições entrem no mesmo grupo
+                if self.intervalo_commit:
+                    time.sleep(self.intervalo_commit)
+                with self._condicao:
+                    grupo, self._pendentes = self._pendentes, []
+                    sequencia = self._sequencia
+
+                usados = set()
+                for segmento, registro in grupo:
+                    if segmento not in arquivos:
+                        arquivos[segmento] = open(self._caminho_segmento(segmento), "ab")
+                        self._sincronizar_diretorio()
+                    arquivos[segmento].write(registro)
+                    usados.add(segmento)
+                for segmento in usados:
+                    arquivos[segmento].flush()
+                    os.fsync(arquivos[segmento].fileno())
+
+                # Segmentos anteriores ao atual não recebem mais registros
+                for segmento in [s for s in arquivos if s < self._segmento]:
+                    arquivos.pop(segmento).close()
+
+                with self._condicao:
+                    self._sequencia_duravel = sequencia
+                    self._condicao.notify_all()
+        except BaseException as erro:
+            with self._condicao:
+                self._erro = erro
+                self._condicao.notify_all()
+        finally:
+            for arquivo in arquivos.values():
+                arquivo.close()
+
+    # Snapshots
+
+    def precisa_snapshot(self) -> bool:
+        return self._operacoes_desde_snapshot >= self.operacoes_por_snapshot and not self._snapshot_em_andamento
+
+    def rotacionar(self) -> int:
+        """
+        Inicia um novo segmento de WAL e retorna o número dele
+
+        Deve ser chamado no mesmo ponto em que o estado para o snapshot é
+        capturado: tudo o que veio antes fica no snapshot e tudo o que vier
+        depois, no novo segmento.
+        """
+        with self._condicao:
+            self._segmento += 1
+            self._operacoes_desde_snapshot = 0
+            self._snapshot_em_andamento = True
+            self._sequencia_rotacao = self._sequencia
+            return self._segmento
+
+    def gravar_snapshot(self, estado: Dict[str, Any], segmento: int) -> None:
+        try:
+            # O segmento anterior precisa estar completo em disco antes de ser descartado
+            self.aguardar(self._sequencia_rotacao)
+            estado = dict(estado, segmento=segmento)
+            temporario = self._caminho_snapshot() + ".tmp"
+            try:
+                with open(temporario, "wb") as arquivo:
+                    pickle.dump(estado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                os.replace(temporario, self._caminho_snapshot())
+            except BaseException:
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                raise
+            self._sincronizar_diretorio()
+
+            # Os segmentos anteriores já estão cobertos pelo snapshot
+            for antigo in self._segmentos():
+                if antigo < segmento:
+                    os.remove(self._caminho_segmento(antigo))
+        finally:
+            self._snapshot_em_andamento = False
+
+    def cancelar_snapshot(self) -> None:
+        # Os segmentos anteriores continuam no disco, e o próximo snapshot os cobre
+        self._snapshot_em_andamento = False
+
+    def fechar(self) -> None:
+        with self._condicao:
+            self._encerrar = True
+            self._condicao.notify_all()
+        self._thread.join()
@@ -0,0 +1,208 @@
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+# Início do arquivo: identificador do formato + tamanho do índice JSON que vem logo depois
+_CABECALHO = struct.Struct("<8sQ")
+_MAGICO = b"CONCPUB1"
+_ALINHAMENTO = 64
+_CONTROLE = struct.Struct("<Q")
+_NOME_GERACAO = re.compile(r"^geracao-(\d+)\.pub$")
+_NOME_PARTE = re.compile(r"^parte-.+-(\d+)\.pub$")
+
+
+def _alinhar(posicao: int) -> int:
+    return -(-posicao // _ALINHAMENTO) * _ALINHAMENTO
+
+
+def gravar_publicacao(
+    caminho: str,
+    secoes: Dict[str, np.ndarray],
+    metadados: Dict[str, Any],
+    partes: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Grava arrays do NumPy (seções) e metadados em um arquivo binário imutável
+
+    O arquivo começa com um índice JSON (tipo, deslocamento e tamanho de
+    cada seção, mais os metadados), e cada seção vem alinhada em 64 bytes,
+    pronta para ser lida direto de um mapeamento em memória. partes são
+    outras publicações do mesmo diretório (nome -> arquivo) cujas seções
+    também fazem parte desta. A gravação é feita em um arquivo temporário,
+    renomeado no final.
+    """
+    indice_secoes = {}
+    deslocamento = 0
+    for nome, dados in secoes.items():
+        deslocamento = _alinhar(deslocamento)
+        indice_secoes[nome] = [dados.dtype.str, deslocamento, len(dados)]
+        deslocamento += dados.nbytes
+    indice = json.dumps(
+        {"secoes": indice_secoes, "metadados": metadados, "partes": partes or {}}, separators=(",", ":")
+    ).encode()
+    inicio = _alinhar(_CABECALHO.size + len(indice))
+
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(_CABECALHO.pack(_MAGICO, len(indice)) + indice)
+        for nome, dados in secoes.items():
+            arquivo.seek(inicio + indice_secoes[nome][1])
+            arquivo.write(memoryview(np.ascontiguousarray(dados)).cast("B"))
+        # Seções vazias no final não estendem o arquivo sozinhas
+        arquivo.truncate(inicio + deslocamento)
+    os.replace(temporario, caminho)
+
+
+def _ler_indice(dados: Any, caminho: str) -> Tuple[Dict[str, Any], int]:
+    # Índice JSON do início do arquivo e a posição em que as seções começam
+    magico, tamanho = _CABECALHO.unpack_from(dados, 0)
+    if magico != _MAGICO:
+        raise ValueError(f"{caminho} não é uma publicação válida")
+    return json.loads(dados[_CABECALHO.size:_CABECALHO.size + tamanho]), _alinhar(_CABECALHO.size + tamanho)
+
+
+class Publicacao:
+    """
+    Arquivo gravado por gravar_publicacao, mapeado em memória somente para leitura
+
+    Todos os processos que abrem o mesmo arquivo compartilham as mesmas
+    páginas do cache do sistema operacional: secao() devolve arrays do NumPy
+    que apontam direto para o mapeamento, sem cópia. O mapeamento é desfeito
+    quando o último desses arrays deixa de ser usado.
+
+    As partes referenciadas pelo arquivo são abertas junto com ele; as que
+    já estiverem em abertas (de uma geração anterior) são reaproveitadas.
+    """
+
+    def __init__(self, caminho: str, abertas: Optional[Dict[str, "Publicacao"]] = None):
+        with open(caminho, "rb") as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        indice, self._inicio = _ler_indice(self._mapa, caminho)
+        self.metadados: Dict[str, Any] = indice["metadados"]
+        self._secoes: Dict[str, list] = indice["secoes"]
+        diretorio = os.path.dirname(caminho)
+        abertas = abertas or {}
+        self.partes: Dict[str, Publicacao] = {
+            arquivo: abertas.get(arquivo) or Publicacao(os.path.join(diretorio, arquivo))
+            for arquivo in indice.get("partes", {}).values()
+        }
+
+    def secao(self, nome: str) -> Optional[np.ndarray]:
+        """
+        Array somente leitura da seção, ou None se ela não existe
+        """
+        formato = self._secoes.get(nome)
+        if formato is None:
+            for parte in self.partes.values():
+                dados = parte.secao(nome)
+                if dados is not None:
+                    return dados
+            return None
+        tipo, deslocamento, quantidade = formato
+        return np.frombuffer(self._mapa, dtype=np.dtype(tipo), count=quantidade, offset=self._inicio + deslocamento)
+
+    def secoes(self, prefixo: str) -> Dict[str, np.ndarray]:
+        """
+        Seções cujo nome começa com o prefixo, sem ele ("vendas." -> {"id": ..., "valor_venda": ...})
+        """
+        encontradas = {}
+        for parte in self.partes.values():
+            encontradas.update(parte.secoes(prefixo))
+        encontradas.update(
+            (nome[len(prefixo):], self.secao(nome)) for nome in self._secoes if nome.startswith(prefixo)
+        )
+        return encontradas
+
+
+class DiretorioPublicacoes:
+    """
+    Gerações de publicações em um diretório, com um arquivo de controle compartilhado
+
+    Cada geração é um arquivo imutável (geracao-N.pub) com os metadados e a
+    lista das partes que a compõem. Cada parte (um campo de uma coleção com
+    o seu índice, por exemplo) fica no seu próprio arquivo imutável, e uma
+    geração nova só grava as partes que mudaram: as demais continuam nos
+    mesmos arquivos da geração anterior, sem cópia nem regravação. Uma parte
+    gravada é sempre regravada inteira.
+
+    O número da geração atual fica nos 8 bytes do arquivo "controle", que os
+    leitores mantêm mapeado em memória: descobrir se há uma geração nova
+    custa uma leitura de memória, sem chamadas ao sistema. O número só é
+    trocado depois que os arquivos da geração estão completos, então uma
+    publicação é atômica para os leitores. As duas gerações mais recentes
+    (e as suas partes) são mantidas, para que um leitor que acabou de ler o
+    número ainda encontre os arquivos.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        caminho_controle = os.path.join(diretorio, "controle")
+        descritor = os.open(caminho_controle, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(descritor).st_size < _CONTROLE.size:
+                os.ftruncate(descritor, _CONTROLE.size)
+            self._controle = mmap.mmap(descritor, _CONTROLE.size)
+        finally:
+            os.close(descritor)
+        # Partes da última geração aberta, reaproveitadas pela próxima sem novo mapeamento
+        self._abertas: Dict[str, Publicacao] = {}
+
+    def _caminho(self, geracao: int) -> str:
+        return os.path.join(self.diretorio, f"geracao-{geracao:012d}.pub")
+
+    def geracao_atual(self) -> int:
+        """
+        Número da última geração publicada (0 se nenhuma foi publicada)
+        """
+        return _CONTROLE.unpack_from(self._controle, 0)[0]
+
+    def abrir(self, geracao: int) -> Publicacao:
+        publicacao = Publicacao(self._caminho(geracao), self._abertas)
+        self._abertas = publicacao.partes
+        return publicacao
+
+    def _partes(self, geracao: int) -> Dict[str, str]:
+        # Arquivo de cada parte de uma geração já publicada (vazio se ela não existe)
+        try:
+            with open(self._caminho(geracao), "rb") as arquivo:
+                cabecalho = arquivo.read(_CABECALHO.size)
+                _, tamanho = _CABECALHO.unpack(cabecalho)
+                indice, _ = _ler_indice(cabecalho + arquivo.read(tamanho), self._caminho(geracao))
+        except FileNotFoundError:
+            return {}
+        return indice.get("partes", {})
+
+    def publicar(self, partes: Dict[str, Optional[Dict[str, np.ndarray]]], metadados: Dict[str, Any]) -> int:
+        """
+        Grava uma nova geração e a torna a atual; deve ser chamado por um único processo
+
+        Cada parte com seções é gravada em um arquivo novo; uma parte None
+        continua com o arquivo da geração anterior. O custo de uma publicação
+        é o das partes gravadas, não o de todos os dados.
+        """
+        geracao = self.geracao_atual() + 1
+        anteriores = self._partes(geracao - 1)
+        arquivos = {}
+        for nome, secoes in partes.items():
+            if secoes is None:
+                arquivos[nome] = anteriores[nome]
+            else:
+                arquivos[nome] = f"parte-{nome}-{geracao:012d}.pub"
+                gravar_publicacao(os.path.join(self.diretorio, arquivos[nome]), secoes, {})
+        gravar_publicacao(self._caminho(geracao), {}, metadados, arquivos)
+        _CONTROLE.pack_into(self._controle, 0, geracao)
+
+        manter = {*arquivos.values(), *anteriores.values()}
+        for nome in os.listdir(self.diretorio):
+            geracao_arquivo = _NOME_GERACAO.match(nome)
+            antiga = geracao_arquivo is not None and int(geracao_arquivo.group(1)) < geracao - 1
+            if antiga or (_NOME_PARTE.match(nome) and nome not in manter):
+                os.remove(os.path.join(self.diretorio, nome))
+        return geracao
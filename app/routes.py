@@ -1,21 +1,34 @@
-from fastapi import APIRouter, HTTPException, status, Response, Query, Path
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Response, Query, Path, Request
 from typing import List, Optional
 
-from datetime import date
-from app.models import Funcionario, EstatisticasGerais, Cargo, Veiculo, Cliente, Venda
-from app.database import db
+from datetime import date, datetime, timezone
+from app import config
+from app.models import Funcionario, EstatisticasGerais, Cargo, Veiculo, Cliente, Venda, ResultadoLote, ResumoVendas, RankingVendedor, BuscaVeiculos, TipoVeiculo, FormatoPerfil, ResumoPerfil, GranularidadeReceita, ReceitaVendas
+from app.database import db_assincrono
+from app.erros import ErroIntegridade
+from app.cache import em_cache
+from app.paginacao import LIMITE_MAXIMO, codificar_cursor, decodificar_cursor, responder_pagina
+from app.exportacao import resposta_ndjson
+from app.serializacao import resposta_json
+from app.lote import criar_em_lote, atualizar_em_lote, remover_em_lote
+from app.perfilamento import binario_pstats, perfis_guardados, pilhas_colapsadas, texto_pstats, token_valido
 
 
 router = APIRouter(prefix="/api", tags=["concessionaria"])
 
 
 @router.get("/funcionarios", response_model=List[Funcionario])
-def get_funcionarios(
+@em_cache(lambda: db_assincrono.versao_colecoes("funcionarios"))
+async def get_funcionarios(
+    response: Response,
     cargo: Optional[str] = None,
     salario_min: Optional[float] = None,
     salario_max: Optional[float] = None,
     data_contratacao_inicial: Optional[date] = None,
-    data_contratacao_final: Optional[date] = None
+    data_contratacao_final: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description="Quantidade máxima de itens por página"),
+    after_id: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula")
 ):
     """
     Obtém a lista de funcionários da concessionária, com opções de filtragem
@@ -25,27 +38,74 @@ def get_funcionarios(
     - **salario_max**: Filtra por salário máximo
     - **data_contratacao_inicial**: Filtra por data de contratação inicial
     - **data_contratacao_final**: Filtra por data de contratação final
+    - **limit** / **after_id**: Paginação por cursor, em ordem de ID
+    - **fields**: Projeção dos campos retornados (ex.: `nome,cargo`)
     """
-    resultado = db.get_all_funcionarios()
-    
-    if cargo:
-        resultado = [f for f in resultado if f.cargo.value == cargo]
-    
-    if salario_min is not None or salario_max is not None:
-        resultado = db.filtrar_por_salario(salario_min, salario_max)
-    
-    if data_contratacao_inicial is not None or data_contratacao_final is not None:
-        resultado = db.filtrar_por_data_contratacao(data_contratacao_inicial, data_contratacao_final)
+    resultado = await db_assincrono.consultar_funcionarios(
+        cargo=cargo or None,
+        salario_min=salario_min,
+        salario_max=salario_max,
+        data_inicial=data_contratacao_inicial,
+        data_final=data_contratacao_final,
+        apos_id=decodificar_cursor(after_id),
+        limite=limit + 1 if limit else None
+    )
+    return await responder_pagina(response, resultado, limit, fields, Funcionario)
+
+
+@router.get("/funcionarios/estatisticas", response_model=EstatisticasGerais)
+@em_cache(lambda: db_assincrono.versao_colecoes("funcionarios"))
+async def get_estatisticas():
+    """
+    Obtém estatísticas sobre os funcionários da concessionária
     
-    return resultado
+    Retorna:
+    - Total de funcionários
+    - Total de salários
+    - Salário médio
+    - Estatísticas detalhadas por cargo (quantidade, total, média, mínimo e máximo)
+    """
+    return await db_assincrono.calcular_estatisticas()
+
+
+@router.post("/funcionarios/lote", response_model=ResultadoLote)
+async def create_funcionarios_lote(request: Request):
+    """Cadastra vários funcionários de uma vez (array JSON ou NDJSON)"""
+    return await criar_em_lote(await request.body(), request.headers.get("content-type"), Funcionario, db_assincrono.add_funcionarios)
+
+
+@router.put("/funcionarios/lote", response_model=ResultadoLote)
+async def update_funcionarios_lote(request: Request):
+    """Atualiza vários funcionários de uma vez; cada item deve informar o id"""
+    return await atualizar_em_lote(await request.body(), request.headers.get("content-type"), Funcionario, db_assincrono.update_funcionarios)
+
+
+@router.delete("/funcionarios/lote", response_model=ResultadoLote)
+async def delete_funcionarios_lote(request: Request):
+    """Remove vários funcionários a partir de uma lista de IDs"""
+    return await remover_em_lote(await request.body(), request.headers.get("content-type"), db_assincrono.delete_funcionarios)
+
+
+@router.get("/funcionarios/by-email/{email}", response_model=Funcionario)
+async def get_funcionario_por_email(email: str = Path(..., description="E-mail do funcionário (sem diferenciar maiúsculas)")):
+    """
+    Obtém um funcionário pelo e-mail
+    """
+    funcionario = await db_assincrono.get_funcionario_by_email(email)
+    if funcionario is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Funcionário com e-mail {email} não encontrado"
+        )
+    return funcionario
 
 
 @router.get("/funcionarios/{funcionario_id}", response_model=Funcionario)
-def get_funcionario(funcionario_id: int = Path(..., description="ID do funcionário")):
+async def get_funcionario(funcionario_id: int = Path(..., description="ID do funcionário")):
     """
     Obtém os detalhes de um funcionário da concessionária pelo ID
     """
-    funcionario = db.get_funcionario_by_id(funcionario_id)
+    funcionario = await db_assincrono.get_funcionario_by_id(funcionario_id)
     if funcionario is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -55,22 +115,28 @@ def get_funcionario(funcionario_id: int = Path(..., description="ID do funcioná
 
 
 @router.post("/funcionarios", response_model=Funcionario, status_code=status.HTTP_201_CREATED)
-def create_funcionario(funcionario: Funcionario):
+async def create_funcionario(funcionario: Funcionario):
     """
     Cria um novo funcionário na concessionária
     """
-    return db.add_funcionario(funcionario)
+    try:
+        return await db_assincrono.add_funcionario(funcionario)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
 
 
 @router.put("/funcionarios/{funcionario_id}", response_model=Funcionario)
-def update_funcionario(
+async def update_funcionario(
     funcionario_id: int = Path(..., description="ID do funcionário"), 
     funcionario: Funcionario = ...
 ):
     """
     Atualiza os dados de um funcionário da concessionária
     """
-    updated_funcionario = db.update_funcionario(funcionario_id, funcionario)
+    try:
+        updated_funcionario = await db_assincrono.update_funcionario(funcionario_id, funcionario)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
     if updated_funcionario is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -80,11 +146,14 @@ def update_funcionario(
 
 
 @router.delete("/funcionarios/{funcionario_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_funcionario(funcionario_id: int = Path(..., description="ID do funcionário")):
+async def delete_funcionario(funcionario_id: int = Path(..., description="ID do funcionário")):
     """
     Remove um funcionário da concessionária
     """
-    success = db.delete_funcionario(funcionario_id)
+    try:
+        success = await db_assincrono.delete_funcionario(funcionario_id)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,52 +162,56 @@ def delete_funcionario(funcionario_id: int = Path(..., description="ID do funcio
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+@router.get("/funcionarios/{funcionario_id}/vendas", response_model=List[Venda])
+async def get_vendas_funcionario(funcionario_id: int = Path(..., description="ID do funcionário")):
+    """
+    Lista as vendas realizadas por um funcionário
+    """
+    vendas = await db_assincrono.get_vendas_by_funcionario(funcionario_id)
+    if vendas is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Funcionário com ID {funcionario_id} não encontrado"
+        )
+    return resposta_json(vendas)
+
+
 @router.get("/funcionarios/filtro/salario", response_model=List[Funcionario])
-def filtrar_por_salario(
+@em_cache(lambda: db_assincrono.versao_colecoes("funcionarios"))
+async def filtrar_por_salario(
     salario_min: Optional[float] = Query(None, description="Salário mínimo", ge=0),
     salario_max: Optional[float] = Query(None, description="Salário máximo", ge=0)
 ):
     """
     Filtra funcionários por faixa salarial
     """
-    return db.filtrar_por_salario(salario_min, salario_max)
+    return await db_assincrono.filtrar_por_salario(salario_min, salario_max)
 
 
 @router.get("/funcionarios/filtro/data-contratacao", response_model=List[Funcionario])
-def filtrar_por_data_contratacao(
+@em_cache(lambda: db_assincrono.versao_colecoes("funcionarios"))
+async def filtrar_por_data_contratacao(
     data_inicial: Optional[date] = Query(None, description="Data inicial de contratação"),
     data_final: Optional[date] = Query(None, description="Data final de contratação")
 ):
     """
     Filtra funcionários por data de contratação
     """
-    return db.filtrar_por_data_contratacao(data_inicial, data_final)
+    return await db_assincrono.filtrar_por_data_contratacao(data_inicial, data_final)
 
 
 @router.get("/funcionarios/filtro/cargo/{cargo}", response_model=List[Funcionario])
-def filtrar_por_cargo(cargo: str = Path(..., description="Cargo para filtrar")):
+@em_cache(lambda: db_assincrono.versao_colecoes("funcionarios"))
+async def filtrar_por_cargo(cargo: str = Path(..., description="Cargo para filtrar")):
     """
     Filtra funcionários por cargo
     """
-    return db.filtrar_por_cargo(cargo)
-
-
-@router.get("/funcionarios/estatisticas", response_model=EstatisticasGerais)
-def get_estatisticas():
-    """
-    Obtém estatísticas sobre os funcionários da concessionária
-    
-    Retorna:
-    - Total de funcionários
-    - Total de salários
-    - Salário médio
-    - Estatísticas detalhadas por cargo
-    """
-    return db.calcular_estatisticas()
+    return await db_assincrono.filtrar_por_cargo(cargo)
 
 
 @router.get("/cargos", response_model=List[str])
-def get_cargos():
+@em_cache(lambda: db_assincrono.versao_colecoes())
+async def get_cargos():
     """
     Retorna a lista de todos os cargos disponíveis
     """
@@ -147,102 +220,404 @@ def get_cargos():
 
 # Rotas de Veículos
 @router.get("/veiculos", response_model=List[Veiculo])
-def get_veiculos():
-    """Obtém a lista de veículos cadastrados"""
-    return db.get_all_veiculos()
+@em_cache(lambda: db_assincrono.versao_colecoes("veiculos"))
+async def get_veiculos(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description="Quantidade máxima de itens por página"),
+    after_id: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula")
+):
+    """Obtém a lista de veículos cadastrados, com paginação por cursor e projeção de campos"""
+    itens = await db_assincrono.listar_veiculos(decodificar_cursor(after_id), limit + 1 if limit else None)
+    return await responder_pagina(response, itens, limit, fields, Veiculo)
+
+@router.get("/veiculos/export.ndjson")
+async def exportar_veiculos(
+    id_inicial: Optional[int] = Query(None, description="Menor ID exportado"),
+    id_final: Optional[int] = Query(None, description="Maior ID exportado")
+):
+    """Exporta os veículos em NDJSON, transmitindo um registro por linha"""
+    return resposta_ndjson(await db_assincrono.exportar_veiculos(id_inicial, id_final), "veiculos.ndjson")
+
+@router.get("/veiculos/busca", response_model=BuscaVeiculos)
+@em_cache(lambda: db_assincrono.versao_colecoes("veiculos"))
+async def buscar_veiculos(
+    response: Response,
+    marca: Optional[str] = Query(None, description="Marca (ignora acentos e maiúsculas)"),
+    modelo: Optional[str] = Query(None, description="Início de qualquer palavra do modelo"),
+    tipo: Optional[TipoVeiculo] = Query(None, description="Tipo do veículo"),
+    ano_min: Optional[int] = Query(None, description="Ano mínimo"),
+    ano_max: Optional[int] = Query(None, description="Ano máximo"),
+    preco_min: Optional[float] = Query(None, ge=0, description="Preço mínimo"),
+    preco_max: Optional[float] = Query(None, ge=0, description="Preço máximo"),
+    disponivel: Optional[bool] = Query(None, description="Apenas disponíveis (true) ou vendidos (false)"),
+    limit: int = Query(50, ge=1, le=LIMITE_MAXIMO, description="Quantidade máxima de itens por página"),
+    after_id: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)")
+):
+    """Busca no estoque de veículos, com contagem de resultados por marca e por tipo"""
+    resultado = await db_assincrono.buscar_veiculos(
+        marca, modelo, tipo, ano_min, ano_max, preco_min, preco_max, disponivel,
+        apos_id=decodificar_cursor(after_id), limite=limit + 1
+    )
+    if len(resultado.itens) > limit:
+        resultado.itens = resultado.itens[:limit]
+        response.headers["X-Next-Cursor"] = codificar_cursor(resultado.itens[-1].id)
+    return resultado
+
+@router.post("/veiculos/lote", response_model=ResultadoLote)
+async def create_veiculos_lote(request: Request):
+    """Cadastra vários veículos de uma vez (array JSON ou NDJSON)"""
+    return await criar_em_lote(await request.body(), request.headers.get("content-type"), Veiculo, db_assincrono.add_veiculos)
+
+@router.put("/veiculos/lote", response_model=ResultadoLote)
+async def update_veiculos_lote(request: Request):
+    """Atualiza vários veículos de uma vez; cada item deve informar o id"""
+    return await atualizar_em_lote(await request.body(), request.headers.get("content-type"), Veiculo, db_assincrono.update_veiculos)
+
+@router.delete("/veiculos/lote", response_model=ResultadoLote)
+async def delete_veiculos_lote(request: Request):
+    """Remove vários veículos a partir de uma lista de IDs"""
+    return await remover_em_lote(await request.body(), request.headers.get("content-type"), db_assincrono.delete_veiculos)
 
 @router.get("/veiculos/{veiculo_id}", response_model=Veiculo)
-def get_veiculo(veiculo_id: int):
+async def get_veiculo(veiculo_id: int):
     """Obtém detalhes de um veículo pelo ID"""
-    veiculo = db.get_veiculo_by_id(veiculo_id)
+    veiculo = await db_assincrono.get_veiculo_by_id(veiculo_id)
     if veiculo is None:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
     return veiculo
 
 @router.post("/veiculos", response_model=Veiculo, status_code=status.HTTP_201_CREATED)
-def create_veiculo(veiculo: Veiculo):
+async def create_veiculo(veiculo: Veiculo):
     """Cadastra um novo veículo"""
-    return db.add_veiculo(veiculo)
+    return await db_assincrono.add_veiculo(veiculo)
 
 @router.put("/veiculos/{veiculo_id}", response_model=Veiculo)
-def update_veiculo(veiculo_id: int, veiculo: Veiculo):
+async def update_veiculo(veiculo_id: int, veiculo: Veiculo):
     """Atualiza os dados de um veículo"""
-    updated = db.update_veiculo(veiculo_id, veiculo)
+    updated = await db_assincrono.update_veiculo(veiculo_id, veiculo)
     if updated is None:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
     return updated
 
 @router.delete("/veiculos/{veiculo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_veiculo(veiculo_id: int):
+async def delete_veiculo(veiculo_id: int):
     """Remove um veículo do cadastro"""
-    if not db.delete_veiculo(veiculo_id):
+    try:
+        removido = await db_assincrono.delete_veiculo(veiculo_id)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
+    if not removido:
         raise HTTPException(status_code=404, detail="Veículo não encontrado")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
+@router.get("/veiculos/{veiculo_id}/vendas", response_model=List[Venda])
+async def get_vendas_veiculo(veiculo_id: int):
+    """Histórico de vendas de um veículo"""
+    vendas = await db_assincrono.get_vendas_by_veiculo(veiculo_id)
+    if vendas is None:
+        raise HTTPException(status_code=404, detail="Veículo não encontrado")
+    return resposta_json(vendas)
+
 # Rotas de Clientes
 @router.get("/clientes", response_model=List[Cliente])
-def get_clientes():
-    """Obtém a lista de clientes cadastrados"""
-    return db.get_all_clientes()
+@em_cache(lambda: db_assincrono.versao_colecoes("clientes"))
+async def get_clientes(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description="Quantidade máxima de itens por página"),
+    after_id: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula")
+):
+    """Obtém a lista de clientes cadastrados, com paginação por cursor e projeção de campos"""
+    itens = await db_assincrono.listar_clientes(decodificar_cursor(after_id), limit + 1 if limit else None)
+    return await responder_pagina(response, itens, limit, fields, Cliente)
+
+@router.get("/clientes/export.ndjson")
+async def exportar_clientes(
+    id_inicial: Optional[int] = Query(None, description="Menor ID exportado"),
+    id_final: Optional[int] = Query(None, description="Maior ID exportado")
+):
+    """Exporta os clientes em NDJSON, transmitindo um registro por linha"""
+    return resposta_ndjson(await db_assincrono.exportar_clientes(id_inicial, id_final), "clientes.ndjson")
+
+@router.post("/clientes/lote", response_model=ResultadoLote)
+async def create_clientes_lote(request: Request):
+    """Cadastra vários clientes de uma vez (array JSON ou NDJSON)"""
+    return await criar_em_lote(await request.body(), request.headers.get("content-type"), Cliente, db_assincrono.add_clientes)
+
+@router.put("/clientes/lote", response_model=ResultadoLote)
+async def update_clientes_lote(request: Request):
+    """Atualiza vários clientes de uma vez; cada item deve informar o id"""
+    return await atualizar_em_lote(await request.body(), request.headers.get("content-type"), Cliente, db_assincrono.update_clientes)
+
+@router.delete("/clientes/lote", response_model=ResultadoLote)
+async def delete_clientes_lote(request: Request):
+    """Remove vários clientes a partir de uma lista de IDs"""
+    return await remover_em_lote(await request.body(), request.headers.get("content-type"), db_assincrono.delete_clientes)
+
+@router.get("/clientes/by-cpf/{cpf}", response_model=Cliente)
+async def get_cliente_por_cpf(cpf: str = Path(..., description="CPF do cliente, com ou sem pontuação")):
+    """Obtém um cliente pelo CPF"""
+    cliente = await db_assincrono.get_cliente_by_cpf(cpf)
+    if cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return cliente
+
+@router.get("/clientes/by-email/{email}", response_model=Cliente)
+async def get_cliente_por_email(email: str = Path(..., description="E-mail do cliente (sem diferenciar maiúsculas)")):
+    """Obtém um cliente pelo e-mail"""
+    cliente = await db_assincrono.get_cliente_by_email(email)
+    if cliente is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return cliente
 
 @router.get("/clientes/{cliente_id}", response_model=Cliente)
-def get_cliente(cliente_id: int):
+async def get_cliente(cliente_id: int):
     """Obtém detalhes de um cliente pelo ID"""
-    cliente = db.get_cliente_by_id(cliente_id)
+    cliente = await db_assincrono.get_cliente_by_id(cliente_id)
     if cliente is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return cliente
 
 @router.post("/clientes", response_model=Cliente, status_code=status.HTTP_201_CREATED)
-def create_cliente(cliente: Cliente):
+async def create_cliente(cliente: Cliente):
     """Cadastra um novo cliente"""
-    return db.add_cliente(cliente)
+    try:
+        return await db_assincrono.add_cliente(cliente)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
 
 @router.put("/clientes/{cliente_id}", response_model=Cliente)
-def update_cliente(cliente_id: int, cliente: Cliente):
+async def update_cliente(cliente_id: int, cliente: Cliente):
     """Atualiza os dados de um cliente"""
-    updated = db.update_cliente(cliente_id, cliente)
+    try:
+        updated = await db_assincrono.update_cliente(cliente_id, cliente)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
     if updated is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return updated
 
 @router.delete("/clientes/{cliente_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_cliente(cliente_id: int):
+async def delete_cliente(cliente_id: int):
     """Remove um cliente do cadastro"""
-    if not db.delete_cliente(cliente_id):
+    try:
+        removido = await db_assincrono.delete_cliente(cliente_id)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
+    if not removido:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
+@router.get("/clientes/{cliente_id}/vendas", response_model=List[Venda])
+async def get_vendas_cliente(cliente_id: int):
+    """Lista as compras de um cliente"""
+    vendas = await db_assincrono.get_vendas_by_cliente(cliente_id)
+    if vendas is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return resposta_json(vendas)
+
 # Rotas de Vendas
 @router.get("/vendas", response_model=List[Venda])
-def get_vendas():
-    """Obtém a lista de vendas realizadas"""
-    return db.get_all_vendas()
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas"))
+async def get_vendas(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description="Quantidade máxima de itens por página"),
+    after_id: Optional[str] = Query(None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula")
+):
+    """Obtém a lista de vendas realizadas, com paginação por cursor e projeção de campos"""
+    itens = await db_assincrono.listar_vendas(decodificar_cursor(after_id), limit + 1 if limit else None)
+    return await responder_pagina(response, itens, limit, fields, Venda)
+
+@router.get("/vendas/export.ndjson")
+async def exportar_vendas(
+    id_inicial: Optional[int] = Query(None, description="Menor ID exportado"),
+    id_final: Optional[int] = Query(None, description="Maior ID exportado"),
+    data_inicial: Optional[date] = Query(None, description="Data inicial da venda"),
+    data_final: Optional[date] = Query(None, description="Data final da venda")
+):
+    """Exporta as vendas em NDJSON, transmitindo um registro por linha"""
+    return resposta_ndjson(
+        await db_assincrono.exportar_vendas(id_inicial, id_final, data_inicial, data_final),
+        "vendas.ndjson"
+    )
+
+@router.post("/vendas/lote", response_model=ResultadoLote)
+async def create_vendas_lote(request: Request):
+    """Registra várias vendas de uma vez (array JSON ou NDJSON)"""
+    return await criar_em_lote(await request.body(), request.headers.get("content-type"), Venda, db_assincrono.add_vendas)
+
+@router.put("/vendas/lote", response_model=ResultadoLote)
+async def update_vendas_lote(request: Request):
+    """Atualiza várias vendas de uma vez; cada item deve informar o id"""
+    return await atualizar_em_lote(await request.body(), request.headers.get("content-type"), Venda, db_assincrono.update_vendas)
+
+@router.delete("/vendas/lote", response_model=ResultadoLote)
+async def delete_vendas_lote(request: Request):
+    """Remove várias vendas a partir de uma lista de IDs"""
+    return await remover_em_lote(await request.body(), request.headers.get("content-type"), db_assincrono.delete_vendas)
+
+@router.get("/vendas/analise/receita-mensal", response_model=List[ResumoVendas])
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas", "veiculos"))
+async def analisar_receita_mensal(
+    data_inicial: Optional[date] = Query(None, description="Data inicial da venda"),
+    data_final: Optional[date] = Query(None, description="Data final da venda")
+):
+    """Receita, quantidade e desconto das vendas por mês (AAAA-MM)"""
+    return await db_assincrono.analisar_vendas("mes", data_inicial, data_final)
+
+@router.get("/vendas/analise/por-vendedor", response_model=List[ResumoVendas])
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas", "veiculos"))
+async def analisar_vendas_por_vendedor(
+    data_inicial: Optional[date] = Query(None, description="Data inicial da venda"),
+    data_final: Optional[date] = Query(None, description="Data final da venda")
+):
+    """Receita, quantidade e desconto das vendas por vendedor (ID do funcionário)"""
+    return await db_assincrono.analisar_vendas("vendedor", data_inicial, data_final)
+
+@router.get("/vendas/analise/por-tipo", response_model=List[ResumoVendas])
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas", "veiculos"))
+async def analisar_vendas_por_tipo(
+    data_inicial: Optional[date] = Query(None, description="Data inicial da venda"),
+    data_final: Optional[date] = Query(None, description="Data final da venda")
+):
+    """Receita, quantidade e desconto das vendas por tipo de veículo"""
+    return await db_assincrono.analisar_vendas("tipo", data_inicial, data_final)
+
+@router.get("/vendas/analise/por-marca", response_model=List[ResumoVendas])
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas", "veiculos"))
+async def analisar_vendas_por_marca(
+    data_inicial: Optional[date] = Query(None, description="Data inicial da venda"),
+    data_final: Optional[date] = Query(None, description="Data final da venda")
+):
+    """Receita, quantidade e desconto das vendas por marca"""
+    return await db_assincrono.analisar_vendas("marca", data_inicial, data_final)
+
+@router.get("/vendas/analise/descontos", response_model=List[ResumoVendas])
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas", "veiculos"))
+async def analisar_descontos_vendas(
+    data_inicial: Optional[date] = Query(None, description="Data inicial da venda"),
+    data_final: Optional[date] = Query(None, description="Data final da venda")
+):
+    """Desconto total das vendas em relação ao preço de tabela dos veículos"""
+    return await db_assincrono.analisar_vendas("total", data_inicial, data_final)
+
+@router.get("/vendas/ranking", response_model=List[RankingVendedor])
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas", "funcionarios"))
+async def get_ranking_vendedores(
+    limit: int = Query(10, ge=1, le=LIMITE_MAXIMO, description="Quantidade de vendedores no ranking")
+):
+    """Vendedores com maior receita, com quantidade de vendas e desconto médio sobre o preço do veículo no registro de cada venda"""
+    return await db_assincrono.ranking_vendedores(limit)
+
+@router.get("/vendas/receita", response_model=ReceitaVendas)
+@em_cache(lambda: db_assincrono.versao_colecoes("vendas"))
+async def get_receita_vendas(
+    inicio: Optional[date] = Query(None, description="Primeiro dia (padrão: o da venda mais antiga)"),
+    fim: Optional[date] = Query(None, description="Último dia (padrão: o da venda mais recente)"),
+    granularidade: GranularidadeReceita = Query(GranularidadeReceita.DIA, description="Agrupar por dia, mês ou ano")
+):
+    """Quantidade e receita das vendas por dia, mês ou ano, com o total do intervalo"""
+    try:
+        return await db_assincrono.receita_por_periodo(inicio, fim, granularidade.value)
+    except ValueError as erro:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(erro))
 
 @router.get("/vendas/{venda_id}", response_model=Venda)
-def get_venda(venda_id: int):
+async def get_venda(venda_id: int):
     """Obtém detalhes de uma venda pelo ID"""
-    venda = db.get_venda_by_id(venda_id)
+    venda = await db_assincrono.get_venda_by_id(venda_id)
     if venda is None:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
     return venda
 
 @router.post("/vendas", response_model=Venda, status_code=status.HTTP_201_CREATED)
-def create_venda(venda: Venda):
-    """Registra uma nova venda"""
-    return db.add_venda(venda)
+async def create_venda(venda: Venda):
+    """Registra uma nova venda e marca o veículo como indisponível"""
+    try:
+        return await db_assincrono.add_venda(venda)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
 
 @router.put("/vendas/{venda_id}", response_model=Venda)
-def update_venda(venda_id: int, venda: Venda):
+async def update_venda(venda_id: int, venda: Venda):
     """Atualiza os dados de uma venda"""
-    updated = db.update_venda(venda_id, venda)
+    try:
+        updated = await db_assincrono.update_venda(venda_id, venda)
+    except ErroIntegridade as erro:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
     if updated is None:
         raise HTTPException(status_code=404, detail="Venda não encontrada")
     return updated
 
 @router.delete("/vendas/{venda_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_venda(venda_id: int):
-    """Remove uma venda do cadastro"""
-    if not db.delete_venda(venda_id):
+async def delete_venda(venda_id: int):
+    """Remove uma venda do cadastro e devolve o veículo ao estoque"""
+    if not await db_assincrono.delete_venda(venda_id):
         raise HTTPException(status_code=404, detail="Venda não encontrada")
-    return Response(status_code=status.HTTP_204_NO_CONTENT) 
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT) 
+
+
+# Administração
+
+def exigir_admin(x_admin_token: Optional[str] = Header(None, description="Token de administração")):
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Rotas de administração desativadas")
+    if not token_valido(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de administração inválido")
+
+
+router_admin = APIRouter(prefix="/admin", tags=["administração"], dependencies=[Depends(exigir_admin)])
+
+
+@router_admin.get("/perfis", response_model=List[ResumoPerfil])
+async def listar_perfis():
+    """
+    Perfis de requisições guardados, do mais recente ao mais antigo
+
+    Uma requisição é perfilada quando traz o token de administração no cabeçalho
+    **X-Perfilar** (ou no parâmetro **perfilar**) ou quando é sorteada pela
+    amostragem; o ID do perfil volta no cabeçalho X-Perfil-Id da resposta.
+    """
+    return [
+        ResumoPerfil(
+            id=perfil.id,
+            metodo=perfil.metodo,
+            caminho=perfil.caminho,
+            status=perfil.status,
+            inicio=datetime.fromtimestamp(perfil.inicio, timezone.utc),
+            duracao_ms=perfil.duracao * 1000,
+            origem=perfil.origem,
+            concorrentes=perfil.concorrentes
+        )
+        for perfil in perfis_guardados.listar()
+    ]
+
+
+@router_admin.get("/perfis/{perfil_id}")
+async def obter_perfil(
+    perfil_id: int,
+    formato: FormatoPerfil = FormatoPerfil.TEXTO,
+    ordenar: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls|name|filename)$", description="Ordem do relatório em texto"),
+    limite: int = Query(40, ge=1, description="Funções listadas no relatório em texto")
+):
+    """
+    Perfil de uma requisição
+
+    - **texto**: relatório do pstats
+    - **pstats**: arquivo binário do pstats (pstats.Stats, snakeviz)
+    - **colapsado**: pilhas colapsadas para flamegraph.pl ou speedscope
+    """
+    perfil = perfis_guardados.obter(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    if formato == FormatoPerfil.PSTATS:
+        return Response(
+            content=binario_pstats(perfil.estatisticas),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.pstats"'}
+        )
+    if formato == FormatoPerfil.COLAPSADO:
+        return Response(content=pilhas_colapsadas(perfil.estatisticas), media_type="text/plain")
+    return Response(content=texto_pstats(perfil.estatisticas, ordenar, limite), media_type="text/plain")
@@ -1,7 +1,12 @@
-from datetime import date
-from app.models import Funcionario, Cargo, Veiculo, Cliente, Venda
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from app.models import Funcionario, Cargo, Veiculo, Cliente, Venda, TipoVeiculo
 from app.database import db
+from app.busca import normalizar
+import argparse
 import random
+import sys
+import time
 
 
 def seed_database():
@@ -135,6 +140,197 @@ def seed_database():
         db.add_venda(venda)
 
 
+# Vocabulário do gerador de dados sintéticos
+_NOMES = [
+    "Ana", "Bruno", "Camila", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Larissa", "Marcos", "Natália", "Otávio", "Patrícia", "Rafael", "Sofia", "Thiago", "Vitória", "William",
+]
+_SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+]
+_DDDS = [11, 21, 31, 41, 47, 51, 61, 71, 81, 85]
+
+# Marca -> (modelo, tipo, preço de referência do modelo novo)
+_MODELOS = {
+    "Toyota": [("Corolla", TipoVeiculo.CARRO, 150000), ("Hilux", TipoVeiculo.CAMINHAO, 260000), ("RAV4", TipoVeiculo.SUV, 280000)],
+    "Honda": [("Civic", TipoVeiculo.CARRO, 160000), ("HR-V", TipoVeiculo.SUV, 150000), ("CG 160", TipoVeiculo.MOTO, 16000)],
+    "Volkswagen": [("Gol", TipoVeiculo.CARRO, 70000), ("T-Cross", TipoVeiculo.SUV, 140000), ("Amarok", TipoVeiculo.CAMINHAO, 300000)],
+    "Chevrolet": [("Onix", TipoVeiculo.CARRO, 85000), ("Tracker", TipoVeiculo.SUV, 130000), ("S10", TipoVeiculo.CAMINHAO, 250000)],
+    "Fiat": [("Argo", TipoVeiculo.CARRO, 80000), ("Pulse", TipoVeiculo.SUV, 110000), ("Toro", TipoVeiculo.CAMINHAO, 160000)],
+    "Hyundai": [("HB20", TipoVeiculo.CARRO, 85000), ("Creta", TipoVeiculo.SUV, 130000)],
+    "Yamaha": [("Fazer 250", TipoVeiculo.MOTO, 23000), ("MT-03", TipoVeiculo.MOTO, 35000)],
+    "Jeep": [("Renegade", TipoVeiculo.SUV, 130000), ("Compass", TipoVeiculo.SUV, 190000)],
+    "Iveco": [("Daily", TipoVeiculo.OUTRO, 320000)],
+}
+_CATALOGO = [(marca, modelo, tipo, preco) for marca, modelos in _MODELOS.items() for modelo, tipo, preco in modelos]
+
+# Cargos sorteados para os funcionários, com vendedores em maioria
+_CARGOS = [Cargo.VENDEDOR] * 8 + [Cargo.GERENTE_VENDAS] * 2 + [
+    Cargo.FINANCEIRO, Cargo.ADMINISTRATIVO, Cargo.MECANICO, Cargo.MECANICO,
+    Cargo.RECEPCIONISTA, Cargo.DIRETOR, Cargo.ESTAGIARIO, Cargo.OUTROS,
+]
+_FAIXA_SALARIAL = {
+    Cargo.VENDEDOR: (3000, 9000),
+    Cargo.GERENTE_VENDAS: (9000, 16000),
+    Cargo.FINANCEIRO: (6000, 12000),
+    Cargo.ADMINISTRATIVO: (3500, 7000),
+    Cargo.MECANICO: (3500, 6500),
+    Cargo.RECEPCIONISTA: (2500, 4000),
+    Cargo.DIRETOR: (18000, 35000),
+    Cargo.ESTAGIARIO: (1500, 2500),
+    Cargo.OUTROS: (2000, 5000),
+}
+
+
+def _cpf(numero: int) -> str:
+    """CPF formatado, com dígitos verificadores válidos, derivado de um número de até 9 dígitos"""
+    digitos = [int(d) for d in f"{numero:09d}"]
+    for _ in range(2):
+        soma = sum(d * peso for d, peso in zip(digitos, range(len(digitos) + 1, 1, -1)))
+        digitos.append(0 if soma % 11 < 2 else 11 - soma % 11)
+    texto = "".join(map(str, digitos))
+    return f"{texto[:3]}.{texto[3:6]}.{texto[6:9]}-{texto[9:]}"
+
+
+def _pessoa(aleatorio: random.Random, numero: int, dominio: str):
+    nome = f"{aleatorio.choice(_NOMES)} {aleatorio.choice(_SOBRENOMES)}"
+    # O número do registro no e-mail garante que ele seja único
+    email = f"{normalizar(nome).replace(' ', '.')}.{numero}@{dominio}"
+    telefone = f"({aleatorio.choice(_DDDS)}) 9{aleatorio.randrange(10000):04d}-{aleatorio.randrange(10000):04d}"
+    return nome, email, telefone
+
+
+def _data(aleatorio: random.Random, inicio: date, fim: date) -> date:
+    return inicio + timedelta(days=aleatorio.randrange((fim - inicio).days + 1))
+
+
+def _inserir_em_lotes(adicionar, registros, lote: int) -> List[int]:
+    ids: List[int] = []
+    for inicio in range(0, len(registros), lote):
+        ids.extend(registro.id for registro in adicionar(registros[inicio:inicio + lote]))
+    return ids
+
+
+def gerar_dados_sinteticos(
+    funcionarios: int = 100,
+    veiculos: int = 1000,
+    clientes: int = 500,
+    vendas: int = 500,
+    semente: int = 42,
+    lote: int = 10000,
+    banco=None
+) -> Dict[str, int]:
+    """
+    Popula o banco com dados sintéticos determinísticos, na quantidade pedida
+
+    A mesma semente sempre gera os mesmos registros. E-mails e CPFs são únicos,
+    e cada venda usa um veículo diferente, um cliente existente e um vendedor
+    (ou gerente de vendas, se não houver vendedores), com valor entre o preço
+    do veículo e 12% abaixo dele. Os registros são gravados em lotes, e o
+    banco deve estar vazio para que os e-mails e CPFs não colidam.
+    """
+    if vendas > veiculos:
+        raise ValueError("Cada venda precisa de um veículo diferente: vendas não pode passar de veículos")
+    if vendas and (not clientes or not funcionarios):
+        raise ValueError("Vendas precisam de ao menos um cliente e um funcionário")
+    banco = banco if banco is not None else db
+    aleatorio = random.Random(semente)
+    hoje = date(2025, 6, 30)
+
+    novos_funcionarios = []
+    for numero in range(1, funcionarios + 1):
+        nome, email, telefone = _pessoa(aleatorio, numero, "concessionaria.exemplo.com")
+        cargo = aleatorio.choice(_CARGOS)
+        salario_min, salario_max = _FAIXA_SALARIAL[cargo]
+        novos_funcionarios.append(Funcionario(
+            nome=nome,
+            email=email,
+            telefone=telefone,
+            data_nascimento=_data(aleatorio, date(1960, 1, 1), date(2004, 12, 31)),
+            cargo=cargo,
+            data_contratacao=_data(aleatorio, date(2010, 1, 1), hoje),
+            salario=float(aleatorio.randrange(salario_min, salario_max + 1, 50))
+        ))
+    vendedores = [
+        funcionario_id
+        for funcionario_id, funcionario in zip(_inserir_em_lotes(banco.add_funcionarios, novos_funcionarios, lote), novos_funcionarios)
+        if funcionario.cargo in (Cargo.VENDEDOR, Cargo.GERENTE_VENDAS)
+    ]
+    if vendas and not vendedores:
+        raise ValueError("Nenhum vendedor ou gerente de vendas foi gerado para registrar as vendas")
+    del novos_funcionarios
+
+    novos_veiculos = []
+    for _ in range(veiculos):
+        marca, modelo, tipo, preco = aleatorio.choice(_CATALOGO)
+        ano = aleatorio.randint(2010, 2025)
+        # Cada ano de uso desvaloriza o veículo em cerca de 7%
+        preco = round(preco * 0.93 ** (2025 - ano) * aleatorio.uniform(0.9, 1.1), -2)
+        novos_veiculos.append(Veiculo(marca=marca, modelo=modelo, ano=ano, tipo=tipo, preco=preco))
+    precos = [veiculo.preco for veiculo in novos_veiculos]
+    veiculo_ids = _inserir_em_lotes(banco.add_veiculos, novos_veiculos, lote)
+    del novos_veiculos
+
+    novos_clientes = []
+    for numero in range(1, clientes + 1):
+        nome, email, telefone = _pessoa(aleatorio, numero, "cliente.exemplo.com")
+        novos_clientes.append(Cliente(nome=nome, email=email, telefone=telefone, cpf=_cpf(numero)))
+    cliente_ids = _inserir_em_lotes(banco.add_clientes, novos_clientes, lote)
+    del novos_clientes
+
+    # As vendas são gravadas em ordem cronológica, como aconteceriam de fato
+    datas = sorted(_data(aleatorio, date(2018, 1, 1), hoje) for _ in range(vendas))
+    novas_vendas = []
+    for data_venda, posicao in zip(datas, aleatorio.sample(range(veiculos), vendas)):
+        desconto = 0.0 if aleatorio.random() < 0.3 else aleatorio.uniform(0, 0.12)
+        novas_vendas.append(Venda(
+            veiculo_id=veiculo_ids[posicao],
+            cliente_id=aleatorio.choice(cliente_ids),
+            funcionario_id=aleatorio.choice(vendedores),
+            data_venda=data_venda,
+            valor_venda=round(precos[posicao] * (1 - desconto), 2)
+        ))
+    _inserir_em_lotes(banco.add_vendas, novas_vendas, lote)
+
+    return {"funcionarios": funcionarios, "veiculos": veiculos, "clientes": clientes, "vendas": vendas}
+
+
+def main(argumentos: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Popula o banco configurado (CONCESSIONARIA_BACKEND). Sem quantidades, "
+                    "grava os dados de exemplo; com elas, gera dados sintéticos determinísticos."
+    )
+    parser.add_argument("--funcionarios", type=int)
+    parser.add_argument("--veiculos", type=int)
+    parser.add_argument("--clientes", type=int)
+    parser.add_argument("--vendas", type=int)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--lote", type=int, default=10000, help="registros gravados por vez")
+    args = parser.parse_args(argumentos)
+
+    quantidades = {
+        entidade: getattr(args, entidade)
+        for entidade in ("funcionarios", "veiculos", "clientes", "vendas")
+        if getattr(args, entidade) is not None
+    }
+    try:
+        if not db.esta_vazio():
+            print("O banco já possui dados; use um banco vazio.", file=sys.stderr)
+            return 1
+        if not quantidades:
+            seed_database()
+            return 0
+        inicio = time.perf_counter()
+        gerados = gerar_dados_sinteticos(semente=args.semente, lote=args.lote, **quantidades)
+        resumo = ", ".join(f"{quantidade} {entidade}" for entidade, quantidade in gerados.items())
+        print(f"Gerados {resumo} em {time.perf_counter() - inicio:.1f}s")
+        return 0
+    finally:
+        db.fechar()
+
+
 if __name__ == "__main__":
     # Isso permite executar este arquivo diretamente para popular o banco
-    seed_database() 
+    sys.exit(main())
+
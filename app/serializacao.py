@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Set, Type
+
+import pydantic_core
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adaptador_lista(modelo: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[modelo])
+
+
+def serializar(valor: Any, campos: Optional[Set[str]] = None) -> bytes:
+    """
+    Converte o valor em JSON direto no serializador compilado do pydantic
+
+    Os modelos retornados pelo banco já foram validados na entrada, então não
+    passam pela revalidação do response_model nem pelo jsonable_encoder.
+    Listas de um único modelo usam um TypeAdapter guardado por modelo; campos
+    limita a saída aos campos informados de cada item.
+    """
+    if isinstance(valor, BaseModel):
+        return valor.__pydantic_serializer__.to_json(valor, include=campos)
+    if isinstance(valor, list) and valor and isinstance(valor[0], BaseModel):
+        modelo = type(valor[0])
+        if all(type(item) is modelo for item in valor):
+            return _adaptador_lista(modelo).dump_json(
+                valor, include={"__all__": campos} if campos is not None else None
+            )
+    return pydantic_core.to_json(valor)
+
+
+def resposta_json(valor: Any, campos: Optional[Set[str]] = None, headers: Optional[dict] = None) -> Response:
+    """
+    Resposta JSON serializada por serializar, sem passar pelo response_model da rota
+
+    O response_model continua declarado nas rotas e define o esquema do OpenAPI.
+    """
+    return Response(content=serializar(valor, campos), media_type="application/json", headers=headers)
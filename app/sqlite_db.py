@@ -0,0 +1,1007 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.analise import limites_periodos, resumo_receita, rotulo_periodo, verificar_intervalo
+from app.busca import normalizar
+from app.erros import ErroIntegridade, nao_encontrado
+from app.indices import chave_cpf, chave_email
+from app.metricas import contar_linhas
+from app.models import (
+    Funcionario, EstatisticasCargo, EstatisticasGerais, Veiculo, Cliente, Venda, Cargo, TipoVeiculo, ResumoVendas,
+    RankingVendedor, BuscaVeiculos, ReceitaVendas
+)
+
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS funcionarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL,
+    data_nascimento TEXT,
+    telefone TEXT,
+    cargo TEXT NOT NULL,
+    data_contratacao TEXT NOT NULL,
+    salario REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_funcionarios_cargo ON funcionarios (cargo, salario);
+CREATE INDEX IF NOT EXISTS idx_funcionarios_salario ON funcionarios (salario);
+CREATE INDEX IF NOT EXISTS idx_funcionarios_data_contratacao ON funcionarios (data_contratacao);
+CREATE INDEX IF NOT EXISTS idx_funcionarios_chave_email ON funcionarios (chave_email(email));
+
+CREATE TABLE IF NOT EXISTS veiculos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    marca TEXT NOT NULL,
+    modelo TEXT NOT NULL,
+    ano INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    preco REAL NOT NULL,
+    disponivel INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_veiculos_tipo ON veiculos (tipo);
+CREATE INDEX IF NOT EXISTS idx_veiculos_ano ON veiculos (ano);
+CREATE INDEX IF NOT EXISTS idx_veiculos_preco ON veiculos (preco);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL,
+    telefone TEXT,
+    cpf TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_clientes_chave_email ON clientes (chave_email(email));
+CREATE INDEX IF NOT EXISTS idx_clientes_chave_cpf ON clientes (chave_cpf(cpf));
+
+CREATE TABLE IF NOT EXISTS vendas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    veiculo_id INTEGER NOT NULL,
+    cliente_id INTEGER NOT NULL,
+    funcionario_id INTEGER NOT NULL,
+    data_venda TEXT NOT NULL,
+    valor_venda REAL NOT NULL,
+    preco_tabela REAL
+);
+CREATE INDEX IF NOT EXISTS idx_vendas_veiculo_id ON vendas (veiculo_id);
+CREATE INDEX IF NOT EXISTS idx_vendas_cliente_id ON vendas (cliente_id);
+CREATE INDEX IF NOT EXISTS idx_vendas_funcionario_id ON vendas (funcionario_id);
+CREATE INDEX IF NOT EXISTS idx_vendas_data_venda ON vendas (data_venda);
+
+-- Preço do veículo quando a venda é registrada ou alterada, base do desconto no ranking (como nos demais backends)
+CREATE TRIGGER IF NOT EXISTS vendas_preco_tabela_insert AFTER INSERT ON vendas
+BEGIN UPDATE vendas SET preco_tabela = (SELECT preco FROM veiculos WHERE id = NEW.veiculo_id) WHERE id = NEW.id; END;
+CREATE TRIGGER IF NOT EXISTS vendas_preco_tabela_update
+AFTER UPDATE OF veiculo_id, cliente_id, funcionario_id, data_venda, valor_venda ON vendas
+BEGIN UPDATE vendas SET preco_tabela = (SELECT preco FROM veiculos WHERE id = NEW.veiculo_id) WHERE id = NEW.id; END;
+
+CREATE TABLE IF NOT EXISTS versoes (
+    colecao TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versoes (colecao, versao) VALUES ('instancia', abs(random()));
+"""
+
+# Cada alteração em uma tabela incrementa a versão da coleção, inclusive as feitas por outros processos
+for _colecao in ("funcionarios", "veiculos", "clientes", "vendas"):
+    _ESQUEMA += f"INSERT OR IGNORE INTO versoes (colecao, versao) VALUES ('{_colecao}', 0);\n"
+    for _evento in ("INSERT", "UPDATE", "DELETE"):
+        _ESQUEMA += (
+            f"CREATE TRIGGER IF NOT EXISTS versao_{_colecao}_{_evento.lower()} AFTER {_evento} ON {_colecao} "
+            f"BEGIN UPDATE versoes SET versao = versao + 1 WHERE colecao = '{_colecao}'; END;\n"
+        )
+del _colecao, _evento
+
+
+# Expressões das chaves únicas, idênticas às dos índices do esquema para que eles sejam usados
+_CHAVE_EMAIL = "chave_email(email)"
+_CHAVE_CPF = "chave_cpf(cpf)"
+
+# Verifica um registro dentro da transação: (conexão, registro, ID em atualização, chaves já usadas no lote)
+Conflito = Callable[[sqlite3.Connection, BaseModel, Optional[int], Set[str]], Optional[str]]
+
+
+def _condicoes(criterios: Sequence[Tuple[str, Any]]) -> Tuple[str, List[Any]]:
+    """
+    Monta a cláusula WHERE apenas com os critérios informados, para que o SQLite possa usar os índices
+    """
+    usados = [(condicao, valor) for condicao, valor in criterios if valor is not None]
+    if not usados:
+        return "", []
+    return " WHERE " + " AND ".join(condicao for condicao, _ in usados), [valor for _, valor in usados]
+
+
+def _data(valor: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(valor) if valor is not None else None
+
+
+def _texto_data(valor: Optional[date]) -> Optional[str]:
+    return valor.isoformat() if valor is not None else None
+
+
+def _id(registro: BaseModel) -> int:
+    return registro.id
+
+
+class _Tabela:
+    """
+    Descreve como um modelo é gravado em uma tabela do SQLite
+
+    Os comandos SQL são montados uma única vez e reaproveitados, de modo que o
+    cache de comandos preparados de cada conexão sempre os encontre.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        modelo: Type[BaseModel],
+        para_sqlite: Dict[str, Callable[[Any], Any]],
+        de_sqlite: Dict[str, Callable[[Any], Any]]
+    ):
+        self.nome = nome
+        self.modelo = modelo
+        self.campos = [campo for campo in modelo.model_fields if campo != "id"]
+        self._para_sqlite = para_sqlite
+        self._de_sqlite = de_sqlite
+
+        colunas = ", ".join(self.campos)
+        self.sql_selecionar = f"SELECT id, {colunas} FROM {nome}"
+        self.sql_por_id = f"{self.sql_selecionar} WHERE id = ?"
+        self.sql_pagina = f"{self.sql_selecionar} WHERE id > ? ORDER BY id LIMIT ?"
+        self.sql_todos = f"{self.sql_selecionar} ORDER BY id"
+        self.sql_inserir = f"INSERT INTO {nome} ({colunas}) VALUES ({', '.join('?' for _ in self.campos)})"
+        self.sql_inserir_com_id = (
+            f"INSERT INTO {nome} (id, {colunas}) VALUES (?, {', '.join('?' for _ in self.campos)})"
+        )
+        self.sql_atualizar = f"UPDATE {nome} SET {', '.join(f'{c} = ?' for c in self.campos)} WHERE id = ?"
+        self.sql_remover = f"DELETE FROM {nome} WHERE id = ?"
+
+    def parametros(self, registro: BaseModel) -> List[Any]:
+        return [
+            self._para_sqlite.get(campo, lambda valor: valor)(getattr(registro, campo))
+            for campo in self.campos
+        ]
+
+    def registro(self, linha: Sequence[Any]) -> BaseModel:
+        valores = {"id": linha[0]}
+        for campo, valor in zip(self.campos, linha[1:]):
+            conversor = self._de_sqlite.get(campo)
+            valores[campo] = conversor(valor) if conversor is not None and valor is not None else valor
+        return self.modelo.model_construct(**valores)
+
+
+# Expressão de agrupamento de cada dimensão da análise de vendas
+_DIMENSOES_VENDAS = {
+    "mes": "substr(vd.data_venda, 1, 7)",
+    "vendedor": "CAST(vd.funcionario_id AS TEXT)",
+    "tipo": "COALESCE(v.tipo, 'Desconhecido')",
+    "marca": "COALESCE(v.marca, 'Desconhecido')",
+    "total": "'total'",
+}
+
+# Rótulo do período de cada granularidade da receita, no mesmo formato de analise.rotulo_periodo
+_PERIODOS_RECEITA = {
+    "dia": "data_venda",
+    "mes": "substr(data_venda, 1, 7)",
+    "ano": "substr(data_venda, 1, 4)",
+}
+
+
+_FUNCIONARIOS = _Tabela(
+    "funcionarios", Funcionario,
+    para_sqlite={
+        "data_nascimento": _texto_data,
+        "data_contratacao": _texto_data,
+        "cargo": lambda cargo: Cargo(cargo).value,
+    },
+    de_sqlite={"data_nascimento": _data, "data_contratacao": _data, "cargo": Cargo},
+)
+_VEICULOS = _Tabela(
+    "veiculos", Veiculo,
+    para_sqlite={"tipo": lambda tipo: TipoVeiculo(tipo).value, "disponivel": int},
+    de_sqlite={"tipo": TipoVeiculo, "disponivel": bool},
+)
+_CLIENTES = _Tabela("clientes", Cliente, para_sqlite={}, de_sqlite={})
+_VENDAS = _Tabela(
+    "vendas", Venda,
+    para_sqlite={"data_venda": _texto_data},
+    de_sqlite={"data_venda": _data},
+)
+
+
+class DatabaseSQLite:
+    """
+    Implementação do Database sobre um arquivo SQLite
+
+    Permite que vários processos (workers do uvicorn) compartilhem os mesmos
+    dados. O arquivo usa journal em modo WAL, para que leituras não bloqueiem
+    a escrita, e cada thread mantém a sua própria conexão.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._local = threading.local()
+        self._conexoes: List[sqlite3.Connection] = []
+        self._trava_conexoes = threading.Lock()
+        self._migrar()
+        self._conexao().executescript(_ESQUEMA)
+
+    # Conexões
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(
+                self.caminho,
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256
+            )
+            conexao.execute("PRAGMA journal_mode = WAL")
+            conexao.execute("PRAGMA synchronous = NORMAL")
+            conexao.execute("PRAGMA foreign_keys = OFF")
+            # Comparação de marca e modelo sem acentos nem maiúsculas, igual à do backend em memória
+            conexao.create_function("normalizar", 1, normalizar, deterministic=True)
+            # E-mail e CPF com as mesmas chaves únicas do backend em memória (lower() e trim() do SQLite só tratam ASCII)
+            conexao.create_function("chave_email", 1, chave_email, deterministic=True)
+            conexao.create_function("chave_cpf", 1, chave_cpf, deterministic=True)
+            self._local.conexao = conexao
+            with self._trava_conexoes:
+                self._conexoes.append(conexao)
+        return conexao
+
+    def _migrar(self) -> None:
+        """
+        Atualiza arquivos criados por versões anteriores do esquema
+
+        Acrescenta a coluna preco_tabela, e as vendas existentes recebem o preço
+        atual do veículo, o único conhecido. Troca também os índices de CPF (que
+        só removia a pontuação) e de e-mail (lower e trim do SQLite, que só
+        tratam ASCII) pelos de chave_cpf e chave_email, criados pelo esquema.
+        """
+        with self._transacao() as conexao:
+            colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(vendas)")}
+            if colunas and "preco_tabela" not in colunas:
+                conexao.execute("ALTER TABLE vendas ADD COLUMN preco_tabela REAL")
+                conexao.execute("UPDATE vendas SET preco_tabela = (SELECT preco FROM veiculos WHERE id = vendas.veiculo_id)")
+            for indice in ("idx_clientes_cpf", "idx_funcionarios_email", "idx_clientes_email"):
+                conexao.execute(f"DROP INDEX IF EXISTS {indice}")
+
+    @contextmanager
+    def _transacao(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE reserva a escrita logo no início, evitando deadlocks entre processos
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            yield conexao
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        conexao.execute("COMMIT")
+
+    def _consultar(self, tabela: _Tabela, sql: str, parametros: Sequence[Any] = ()) -> List[BaseModel]:
+        # O SQLite não informa quantas linhas percorreu, então são contadas as que ele devolve
+        registros = [tabela.registro(linha) for linha in self._conexao().execute(sql, parametros)]
+        contar_linhas(len(registros))
+        return registros
+
+    # Operações genéricas
+
+    def _obter(self, tabela: _Tabela, registro_id: int) -> Optional[BaseModel]:
+        linha = self._conexao().execute(tabela.sql_por_id, (registro_id,)).fetchone()
+        if linha is None:
+            return None
+        contar_linhas(1)
+        return tabela.registro(linha)
+
+    def _pagina(self, tabela: _Tabela, apos_id: Optional[int], limite: Optional[int]) -> List[BaseModel]:
+        return self._consultar(tabela, tabela.sql_pagina, (apos_id or 0, -1 if limite is None else limite))
+
+    def _iterar(self, tabela: _Tabela, apos_id: Optional[int], ate_id: Optional[int], lote: int = 1000) -> Iterator[BaseModel]:
+        # Cada página é uma consulta independente, então a iteração pode mudar de thread
+        while True:
+            pagina = self._pagina(tabela, apos_id, lote)
+            for registro in pagina:
+                if ate_id is not None and registro.id > ate_id:
+                    return
+                yield registro
+            if len(pagina) < lote:
+                return
+            apos_id = pagina[-1].id
+
+    def _inserir(self, tabela: _Tabela, registro: BaseModel, conflito: Optional[Conflito] = None) -> BaseModel:
+        with self._transacao() as conexao:
+            motivo = conflito(conexao, registro, None, set()) if conflito is not None else None
+            if motivo is not None:
+                raise ErroIntegridade(motivo)
+            registro.id = conexao.execute(tabela.sql_inserir, tabela.parametros(registro)).lastrowid
+        return registro
+
+    def _inserir_lote(
+        self,
+        tabela: _Tabela,
+        registros: List[BaseModel],
+        conflito: Optional[Conflito] = None
+    ) -> List[BaseModel]:
+        if not registros:
+            return registros
+        with self._transacao() as conexao:
+            if conflito is not None:
+                reservados: Set[str] = set()
+                erros = {
+                    posicao: motivo for posicao, motivo in (
+                        (posicao, conflito(conexao, registro, None, reservados))
+                        for posicao, registro in enumerate(registros)
+                    )
+                    if motivo is not None
+                }
+                if erros:
+                    raise ErroIntegridade(f"Registros inválidos no lote de {tabela.nome}", erros)
+            self._gravar_lote(conexao, tabela, registros)
+        return registros
+
+    def _gravar_lote(self, conexao: sqlite3.Connection, tabela: _Tabela, registros: List[BaseModel]) -> None:
+        # A transação exclusiva garante que o bloco de IDs reservado seja contíguo
+        linha = conexao.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela.nome,)).fetchone()
+        inicio = (linha[0] if linha else 0) + 1
+        for registro_id, registro in enumerate(registros, start=inicio):
+            registro.id = registro_id
+        conexao.executemany(
+            tabela.sql_inserir_com_id,
+            ([registro.id] + tabela.parametros(registro) for registro in registros)
+        )
+
+    def _atualizar(
+        self,
+        conexao: sqlite3.Connection,
+        tabela: _Tabela,
+        registro_id: int,
+        registro: BaseModel,
+        conflito: Optional[Conflito] = None
+    ) -> Optional[BaseModel]:
+        alterados = conexao.execute(tabela.sql_atualizar, tabela.parametros(registro) + [registro_id]).rowcount
+        # A verificação ignora o próprio registro; se falhar, quem chamou desfaz a atualização
+        motivo = conflito(conexao, registro, registro_id, set()) if alterados and conflito is not None else None
+        if motivo is not None:
+            raise ErroIntegridade(motivo)
+        if not alterados:
+            return None
+        registro.id = registro_id
+        return registro
+
+    def _remover(
+        self,
+        conexao: sqlite3.Connection,
+        tabela: _Tabela,
+        registro_id: int,
+        coluna_vendas: Optional[str] = None,
+        descricao: str = ""
+    ) -> bool:
+        # Registros referenciados por vendas não podem ser removidos
+        if coluna_vendas is not None and conexao.execute(
+            f"SELECT EXISTS (SELECT 1 FROM vendas WHERE {coluna_vendas} = ?)", (registro_id,)
+        ).fetchone()[0]:
+            raise ErroIntegridade(f"{descricao} com ID {registro_id} possui vendas registradas e não pode ser removido")
+        return conexao.execute(tabela.sql_remover, (registro_id,)).rowcount > 0
+
+    def _em_transacao(self, operacao: Callable[..., Any], *args: Any) -> Any:
+        with self._transacao() as conexao:
+            return operacao(conexao, *args)
+
+    def _em_lote(
+        self,
+        itens: List[Any],
+        operacao: Callable[[sqlite3.Connection, Any], Any],
+        registro_id: Callable[[Any], int]
+    ) -> Dict[int, str]:
+        """
+        Aplica a operação a cada item em uma única transação e retorna os erros por posição
+
+        Cada item tem o seu savepoint: um item rejeitado é desfeito sozinho e
+        não impede os demais. Um resultado vazio (None ou False) indica que o
+        registro não existe.
+        """
+        erros: Dict[int, str] = {}
+        if not itens:
+            return erros
+        with self._transacao() as conexao:
+            for posicao, item in enumerate(itens):
+                conexao.execute("SAVEPOINT item")
+                try:
+                    resultado = operacao(conexao, item)
+                except ErroIntegridade as erro:
+                    conexao.execute("ROLLBACK TO item")
+                    erros[posicao] = str(erro)
+                    resultado = True
+                conexao.execute("RELEASE item")
+                if not resultado:
+                    erros[posicao] = nao_encontrado(registro_id(item))
+        return erros
+
+    # Unicidade de e-mail e CPF
+
+    @staticmethod
+    def _chave_em_uso(conexao: sqlite3.Connection, tabela: str, expressao: str, chave: str, registro_id: Optional[int]) -> bool:
+        return conexao.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {tabela} WHERE {expressao} = ? AND id IS NOT ?)", (chave, registro_id)
+        ).fetchone()[0]
+
+    def _conflito_funcionario(
+        self,
+        conexao: sqlite3.Connection,
+        funcionario: Funcionario,
+        funcionario_id: Optional[int],
+        reservados: Set[str]
+    ) -> Optional[str]:
+        email = chave_email(funcionario.email)
+        if email in reservados or self._chave_em_uso(conexao, "funcionarios", _CHAVE_EMAIL, email, funcionario_id):
+            return f"Já existe um funcionário com o e-mail {funcionario.email}"
+        reservados.add(email)
+        return None
+
+    def _conflito_cliente(
+        self,
+        conexao: sqlite3.Connection,
+        cliente: Cliente,
+        cliente_id: Optional[int],
+        reservados: Set[str]
+    ) -> Optional[str]:
+        cpf = chave_cpf(cliente.cpf)
+        if f"cpf:{cpf}" in reservados or self._chave_em_uso(conexao, "clientes", _CHAVE_CPF, cpf, cliente_id):
+            return f"Já existe um cliente com o CPF {cliente.cpf}"
+        email = chave_email(cliente.email)
+        if f"email:{email}" in reservados or self._chave_em_uso(conexao, "clientes", _CHAVE_EMAIL, email, cliente_id):
+            return f"Já existe um cliente com o e-mail {cliente.email}"
+        reservados.update((f"cpf:{cpf}", f"email:{email}"))
+        return None
+
+    # Integridade referencial das vendas
+
+    def _conflito_venda(
+        self,
+        conexao: sqlite3.Connection,
+        venda: Venda,
+        veiculo_anterior: Optional[int] = None,
+        reservados: Collection[int] = ()
+    ) -> Optional[str]:
+        """
+        Motivo pelo qual a venda não pode ser registrada, ou None se ela é válida
+        """
+        if not conexao.execute("SELECT EXISTS (SELECT 1 FROM clientes WHERE id = ?)", (venda.cliente_id,)).fetchone()[0]:
+            return f"Cliente com ID {venda.cliente_id} não encontrado"
+        if not conexao.execute(
+            "SELECT EXISTS (SELECT 1 FROM funcionarios WHERE id = ?)", (venda.funcionario_id,)
+        ).fetchone()[0]:
+            return f"Funcionário com ID {venda.funcionario_id} não encontrado"
+        linha = conexao.execute("SELECT disponivel FROM veiculos WHERE id = ?", (venda.veiculo_id,)).fetchone()
+        if linha is None:
+            return f"Veículo com ID {venda.veiculo_id} não encontrado"
+        if venda.veiculo_id != veiculo_anterior and (not linha[0] or venda.veiculo_id in reservados):
+            return f"Veículo com ID {venda.veiculo_id} não está disponível para venda"
+        return None
+
+    def _liberar_veiculo(self, conexao: sqlite3.Connection, veiculo_id: int) -> None:
+        conexao.execute(
+            "UPDATE veiculos SET disponivel = 1 WHERE id = ? AND NOT EXISTS (SELECT 1 FROM vendas WHERE veiculo_id = ?)",
+            (veiculo_id, veiculo_id)
+        )
+
+    def esta_vazio(self) -> bool:
+        conexao = self._conexao()
+        return not any(
+            conexao.execute(f"SELECT EXISTS (SELECT 1 FROM {tabela.nome})").fetchone()[0]
+            for tabela in (_FUNCIONARIOS, _VEICULOS, _CLIENTES, _VENDAS)
+        )
+
+    def versao_colecoes(self, *colecoes: str) -> str:
+        """
+        Identifica o estado atual das coleções: muda a cada alteração em qualquer uma delas
+        """
+        versoes = dict(self._conexao().execute("SELECT colecao, versao FROM versoes").fetchall())
+        return "-".join(str(versoes[colecao]) for colecao in ("instancia", *colecoes))
+
+    def fechar(self) -> None:
+        with self._trava_conexoes:
+            for conexao in self._conexoes:
+                conexao.close()
+            self._conexoes.clear()
+        self._local = threading.local()
+
+    def bloqueante(self, operacao: str) -> bool:
+        """
+        Toda consulta ao SQLite pode esperar por disco ou pela trava do arquivo
+        """
+        return True
+
+    # Funcionários
+
+    def get_all_funcionarios(self) -> List[Funcionario]:
+        return self._consultar(_FUNCIONARIOS, _FUNCIONARIOS.sql_todos)
+
+    def get_funcionario_by_id(self, funcionario_id: int) -> Optional[Funcionario]:
+        return self._obter(_FUNCIONARIOS, funcionario_id)
+
+    def get_funcionario_by_email(self, email: str) -> Optional[Funcionario]:
+        encontrados = self._consultar(
+            _FUNCIONARIOS, f"{_FUNCIONARIOS.sql_selecionar} WHERE {_CHAVE_EMAIL} = ? ORDER BY id LIMIT 1", (chave_email(email),)
+        )
+        return encontrados[0] if encontrados else None
+
+    def add_funcionario(self, funcionario: Funcionario) -> Funcionario:
+        return self._inserir(_FUNCIONARIOS, funcionario, self._conflito_funcionario)
+
+    def add_funcionarios(self, funcionarios: List[Funcionario]) -> List[Funcionario]:
+        return self._inserir_lote(_FUNCIONARIOS, funcionarios, self._conflito_funcionario)
+
+    def _atualizar_funcionario(self, conexao: sqlite3.Connection, funcionario_id: int, funcionario: Funcionario) -> Optional[Funcionario]:
+        return self._atualizar(conexao, _FUNCIONARIOS, funcionario_id, funcionario, self._conflito_funcionario)
+
+    def _remover_funcionario(self, conexao: sqlite3.Connection, funcionario_id: int) -> bool:
+        return self._remover(conexao, _FUNCIONARIOS, funcionario_id, "funcionario_id", "Funcionário")
+
+    def update_funcionario(self, funcionario_id: int, updated_funcionario: Funcionario) -> Optional[Funcionario]:
+        return self._em_transacao(self._atualizar_funcionario, funcionario_id, updated_funcionario)
+
+    def update_funcionarios(self, funcionarios: List[Funcionario]) -> Dict[int, str]:
+        return self._em_lote(
+            funcionarios, lambda conexao, funcionario: self._atualizar_funcionario(conexao, funcionario.id, funcionario), _id
+        )
+
+    def delete_funcionario(self, funcionario_id: int) -> bool:
+        return self._em_transacao(self._remover_funcionario, funcionario_id)
+
+    def delete_funcionarios(self, funcionario_ids: List[int]) -> Dict[int, str]:
+        return self._em_lote(funcionario_ids, self._remover_funcionario, int)
+
+    def filtrar_por_salario(self, salario_min: Optional[float] = None, salario_max: Optional[float] = None) -> List[Funcionario]:
+        """
+        Filtra funcionários por faixa salarial, ordenados pelo salário
+        """
+        where, parametros = _condicoes((("salario >= ?", salario_min), ("salario <= ?", salario_max)))
+        return self._consultar(
+            _FUNCIONARIOS, f"{_FUNCIONARIOS.sql_selecionar}{where} ORDER BY salario, id", parametros
+        )
+
+    def filtrar_por_data_contratacao(self, data_inicial: Optional[date] = None, data_final: Optional[date] = None) -> List[Funcionario]:
+        """
+        Filtra funcionários por período de contratação, ordenados pela data
+        """
+        where, parametros = _condicoes((
+            ("data_contratacao >= ?", _texto_data(data_inicial)),
+            ("data_contratacao <= ?", _texto_data(data_final)),
+        ))
+        return self._consultar(
+            _FUNCIONARIOS, f"{_FUNCIONARIOS.sql_selecionar}{where} ORDER BY data_contratacao, id", parametros
+        )
+
+    def filtrar_por_cargo(self, cargo: str) -> List[Funcionario]:
+        """
+        Filtra funcionários por cargo
+        """
+        return self._consultar(_FUNCIONARIOS, f"{_FUNCIONARIOS.sql_selecionar} WHERE cargo = ? ORDER BY id", (cargo,))
+
+    def consultar_funcionarios(
+        self,
+        cargo: Optional[str] = None,
+        salario_min: Optional[float] = None,
+        salario_max: Optional[float] = None,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None,
+        apos_id: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> List[Funcionario]:
+        """
+        Filtra funcionários combinando todos os critérios em uma única consulta
+
+        A escolha do índice mais seletivo fica a cargo do planejador do SQLite.
+        """
+        where, parametros = _condicoes((
+            ("id > ?", apos_id),
+            ("cargo = ?", cargo),
+            ("salario >= ?", salario_min),
+            ("salario <= ?", salario_max),
+            ("data_contratacao >= ?", _texto_data(data_inicial)),
+            ("data_contratacao <= ?", _texto_data(data_final)),
+        ))
+        return self._consultar(
+            _FUNCIONARIOS,
+            f"{_FUNCIONARIOS.sql_selecionar}{where} ORDER BY id LIMIT ?",
+            parametros + [-1 if limite is None else limite]
+        )
+
+    def calcular_estatisticas(self) -> EstatisticasGerais:
+        """
+        Calcula estatísticas gerais e por cargo dos funcionários
+        """
+        linhas = self._conexao().execute(
+            "SELECT cargo, COUNT(*), SUM(salario), MIN(salario), MAX(salario) "
+            "FROM funcionarios GROUP BY cargo ORDER BY MIN(id)"
+        ).fetchall()
+        estatisticas_por_cargo = [
+            EstatisticasCargo(
+                cargo=cargo,
+                quantidade=quantidade,
+                salario_total=total,
+                salario_medio=total / quantidade,
+                salario_minimo=minimo,
+                salario_maximo=maximo
+            )
+            for cargo, quantidade, total, minimo, maximo in linhas
+        ]
+        total_funcionarios = sum(e.quantidade for e in estatisticas_por_cargo)
+        contar_linhas(total_funcionarios)
+        total_salarios = sum(e.salario_total for e in estatisticas_por_cargo)
+        return EstatisticasGerais(
+            total_funcionarios=total_funcionarios,
+            total_salarios=total_salarios,
+            salario_medio=total_salarios / total_funcionarios if total_funcionarios > 0 else 0,
+            estatisticas_por_cargo=estatisticas_por_cargo
+        )
+
+    # Veículos
+
+    def get_all_veiculos(self) -> List[Veiculo]:
+        return self._consultar(_VEICULOS, _VEICULOS.sql_todos)
+
+    def listar_veiculos(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Veiculo]:
+        return self._pagina(_VEICULOS, apos_id, limite)
+
+    def exportar_veiculos(self, id_inicial: Optional[int] = None, id_final: Optional[int] = None) -> Iterator[Veiculo]:
+        return self._iterar(_VEICULOS, None if id_inicial is None else id_inicial - 1, id_final)
+
+    def buscar_veiculos(
+        self,
+        marca: Optional[str] = None,
+        modelo: Optional[str] = None,
+        tipo: Optional[TipoVeiculo] = None,
+        ano_min: Optional[int] = None,
+        ano_max: Optional[int] = None,
+        preco_min: Optional[float] = None,
+        preco_max: Optional[float] = None,
+        disponivel: Optional[bool] = None,
+        apos_id: Optional[int] = None,
+        limite: Optional[int] = None
+    ) -> BuscaVeiculos:
+        """
+        Busca no estoque com facetas por marca e tipo
+        """
+        prefixo = normalizar(modelo).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") if modelo else None
+        where, parametros = _condicoes((
+            ("normalizar(marca) = ?", normalizar(marca) if marca is not None else None),
+            ("tipo = ?", TipoVeiculo(tipo).value if tipo is not None else None),
+            ("ano >= ?", ano_min),
+            ("ano <= ?", ano_max),
+            ("preco >= ?", preco_min),
+            ("preco <= ?", preco_max),
+            ("disponivel = ?", int(disponivel) if disponivel is not None else None),
+            # O modelo casa pelo início de qualquer palavra
+            ("(' ' || normalizar(modelo)) LIKE ? ESCAPE '\\'", f"% {prefixo}%" if prefixo else None),
+        ))
+        conexao = self._conexao()
+        total = conexao.execute(f"SELECT COUNT(*) FROM veiculos{where}", parametros).fetchone()[0]
+        contar_linhas(total)
+        facetas_marca = dict(conexao.execute(
+            f"SELECT MIN(marca), COUNT(*) FROM veiculos{where} GROUP BY normalizar(marca) "
+            "ORDER BY COUNT(*) DESC, normalizar(marca)",
+            parametros
+        ).fetchall())
+        facetas_tipo = dict(conexao.execute(
+            f"SELECT tipo, COUNT(*) FROM veiculos{where} GROUP BY tipo ORDER BY COUNT(*) DESC, tipo",
+            parametros
+        ).fetchall())
+        pagina = " AND id > ?" if where else " WHERE id > ?"
+        itens = self._consultar(
+            _VEICULOS,
+            f"{_VEICULOS.sql_selecionar}{where}{pagina} ORDER BY id LIMIT ?",
+            parametros + [apos_id or 0, -1 if limite is None else limite]
+        )
+        return BuscaVeiculos(total=total, itens=itens, facetas_marca=facetas_marca, facetas_tipo=facetas_tipo)
+
+    def get_veiculo_by_id(self, veiculo_id: int) -> Optional[Veiculo]:
+        return self._obter(_VEICULOS, veiculo_id)
+
+    def add_veiculo(self, veiculo: Veiculo) -> Veiculo:
+        return self._inserir(_VEICULOS, veiculo)
+
+    def add_veiculos(self, veiculos: List[Veiculo]) -> List[Veiculo]:
+        return self._inserir_lote(_VEICULOS, veiculos)
+
+    def _atualizar_veiculo(self, conexao: sqlite3.Connection, veiculo_id: int, updated_veiculo: Veiculo) -> Optional[Veiculo]:
+        # Um veículo com venda registrada nunca volta a ficar disponível
+        if updated_veiculo.disponivel and conexao.execute(
+            "SELECT EXISTS (SELECT 1 FROM vendas WHERE veiculo_id = ?)", (veiculo_id,)
+        ).fetchone()[0]:
+            updated_veiculo = updated_veiculo.model_copy(update={"disponivel": False})
+        return self._atualizar(conexao, _VEICULOS, veiculo_id, updated_veiculo)
+
+    def _remover_veiculo(self, conexao: sqlite3.Connection, veiculo_id: int) -> bool:
+        return self._remover(conexao, _VEICULOS, veiculo_id, "veiculo_id", "Veículo")
+
+    def update_veiculo(self, veiculo_id: int, updated_veiculo: Veiculo) -> Optional[Veiculo]:
+        return self._em_transacao(self._atualizar_veiculo, veiculo_id, updated_veiculo)
+
+    def update_veiculos(self, veiculos: List[Veiculo]) -> Dict[int, str]:
+        return self._em_lote(veiculos, lambda conexao, veiculo: self._atualizar_veiculo(conexao, veiculo.id, veiculo), _id)
+
+    def delete_veiculo(self, veiculo_id: int) -> bool:
+        return self._em_transacao(self._remover_veiculo, veiculo_id)
+
+    def delete_veiculos(self, veiculo_ids: List[int]) -> Dict[int, str]:
+        return self._em_lote(veiculo_ids, self._remover_veiculo, int)
+
+    # Clientes
+
+    def get_all_clientes(self) -> List[Cliente]:
+        return self._consultar(_CLIENTES, _CLIENTES.sql_todos)
+
+    def listar_clientes(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Cliente]:
+        return self._pagina(_CLIENTES, apos_id, limite)
+
+    def exportar_clientes(self, id_inicial: Optional[int] = None, id_final: Optional[int] = None) -> Iterator[Cliente]:
+        return self._iterar(_CLIENTES, None if id_inicial is None else id_inicial - 1, id_final)
+
+    def get_cliente_by_id(self, cliente_id: int) -> Optional[Cliente]:
+        return self._obter(_CLIENTES, cliente_id)
+
+    def get_cliente_by_cpf(self, cpf: str) -> Optional[Cliente]:
+        encontrados = self._consultar(
+            _CLIENTES, f"{_CLIENTES.sql_selecionar} WHERE {_CHAVE_CPF} = ? ORDER BY id LIMIT 1", (chave_cpf(cpf),)
+        )
+        return encontrados[0] if encontrados else None
+
+    def get_cliente_by_email(self, email: str) -> Optional[Cliente]:
+        encontrados = self._consultar(
+            _CLIENTES, f"{_CLIENTES.sql_selecionar} WHERE {_CHAVE_EMAIL} = ? ORDER BY id LIMIT 1", (chave_email(email),)
+        )
+        return encontrados[0] if encontrados else None
+
+    def add_cliente(self, cliente: Cliente) -> Cliente:
+        return self._inserir(_CLIENTES, cliente, self._conflito_cliente)
+
+    def add_clientes(self, clientes: List[Cliente]) -> List[Cliente]:
+        return self._inserir_lote(_CLIENTES, clientes, self._conflito_cliente)
+
+    def _atualizar_cliente(self, conexao: sqlite3.Connection, cliente_id: int, cliente: Cliente) -> Optional[Cliente]:
+        return self._atualizar(conexao, _CLIENTES, cliente_id, cliente, self._conflito_cliente)
+
+    def _remover_cliente(self, conexao: sqlite3.Connection, cliente_id: int) -> bool:
+        return self._remover(conexao, _CLIENTES, cliente_id, "cliente_id", "Cliente")
+
+    def update_cliente(self, cliente_id: int, updated_cliente: Cliente) -> Optional[Cliente]:
+        return self._em_transacao(self._atualizar_cliente, cliente_id, updated_cliente)
+
+    def update_clientes(self, clientes: List[Cliente]) -> Dict[int, str]:
+        return self._em_lote(clientes, lambda conexao, cliente: self._atualizar_cliente(conexao, cliente.id, cliente), _id)
+
+    def delete_cliente(self, cliente_id: int) -> bool:
+        return self._em_transacao(self._remover_cliente, cliente_id)
+
+    def delete_clientes(self, cliente_ids: List[int]) -> Dict[int, str]:
+        return self._em_lote(cliente_ids, self._remover_cliente, int)
+
+    # Vendas
+
+    def get_all_vendas(self) -> List[Venda]:
+        return self._consultar(_VENDAS, _VENDAS.sql_todos)
+
+    def listar_vendas(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[Venda]:
+        return self._pagina(_VENDAS, apos_id, limite)
+
+    def exportar_vendas(
+        self,
+        id_inicial: Optional[int] = None,
+        id_final: Optional[int] = None,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> Iterator[Venda]:
+        """
+        Percorre as vendas em ordem de ID, filtrando por faixa de ID e período
+        """
+        apos_id = None if id_inicial is None else id_inicial - 1
+        for venda in self._iterar(_VENDAS, apos_id, id_final):
+            if data_inicial is not None and venda.data_venda < data_inicial:
+                continue
+            if data_final is not None and venda.data_venda > data_final:
+                continue
+            yield venda
+
+    def get_venda_by_id(self, venda_id: int) -> Optional[Venda]:
+        return self._obter(_VENDAS, venda_id)
+
+    def add_venda(self, venda: Venda) -> Venda:
+        """
+        Registra a venda e marca o veículo como indisponível na mesma transação
+        """
+        with self._transacao() as conexao:
+            conflito = self._conflito_venda(conexao, venda)
+            if conflito is not None:
+                raise ErroIntegridade(conflito)
+            venda.id = conexao.execute(_VENDAS.sql_inserir, _VENDAS.parametros(venda)).lastrowid
+            conexao.execute("UPDATE veiculos SET disponivel = 0 WHERE id = ?", (venda.veiculo_id,))
+        return venda
+
+    def add_vendas(self, vendas: List[Venda]) -> List[Venda]:
+        if not vendas:
+            return vendas
+        with self._transacao() as conexao:
+            erros: Dict[int, str] = {}
+            reservados = set()
+            for posicao, venda in enumerate(vendas):
+                conflito = self._conflito_venda(conexao, venda, reservados=reservados)
+                if conflito is not None:
+                    erros[posicao] = conflito
+                else:
+                    reservados.add(venda.veiculo_id)
+            if erros:
+                raise ErroIntegridade("Vendas inválidas no lote", erros)
+            self._gravar_lote(conexao, _VENDAS, vendas)
+            conexao.executemany(
+                "UPDATE veiculos SET disponivel = 0 WHERE id = ?", ((venda.veiculo_id,) for venda in vendas)
+            )
+        return vendas
+
+    def _atualizar_venda(self, conexao: sqlite3.Connection, venda_id: int, updated_venda: Venda) -> Optional[Venda]:
+        linha = conexao.execute("SELECT veiculo_id FROM vendas WHERE id = ?", (venda_id,)).fetchone()
+        if linha is None:
+            return None
+        conflito = self._conflito_venda(conexao, updated_venda, veiculo_anterior=linha[0])
+        if conflito is not None:
+            raise ErroIntegridade(conflito)
+        conexao.execute(_VENDAS.sql_atualizar, _VENDAS.parametros(updated_venda) + [venda_id])
+        if linha[0] != updated_venda.veiculo_id:
+            self._liberar_veiculo(conexao, linha[0])
+            conexao.execute("UPDATE veiculos SET disponivel = 0 WHERE id = ?", (updated_venda.veiculo_id,))
+        updated_venda.id = venda_id
+        return updated_venda
+
+    def _remover_venda(self, conexao: sqlite3.Connection, venda_id: int) -> bool:
+        linha = conexao.execute("SELECT veiculo_id FROM vendas WHERE id = ?", (venda_id,)).fetchone()
+        if linha is None:
+            return False
+        conexao.execute(_VENDAS.sql_remover, (venda_id,))
+        self._liberar_veiculo(conexao, linha[0])
+        return True
+
+    def update_venda(self, venda_id: int, updated_venda: Venda) -> Optional[Venda]:
+        return self._em_transacao(self._atualizar_venda, venda_id, updated_venda)
+
+    def update_vendas(self, vendas: List[Venda]) -> Dict[int, str]:
+        return self._em_lote(vendas, lambda conexao, venda: self._atualizar_venda(conexao, venda.id, venda), _id)
+
+    def delete_venda(self, venda_id: int) -> bool:
+        """
+        Remove a venda e devolve o veículo ao estoque
+        """
+        return self._em_transacao(self._remover_venda, venda_id)
+
+    def delete_vendas(self, venda_ids: List[int]) -> Dict[int, str]:
+        """
+        Remove as vendas e devolve os veículos ao estoque, em uma única transação
+        """
+        return self._em_lote(venda_ids, self._remover_venda, int)
+
+    def _vendas_relacionadas(self, tabela: _Tabela, coluna: str, registro_id: int) -> Optional[List[Venda]]:
+        conexao = self._conexao()
+        if not conexao.execute(f"SELECT EXISTS (SELECT 1 FROM {tabela.nome} WHERE id = ?)", (registro_id,)).fetchone()[0]:
+            return None
+        return self._consultar(_VENDAS, f"{_VENDAS.sql_selecionar} WHERE {coluna} = ? ORDER BY id", (registro_id,))
+
+    def get_vendas_by_cliente(self, cliente_id: int) -> Optional[List[Venda]]:
+        return self._vendas_relacionadas(_CLIENTES, "cliente_id", cliente_id)
+
+    def get_vendas_by_funcionario(self, funcionario_id: int) -> Optional[List[Venda]]:
+        return self._vendas_relacionadas(_FUNCIONARIOS, "funcionario_id", funcionario_id)
+
+    def get_vendas_by_veiculo(self, veiculo_id: int) -> Optional[List[Venda]]:
+        return self._vendas_relacionadas(_VEICULOS, "veiculo_id", veiculo_id)
+
+    def analisar_vendas(
+        self,
+        dimensao: str,
+        data_inicial: Optional[date] = None,
+        data_final: Optional[date] = None
+    ) -> List[ResumoVendas]:
+        """
+        Receita, quantidade e desconto das vendas agrupados por mes, vendedor, tipo, marca ou total
+
+        O desconto parte de preco_tabela, o preço do veículo gravado com a venda,
+        como no ranking. A junção com veículos só fornece o tipo e a marca.
+        """
+        if dimensao not in _DIMENSOES_VENDAS:
+            raise ValueError(f"Dimensão desconhecida: {dimensao}")
+        where, parametros = _condicoes((
+            ("vd.data_venda >= ?", _texto_data(data_inicial)),
+            ("vd.data_venda <= ?", _texto_data(data_final)),
+        ))
+        linhas = self._conexao().execute(
+            f"SELECT {_DIMENSOES_VENDAS[dimensao]} AS grupo, COUNT(*), SUM(vd.valor_venda), "
+            "TOTAL(vd.preco_tabela), TOTAL(vd.preco_tabela - vd.valor_venda) "
+            f"FROM vendas vd LEFT JOIN veiculos v ON v.id = vd.veiculo_id{where} GROUP BY grupo "
+            + ("ORDER BY grupo" if dimensao == "mes" else "ORDER BY SUM(vd.valor_venda) DESC"),
+            parametros
+        ).fetchall()
+        contar_linhas(sum(linha[1] for linha in linhas))
+        return [
+            ResumoVendas(
+                grupo=grupo,
+                quantidade=quantidade,
+                receita=receita,
+                preco_tabela=preco_tabela,
+                desconto=desconto,
+                desconto_percentual=desconto / preco_tabela * 100 if preco_tabela else 0.0
+            )
+            for grupo, quantidade, receita, preco_tabela, desconto in linhas
+        ]
+
+    def receita_por_periodo(
+        self,
+        inicio: Optional[date] = None,
+        fim: Optional[date] = None,
+        granularidade: str = "dia"
+    ) -> ReceitaVendas:
+        """
+        Quantidade e receita das vendas por dia, mês ou ano
+
+        Sem as árvores de somas dos outros backends: as vendas do intervalo são
+        lidas pelo índice de data_venda e agrupadas pelo SQLite.
+        """
+        if granularidade not in _PERIODOS_RECEITA:
+            raise ValueError(f"Granularidade desconhecida: {granularidade}")
+        verificar_intervalo(inicio, fim)
+        conexao = self._conexao()
+        if inicio is None or fim is None:
+            primeiro, ultimo = conexao.execute("SELECT MIN(data_venda), MAX(data_venda) FROM vendas").fetchone()
+            if primeiro is None:
+                return resumo_receita(granularidade, inicio, fim, [], [], [])
+            inicio = _data(primeiro) if inicio is None else inicio
+            fim = _data(ultimo) if fim is None else fim
+        limites = limites_periodos(inicio, fim, granularidade)
+        if not limites:
+            return resumo_receita(granularidade, inicio, fim, [], [], [])
+        linhas = conexao.execute(
+            f"SELECT {_PERIODOS_RECEITA[granularidade]} AS periodo, COUNT(*), SUM(valor_venda) "
+            "FROM vendas WHERE data_venda >= ? AND data_venda <= ? GROUP BY periodo",
+            (_texto_data(inicio), _texto_data(fim))
+        ).fetchall()
+        contar_linhas(sum(linha[1] for linha in linhas))
+        somas = {periodo: (quantidade, receita) for periodo, quantidade, receita in linhas}
+        periodos = [somas.get(rotulo_periodo(date.fromordinal(limite), granularidade), (0, 0.0)) for limite in limites[:-1]]
+        return resumo_receita(
+            granularidade, inicio, fim, limites,
+            [quantidade for quantidade, _ in periodos], [receita for _, receita in periodos]
+        )
+
+    def ranking_vendedores(self, limite: int = 10) -> List[RankingVendedor]:
+        """
+        Os vendedores com maior receita, com quantidade de vendas e desconto médio
+
+        O desconto de cada venda é calculado sobre o preço do veículo guardado
+        em preco_tabela quando a venda foi registrada.
+        """
+        linhas = self._conexao().execute(
+            "SELECT vd.funcionario_id, f.nome, f.cargo, COUNT(*), SUM(vd.valor_venda), "
+            "COALESCE(AVG(vd.preco_tabela - vd.valor_venda), 0) "
+            "FROM vendas vd "
+            "LEFT JOIN funcionarios f ON f.id = vd.funcionario_id "
+            "GROUP BY vd.funcionario_id ORDER BY SUM(vd.valor_venda) DESC, vd.funcionario_id LIMIT ?",
+            (limite,)
+        ).fetchall()
+        return [
+            RankingVendedor(
+                posicao=posicao,
+                funcionario_id=funcionario_id,
+                nome=nome,
+                cargo=cargo,
+                quantidade_vendas=quantidade,
+                receita=receita,
+                desconto_medio=desconto_medio
+            )
+            for posicao, (funcionario_id, nome, cargo, quantidade, receita, desconto_medio) in enumerate(linhas, start=1)
+        ]
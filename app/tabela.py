@@ -0,0 +1,596 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date
+from enum import Enum
+from functools import lru_cache
+from itertools import compress
+from typing import Any, Callable, Collection, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Type, TypeVar, Union, get_args, get_origin
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.metricas import contar_linhas
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def para_linha(registro: BaseModel) -> tuple:
+    return tuple(getattr(registro, campo) for campo in type(registro).model_fields)
+
+
+def de_linhas(modelo: Type[M], linhas: Iterable[tuple]) -> List[M]:
+    # Os dados gravados já foram validados, então os modelos são montados sem validação
+    # (equivalente a model_construct, sem o tratamento de valores padrão)
+    campos = tuple(modelo.model_fields)
+    novo, definir = modelo.__new__, object.__setattr__
+    registros = []
+    for linha in linhas:
+        registro = novo(modelo)
+        definir(registro, "__dict__", dict(zip(campos, linha)))
+        definir(registro, "__pydantic_fields_set__", set(campos))
+        definir(registro, "__pydantic_extra__", None)
+        definir(registro, "__pydantic_private__", None)
+        registros.append(registro)
+    return registros
+
+
+def de_linha(modelo: Type[M], linha: tuple) -> M:
+    return de_linhas(modelo, (linha,))[0]
+
+
+@lru_cache(maxsize=None)
+def _tupla_nomeada(modelo: Type[BaseModel]) -> type:
+    return namedtuple(modelo.__name__, tuple(modelo.model_fields))
+
+
+def de_linhas_leves(modelo: Type[M], linhas: Iterable[tuple]) -> List[tuple]:
+    """
+    Linhas como tuplas nomeadas com os campos do modelo, para quem só lê atributos
+
+    Uma tupla custa uma fração de um modelo do pydantic; a recuperação as usa
+    para construir os índices sem montar os modelos.
+    """
+    return list(map(_tupla_nomeada(modelo)._make, linhas))
+
+
+def _identidade(valor: Any) -> Any:
+    return valor
+
+
+class _Coluna:
+    """
+    Forma de guardar um campo do modelo: um array de tipo fixo quando possível
+
+    Inteiros, decimais e booleanos vão para arrays numéricos; datas viram o
+    ordinal do dia e enums o índice do membro. Os demais campos (textos)
+    ficam em uma lista comum. vazio é o valor gravado em posições removidas.
+    """
+
+    def __init__(self, anotacao: Any):
+        opcional = get_origin(anotacao) is Union and type(None) in get_args(anotacao)
+        if opcional:
+            anotacao = next(tipo for tipo in get_args(anotacao) if tipo is not type(None))
+
+        self.tipo: Optional[str] = None
+        self.codificar: Callable[[Any], Any] = _identidade
+        self.decodificar: Optional[Callable[[Any], Any]] = None
+        self.vazio: Any = None
+        if isinstance(anotacao, type) and issubclass(anotacao, Enum):
+            membros = list(anotacao)
+            codigos = {membro: codigo for codigo, membro in enumerate(membros)}
+            self.tipo, self.vazio = "b", -1
+            self.codificar = lambda valor: codigos[anotacao(valor)] if valor is not None else -1
+            self.decodificar = lambda codigo: membros[codigo] if codigo >= 0 else None
+        elif anotacao is date:
+            self.tipo, self.vazio = "i", 0
+            self.codificar = lambda valor: valor.toordinal() if valor is not None else 0
+            self.decodificar = lambda ordinal: date.fromordinal(ordinal) if ordinal else None
+        elif not opcional and anotacao is bool:
+            self.tipo, self.vazio = "b", 0
+            self.decodificar = bool
+        elif not opcional and anotacao is int:
+            self.tipo, self.vazio = "q", 0
+        elif not opcional and anotacao is float:
+            self.tipo, self.vazio = "d", 0.0
+
+    @property
+    def dtype(self) -> Optional[np.dtype]:
+        """
+        Tipo do NumPy equivalente ao do array (None para colunas de texto)
+        """
+        return np.dtype(self.tipo) if self.tipo is not None else None
+
+    def nova(self, valores: Any = ()) -> Union[array, list]:
+        return array(self.tipo, valores) if self.tipo is not None else list(valores)
+
+    def decodificar_varios(self, valores: Union[array, list]) -> Union[array, list]:
+        return valores if self.decodificar is None else list(map(self.decodificar, valores))
+
+
+def codificar_textos(valores: Sequence[Optional[str]]) -> Dict[str, np.ndarray]:
+    """
+    Guarda textos em um único bloco UTF-8 contíguo, para gravação em uma publicação
+
+    Retorna "texto" (os bytes), "offsets" (início de cada texto, mais o fim
+    do último) e, só quando há valores None, "nulos".
+    """
+    nulos = np.fromiter((valor is None for valor in valores), dtype=bool, count=len(valores))
+    textos = [valor or "" for valor in valores] if nulos.any() else valores
+    juntos = "".join(textos)
+    codificado = juntos.encode("utf-8", "surrogatepass")
+    if len(codificado) == len(juntos):
+        # Só ASCII: o tamanho em bytes é o próprio tamanho do texto
+        tamanhos = np.fromiter(map(len, textos), dtype=np.int64, count=len(textos))
+    else:
+        tamanhos = np.fromiter((len(texto.encode("utf-8", "surrogatepass")) for texto in textos), dtype=np.int64, count=len(textos))
+    offsets = np.zeros(len(textos) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=offsets[1:])
+    secoes = {"texto": np.frombuffer(codificado, dtype=np.uint8), "offsets": offsets}
+    if nulos.any():
+        secoes["nulos"] = nulos
+    return secoes
+
+
+def inserir_textos(secoes: Dict[str, np.ndarray], pontos: Sequence[int], valores: Sequence[Optional[str]]) -> Dict[str, np.ndarray]:
+    """
+    Insere textos em uma coluna já codificada por codificar_textos, sem recodificar os anteriores
+
+    valores[i] entra antes do texto que estava na posição pontos[i], como em
+    np.insert (pontos em ordem crescente; o tamanho da coluna acrescenta no
+    fim). Só os textos novos são codificados; os bytes dos demais são
+    copiados em blocos, um por ponto de inserção distinto.
+    """
+    novos = codificar_textos(valores)
+    texto, offsets = secoes["texto"], secoes["offsets"]
+    pontos = np.asarray(pontos, dtype=np.int64)
+    # Os textos novos de um mesmo ponto são vizinhos nos bytes codificados
+    grupos, primeiros = np.unique(pontos, return_index=True)
+    limites = np.append(primeiros, len(pontos)).tolist()
+    pedacos, copiado = [], 0
+    for numero, ponto in enumerate(grupos.tolist()):
+        corte = int(offsets[ponto])
+        pedacos.append(texto[copiado:corte])
+        pedacos.append(novos["texto"][novos["offsets"][limites[numero]]:novos["offsets"][limites[numero + 1]]])
+        copiado = corte
+    pedacos.append(texto[copiado:])
+    tamanhos = np.insert(np.diff(offsets), pontos, np.diff(novos["offsets"]))
+    resultado = {"texto": np.concatenate(pedacos), "offsets": np.zeros(len(tamanhos) + 1, dtype=np.int64)}
+    np.cumsum(tamanhos, out=resultado["offsets"][1:])
+    nulos, nulos_novos = secoes.get("nulos"), novos.get("nulos")
+    if nulos is not None or nulos_novos is not None:
+        resultado["nulos"] = np.insert(
+            nulos if nulos is not None else np.zeros(len(offsets) - 1, dtype=bool),
+            pontos,
+            nulos_novos if nulos_novos is not None else np.zeros(len(pontos), dtype=bool)
+        )
+    return resultado
+
+
+def juntar_textos(primeiras: Dict[str, np.ndarray], segundas: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Junta duas colunas codificadas por codificar_textos, a segunda depois da primeira
+
+    O resultado é o mesmo de codificar os valores das duas juntos, sem
+    decodificar nem recodificar nenhum deles.
+    """
+    resultado = {
+        "texto": np.concatenate((primeiras["texto"], segundas["texto"])),
+        "offsets": np.concatenate((primeiras["offsets"], segundas["offsets"][1:] + primeiras["offsets"][-1])),
+    }
+    if "nulos" in primeiras or "nulos" in segundas:
+        resultado["nulos"] = np.concatenate([
+            colunas.get("nulos", np.zeros(len(colunas["offsets"]) - 1, dtype=bool)) for colunas in (primeiras, segundas)
+        ])
+    return resultado
+
+
+class TextosMapeados(Sequence):
+    """
+    Coluna de texto gravada por codificar_textos, decodificada só nas posições lidas
+    """
+
+    def __init__(self, texto: np.ndarray, offsets: np.ndarray, nulos: Optional[np.ndarray] = None):
+        self._bytes = memoryview(texto)
+        self._offsets = offsets
+        self._nulos = nulos
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, indice: Union[int, slice]) -> Any:
+        if isinstance(indice, slice):
+            return self.selecionar(range(*indice.indices(len(self))))
+        if indice < 0:
+            indice += len(self)
+        if self._nulos is not None and self._nulos[indice]:
+            return None
+        return str(self._bytes[self._offsets[indice]:self._offsets[indice + 1]], "utf-8", "surrogatepass")
+
+    def selecionar(self, posicoes: Iterable[int]) -> List[Optional[str]]:
+        posicoes = np.fromiter(posicoes, dtype=np.int64) if not isinstance(posicoes, np.ndarray) else posicoes
+        dados = self._bytes
+        textos = [
+            str(dados[inicio:fim], "utf-8", "surrogatepass")
+            for inicio, fim in zip(self._offsets[posicoes].tolist(), self._offsets[posicoes + 1].tolist())
+        ]
+        if self._nulos is not None:
+            textos = [None if nulo else texto for texto, nulo in zip(textos, self._nulos[posicoes].tolist())]
+        return textos
+
+
+class Fatia(Generic[M]):
+    """
+    Cópia dos valores brutos de alguns registros de uma Tabela
+
+    Copiar as colunas é barato, então a fatia é tirada sob a trava de leitura
+    e os modelos são montados depois, sem bloquear as escritas.
+    """
+
+    def __init__(
+        self,
+        modelo: Type[M],
+        tipos_colunas: List[_Coluna],
+        ids: Sequence[int],
+        colunas: List[Sequence[Any]],
+        ativo: Optional[bytes] = None
+    ):
+        self.modelo = modelo
+        self._tipos_colunas = tipos_colunas
+        self._ids = ids
+        self._colunas = colunas
+        self._ativo = ativo
+        contar_linhas(len(ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def linhas(self) -> Iterator[tuple]:
+        """
+        Registros como tuplas de valores, na ordem dos campos do modelo
+        """
+        # Decodifica coluna a coluna, bem mais rápido que registro a registro
+        colunas = [tipo.decodificar_varios(coluna) for tipo, coluna in zip(self._tipos_colunas, self._colunas)]
+        linhas = zip(self._ids, *colunas)
+        return linhas if self._ativo is None else compress(linhas, self._ativo)
+
+    def registros(self) -> List[M]:
+        return de_linhas(self.modelo, self.linhas())
+
+    def secoes(self, campos: Optional[Collection[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Valores ainda codificados dos registros ativos, como arrays do NumPy
+
+        As chaves são "id" e o nome de cada campo; campos de texto viram as
+        seções de codificar_textos, com o nome do campo como prefixo. É o
+        formato lido pela TabelaMapeada. campos restringe as seções aos
+        campos informados ("id" só sai se estiver entre eles).
+        """
+        ativo = np.frombuffer(self._ativo, dtype=bool) if self._ativo is not None else None
+
+        def numerico(valores: Sequence[Any], dtype: np.dtype) -> np.ndarray:
+            dados = np.frombuffer(valores, dtype=dtype) if isinstance(valores, array) else np.asarray(valores, dtype=dtype)
+            return dados[ativo] if ativo is not None else dados
+
+        secoes = {"id": numerico(self._ids, np.dtype(np.int64))} if campos is None or "id" in campos else {}
+        todos = [campo for campo in self.modelo.model_fields if campo != "id"]
+        for campo, tipo, coluna in zip(todos, self._tipos_colunas, self._colunas):
+            if campos is not None and campo not in campos:
+                continue
+            if tipo.dtype is not None:
+                secoes[campo] = numerico(coluna, tipo.dtype)
+                continue
+            textos = list(compress(coluna, ativo)) if ativo is not None else coluna
+            for nome, dados in codificar_textos(textos).items():
+                secoes[f"{campo}.{nome}"] = dados
+        return secoes
+
+
+class Tabela(Generic[M]):
+    """
+    Armazena os registros de uma entidade em colunas compactas, em ordem de ID
+
+    Cada campo vira uma coluna (veja _Coluna) alinhada ao array de IDs, em vez
+    de um objeto do pydantic por registro; os modelos só são montados quando
+    um registro é lido. Como os IDs são crescentes, a posição de um registro é
+    o deslocamento a partir do primeiro ID enquanto não houver remoções, ou uma
+    bisseção no array de IDs. Remoções apenas desligam a posição, e as colunas
+    são compactadas quando metade delas está ociosa.
+    """
+
+    def __init__(self, modelo: Type[M]):
+        self.modelo = modelo
+        # O campo id, o primeiro de todos os modelos, é o próprio array de IDs
+        self._campos = [campo for campo in modelo.model_fields if campo != "id"]
+        self._tipos_colunas = [_Coluna(modelo.model_fields[campo].annotation) for campo in self._campos]
+        self._colunas = [coluna.nova() for coluna in self._tipos_colunas]
+        self._ids = array("q")
+        self._ativo = bytearray()
+        self._quantidade = 0
+        self.proximo_id = 1
+        # Versão incrementada a cada alteração; por campo, a da última alteração no lugar,
+        # e a da última remoção (que desloca os registros seguintes em uma cópia compactada)
+        self.versao = 0
+        self._versoes_campos = [0] * len(self._campos)
+        self._versao_remocao = 0
+
+    def __len__(self) -> int:
+        return self._quantidade
+
+    def __contains__(self, registro_id: int) -> bool:
+        return self._posicao(registro_id) is not None
+
+    def __iter__(self) -> Iterator[M]:
+        return iter(self.todos())
+
+    def _posicao(self, registro_id: int) -> Optional[int]:
+        ids = self._ids
+        if not ids:
+            return None
+        posicao = registro_id - ids[0]
+        if not (0 <= posicao < len(ids) and ids[posicao] == registro_id):
+            posicao = bisect_left(ids, registro_id)
+            if posicao == len(ids) or ids[posicao] != registro_id:
+                return None
+        return posicao if self._ativo[posicao] else None
+
+    def _linha(self, posicao: int) -> tuple:
+        return (self._ids[posicao], *(
+            valor if tipo.decodificar is None else tipo.decodificar(valor)
+            for tipo, valor in zip(self._tipos_colunas, (coluna[posicao] for coluna in self._colunas))
+        ))
+
+    def _gravar(self, posicao: int, registro: M) -> None:
+        self.versao += 1
+        for indice, (campo, tipo, coluna) in enumerate(zip(self._campos, self._tipos_colunas, self._colunas)):
+            valor = tipo.codificar(getattr(registro, campo))
+            if coluna[posicao] != valor:
+                coluna[posicao] = valor
+                self._versoes_campos[indice] = self.versao
+
+    def _anexar(self, registros: List[M]) -> None:
+        self.versao += 1
+        for campo, tipo, coluna in zip(self._campos, self._tipos_colunas, self._colunas):
+            coluna.extend(map(tipo.codificar, [getattr(registro, campo) for registro in registros]))
+        self._ids.extend(registro.id for registro in registros)
+        self._ativo.extend(b"\x01" * len(registros))
+        self._quantidade += len(registros)
+
+    def todos(self) -> List[M]:
+        return self.pagina()
+
+    def obter(self, registro_id: int) -> Optional[M]:
+        posicao = self._posicao(registro_id)
+        if posicao is None:
+            return None
+        contar_linhas(1)
+        return de_linha(self.modelo, self._linha(posicao))
+
+    def valor(self, registro_id: int, campo: str) -> Any:
+        """
+        Lê um único campo do registro sem montar o modelo (None se o registro não existe)
+        """
+        posicao = self._posicao(registro_id)
+        if posicao is None:
+            return None
+        indice = self._campos.index(campo)
+        tipo = self._tipos_colunas[indice]
+        valor = self._colunas[indice][posicao]
+        return valor if tipo.decodificar is None else tipo.decodificar(valor)
+
+    def definir_valor(self, registro_id: int, campo: str, valor: Any) -> bool:
+        """
+        Altera um único campo do registro sem montar o modelo (False se o registro não existe)
+        """
+        posicao = self._posicao(registro_id)
+        if posicao is None:
+            return False
+        self.versao += 1
+        indice = self._campos.index(campo)
+        valor = self._tipos_colunas[indice].codificar(valor)
+        if self._colunas[indice][posicao] != valor:
+            self._colunas[indice][posicao] = valor
+            self._versoes_campos[indice] = self.versao
+        return True
+
+    def inserir(self, registro: M) -> M:
+        registro.id = self.proximo_id
+        self.proximo_id += 1
+        self._anexar([registro])
+        return registro
+
+    def inserir_lote(self, registros: List[M]) -> List[M]:
+        """
+        Insere vários registros reservando um bloco contíguo de IDs
+        """
+        inicio = self.proximo_id
+        self.proximo_id += len(registros)
+        for registro_id, registro in enumerate(registros, start=inicio):
+            # Os registros reaplicados do WAL já trazem o ID, e atribuir pelo pydantic custa caro
+            if registro.id != registro_id:
+                registro.id = registro_id
+        self._anexar(registros)
+        return registros
+
+    def restaurar(self, linhas: List[tuple], proximo_id: int) -> None:
+        """
+        Carrega linhas que já possuem ID (em ordem crescente), como as de um snapshot
+
+        As linhas (veja para_linha) são transpostas em colunas de uma só vez,
+        sem montar os modelos.
+        """
+        self.versao += 1
+        if linhas:
+            ids, *valores = zip(*linhas)
+            for tipo, coluna, valores_coluna in zip(self._tipos_colunas, self._colunas, valores):
+                coluna.extend(valores_coluna if tipo.codificar is _identidade else map(tipo.codificar, valores_coluna))
+            self._ids.extend(ids)
+            self._ativo.extend(b"\x01" * len(ids))
+            self._quantidade += len(ids)
+        self.proximo_id = max(self.proximo_id, proximo_id)
+
+    def substituir(self, registro_id: int, registro: M) -> Optional[M]:
+        posicao = self._posicao(registro_id)
+        if posicao is None:
+            return None
+        registro.id = registro_id
+        self._gravar(posicao, registro)
+        return registro
+
+    def remover(self, registro_id: int) -> Optional[M]:
+        posicao = self._posicao(registro_id)
+        if posicao is None:
+            return None
+        registro = de_linha(self.modelo, self._linha(posicao))
+        self.versao += 1
+        self._versao_remocao = self.versao
+        self._ativo[posicao] = 0
+        self._quantidade -= 1
+        for tipo, coluna in zip(self._tipos_colunas, self._colunas):
+            coluna[posicao] = tipo.vazio
+        if len(self._ids) > 2 * self._quantidade + 64:
+            self._compactar()
+        return registro
+
+    def alteracoes(self, versao: int) -> Optional[List[str]]:
+        """
+        Campos alterados no lugar depois da versão informada, ou None se algum registro foi removido desde então
+
+        Uma lista vazia indica que desde aquela versão só houve inclusões, que
+        sempre entram no fim, com IDs maiores.
+        """
+        if self._versao_remocao > versao:
+            return None
+        return [campo for campo, alterado in zip(self._campos, self._versoes_campos) if alterado > versao]
+
+    def _compactar(self) -> None:
+        ativo = self._ativo
+        self._colunas = [tipo.nova(compress(coluna, ativo)) for tipo, coluna in zip(self._tipos_colunas, self._colunas)]
+        self._ids = array("q", compress(self._ids, ativo))
+        self._ativo = bytearray(b"\x01" * len(self._ids))
+
+    def _fim_pagina(self, inicio: int, limite: int) -> int:
+        # Avança pelas posições até reunir limite registros ativos
+        fim, faltam = inicio, limite
+        while faltam > 0 and fim < len(self._ids):
+            bloco = self._ativo[fim:fim + faltam]
+            faltam -= bloco.count(1)
+            fim += len(bloco)
+        return fim
+
+    def fatia(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> Fatia[M]:
+        """
+        Registros com ID maior que apos_id, em ordem de ID, até o limite informado
+        """
+        inicio = 0 if apos_id is None else bisect_right(self._ids, apos_id)
+        fim = len(self._ids) if limite is None else self._fim_pagina(inicio, limite)
+        return Fatia(
+            self.modelo,
+            self._tipos_colunas,
+            self._ids[inicio:fim],
+            [coluna[inicio:fim] for coluna in self._colunas],
+            self._ativo[inicio:fim]
+        )
+
+    def selecionar(self, registro_ids: Iterable[int]) -> Fatia[M]:
+        """
+        Registros com os IDs informados, na ordem recebida; IDs inexistentes são ignorados
+        """
+        posicoes = [posicao for posicao in map(self._posicao, registro_ids) if posicao is not None]
+        return Fatia(
+            self.modelo,
+            self._tipos_colunas,
+            [self._ids[posicao] for posicao in posicoes],
+            [[coluna[posicao] for posicao in posicoes] for coluna in self._colunas]
+        )
+
+    def pagina(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[M]:
+        return self.fatia(apos_id, limite).registros()
+
+
+class TabelaMapeada(Generic[M]):
+    """
+    Versão somente leitura da Tabela sobre os arrays gravados por Fatia.secoes
+
+    Os arrays vêm prontos (tipicamente de um arquivo mapeado em memória) e
+    não são copiados: a posição de um ID sai de uma busca binária, e os
+    valores só são lidos, e os textos decodificados, nas posições pedidas.
+    """
+
+    def __init__(self, modelo: Type[M], secao: Callable[[str], Optional[np.ndarray]]):
+        self.modelo = modelo
+        self._campos = [campo for campo in modelo.model_fields if campo != "id"]
+        self._tipos_colunas = [_Coluna(modelo.model_fields[campo].annotation) for campo in self._campos]
+        self.ids: np.ndarray = secao("id")
+        self._colunas: List[Sequence[Any]] = [
+            secao(campo) if tipo.dtype is not None
+            else TextosMapeados(secao(f"{campo}.texto"), secao(f"{campo}.offsets"), secao(f"{campo}.nulos"))
+            for campo, tipo in zip(self._campos, self._tipos_colunas)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, registro_id: int) -> bool:
+        return self.posicao(registro_id) is not None
+
+    def posicao(self, registro_id: int) -> Optional[int]:
+        posicao = int(np.searchsorted(self.ids, registro_id))
+        return posicao if posicao < len(self.ids) and self.ids[posicao] == registro_id else None
+
+    def posicoes(self, registro_ids: Any) -> np.ndarray:
+        """
+        Posições dos IDs informados que existem na tabela, na ordem recebida
+        """
+        registro_ids = np.asarray(registro_ids, dtype=np.int64)
+        posicoes = np.minimum(np.searchsorted(self.ids, registro_ids), max(len(self.ids) - 1, 0))
+        if not len(self.ids):
+            return posicoes[:0]
+        return posicoes[self.ids[posicoes] == registro_ids]
+
+    def coluna(self, campo: str) -> Sequence[Any]:
+        """
+        Valores codificados de um campo (array do NumPy, ou TextosMapeados para textos)
+        """
+        return self.ids if campo == "id" else self._colunas[self._campos.index(campo)]
+
+    def obter(self, registro_id: int) -> Optional[M]:
+        posicao = self.posicao(registro_id)
+        return self.de_posicoes([posicao]).registros()[0] if posicao is not None else None
+
+    def valor(self, registro_id: int, campo: str) -> Any:
+        posicao = self.posicao(registro_id)
+        if posicao is None:
+            return None
+        indice = self._campos.index(campo)
+        tipo = self._tipos_colunas[indice]
+        valor = self._colunas[indice][posicao]
+        valor = valor.item() if isinstance(valor, np.generic) else valor
+        return valor if tipo.decodificar is None else tipo.decodificar(valor)
+
+    def de_posicoes(self, posicoes: Any) -> Fatia[M]:
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        return Fatia(
+            self.modelo,
+            self._tipos_colunas,
+            self.ids[posicoes].tolist(),
+            [
+                coluna.selecionar(posicoes) if isinstance(coluna, TextosMapeados) else coluna[posicoes].tolist()
+                for coluna in self._colunas
+            ]
+        )
+
+    def fatia(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> Fatia[M]:
+        """
+        Registros com ID maior que apos_id, em ordem de ID, até o limite informado
+        """
+        inicio = 0 if apos_id is None else int(np.searchsorted(self.ids, apos_id, side="right"))
+        fim = len(self.ids) if limite is None else min(inicio + limite, len(self.ids))
+        return self.de_posicoes(np.arange(inicio, fim))
+
+    def selecionar(self, registro_ids: Any) -> Fatia[M]:
+        """
+        Registros com os IDs informados, na ordem recebida; IDs inexistentes são ignorados
+        """
+        return self.de_posicoes(self.posicoes(registro_ids))
@@ -0,0 +1,266 @@
+"""
+Compara as rotas assíncronas com o modelo anterior, de rotas síncronas no threadpool
+
+Com rotas def, cada requisição ocupa uma das vagas do threadpool do Starlette
+(40 por padrão) e o restante fica na fila, mesmo quando o trabalho é mínimo.
+O modelo "threadpool" reproduz as rotas medidas como eram antes, chamando o
+Database síncrono; o modelo "assincrono" é o aplicativo atual (app.main), que
+usa o db_assincrono. As duas versões recebem a mesma mistura de leituras e
+escritas, enviada por N conexões HTTP simultâneas (keep-alive) a um servidor
+uvicorn; a latência medida inclui a espera na fila do servidor.
+
+Cada modelo é servido por um processo próprio, com um diretório de dados
+temporário e vazio, populado pelo gerador sintético de app.seed. O backend é o de
+CONCESSIONARIA_BACKEND (memoria, wal ou sqlite); com wal e sqlite as
+operações bloqueantes passam pelo executor dedicado do banco.
+
+Uso:
+    CONCESSIONARIA_BACKEND=wal python -m benchmarks.bench_assincrono [--conexoes 1000] [--requisicoes 20000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+MODELOS = ("threadpool", "assincrono")
+
+
+def _app_threadpool():
+    """
+    As rotas medidas, como eram antes: funções def que chamam o Database síncrono
+    """
+    from fastapi import APIRouter, FastAPI, HTTPException, status
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from app.database import db
+    from app.erros import ErroIntegridade
+    from app.models import Cliente, Veiculo, Venda
+    from app.serializacao import resposta_json
+
+    router = APIRouter(prefix="/api")
+
+    @router.get("/veiculos/{veiculo_id}", response_model=Veiculo)
+    def get_veiculo(veiculo_id: int):
+        veiculo = db.get_veiculo_by_id(veiculo_id)
+        if veiculo is None:
+            raise HTTPException(status_code=404, detail="Veículo não encontrado")
+        return veiculo
+
+    @router.put("/veiculos/{veiculo_id}", response_model=Veiculo)
+    def update_veiculo(veiculo_id: int, veiculo: Veiculo):
+        updated = db.update_veiculo(veiculo_id, veiculo)
+        if updated is None:
+            raise HTTPException(status_code=404, detail="Veículo não encontrado")
+        return updated
+
+    @router.get("/veiculos/{veiculo_id}/vendas", response_model=List[Venda])
+    def get_vendas_veiculo(veiculo_id: int):
+        vendas = db.get_vendas_by_veiculo(veiculo_id)
+        if vendas is None:
+            raise HTTPException(status_code=404, detail="Veículo não encontrado")
+        return resposta_json(vendas)
+
+    @router.get("/clientes/{cliente_id}", response_model=Cliente)
+    def get_cliente(cliente_id: int):
+        cliente = db.get_cliente_by_id(cliente_id)
+        if cliente is None:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return cliente
+
+    @router.post("/clientes", response_model=Cliente, status_code=status.HTTP_201_CREATED)
+    def create_cliente(cliente: Cliente):
+        try:
+            return db.add_cliente(cliente)
+        except ErroIntegridade as erro:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(erro))
+
+    @router.get("/vendas/{venda_id}", response_model=Venda)
+    def get_venda(venda_id: int):
+        venda = db.get_venda_by_id(venda_id)
+        if venda is None:
+            raise HTTPException(status_code=404, detail="Venda não encontrada")
+        return venda
+
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+    app.include_router(router)
+    return app
+
+
+def _mistura(quantidades: Dict[str, int], semente: int, deslocamento: int = 0) -> Callable[[int], Tuple[str, str, Optional[dict]]]:
+    """
+    Sorteia a requisição de número n: 80% leituras por ID, 20% escritas
+
+    Os clientes criados usam n + deslocamento no e-mail e no CPF, que precisam ser únicos.
+    """
+    aleatorio = random.Random(semente)
+
+    def requisicao(numero: int) -> Tuple[str, str, Optional[dict]]:
+        numero += deslocamento
+        sorteio = aleatorio.random()
+        if sorteio < 0.25:
+            return "GET", f"/api/veiculos/{aleatorio.randint(1, quantidades['veiculos'])}", None
+        if sorteio < 0.45:
+            return "GET", f"/api/clientes/{aleatorio.randint(1, quantidades['clientes'])}", None
+        if sorteio < 0.65:
+            return "GET", f"/api/vendas/{aleatorio.randint(1, quantidades['vendas'])}", None
+        if sorteio < 0.80:
+            return "GET", f"/api/veiculos/{aleatorio.randint(1, quantidades['vendas'])}/vendas", None
+        if sorteio < 0.90:
+            return "POST", "/api/clientes", {
+                "nome": f"Cliente Carga {numero}",
+                "email": f"carga{numero}@exemplo.com",
+                "cpf": f"9{numero:010d}",
+            }
+        # Veículos acima do último vendido estão disponíveis e não têm vendas associadas
+        veiculo_id = aleatorio.randint(quantidades["vendas"] + 1, quantidades["veiculos"])
+        return "PUT", f"/api/veiculos/{veiculo_id}", {
+            "marca": "Carga", "modelo": f"Modelo {numero}", "ano": 2024, "tipo": "SUV", "preco": 50000.0 + numero,
+        }
+    return requisicao
+
+
+async def _requisitar(leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter, metodo: str, caminho: str, corpo: bytes) -> int:
+    escritor.write(
+        f"{metodo} {caminho} HTTP/1.1\r\nHost: benchmark\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo
+    )
+    cabecalho = await leitor.readuntil(b"\r\n\r\n")
+    linhas = cabecalho.decode("latin-1").split("\r\n")
+    tamanho = 0
+    for linha in linhas[1:]:
+        nome, _, valor = linha.partition(":")
+        if nome.lower() == "content-length":
+            tamanho = int(valor)
+    await leitor.readexactly(tamanho)
+    return int(linhas[0].split()[1])
+
+
+async def _carga(porta: int, requisicao: Callable[[int], Tuple[str, str, Optional[dict]]], requisicoes: int, conexoes: int) -> Dict[str, float]:
+    latencias: List[float] = []
+    falhas = 0
+    proxima = 0
+
+    async def conexao():
+        nonlocal proxima, falhas
+        leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+        try:
+            while proxima < requisicoes:
+                numero = proxima
+                proxima += 1
+                metodo, caminho, corpo = requisicao(numero)
+                dados = json.dumps(corpo).encode() if corpo is not None else b""
+                inicio = time.perf_counter()
+                status = await _requisitar(leitor, escritor, metodo, caminho, dados)
+                latencias.append(time.perf_counter() - inicio)
+                falhas += status >= 400
+        finally:
+            escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conexao() for _ in range(conexoes)))
+    duracao = time.perf_counter() - inicio
+    percentis = statistics.quantiles(latencias, n=1000, method="inclusive")
+    return {
+        "vazao": requisicoes / duracao,
+        "p50": percentis[499] * 1000,
+        "p99": percentis[989] * 1000,
+        "p999": percentis[998] * 1000,
+        "maximo": max(latencias) * 1000,
+        "falhas": falhas,
+    }
+
+
+def _quantidades(veiculos: int) -> Dict[str, int]:
+    return {"funcionarios": 100, "veiculos": veiculos, "clientes": veiculos // 5, "vendas": veiculos // 2}
+
+
+def _servir(args) -> None:
+    import uvicorn
+
+    from app.cache import cache_respostas
+    from app.seed import gerar_dados_sinteticos
+
+    cache_respostas.limite_bytes = 0
+    gerar_dados_sinteticos(semente=args.semente, **_quantidades(args.veiculos))
+    if args.servir == "threadpool":
+        app = _app_threadpool()
+    else:
+        from app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=args.porta, log_level="warning", access_log=False, backlog=4096)
+
+
+def _aguardar_servidor(processo: subprocess.Popen, porta: int) -> None:
+    while True:
+        if processo.poll() is not None:
+            raise SystemExit("O servidor terminou antes de ficar pronto")
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+
+
+def _medir_modelo(modelo: str, args) -> int:
+    diretorio = tempfile.mkdtemp(prefix="bench_assincrono_")
+    ambiente = {**os.environ, "CONCESSIONARIA_DIRETORIO_DADOS": diretorio}
+    ambiente.pop("CONCESSIONARIA_SQLITE_CAMINHO", None)
+    comando = [
+        sys.executable, "-m", "benchmarks.bench_assincrono", "--servir", modelo, "--porta", str(args.porta),
+        "--veiculos", str(args.veiculos), "--semente", str(args.semente),
+    ]
+    servidor = subprocess.Popen(comando, env=ambiente)
+    try:
+        _aguardar_servidor(servidor, args.porta)
+        quantidades = _quantidades(args.veiculos)
+        # Aquecimento com poucas conexões, fora da medição
+        asyncio.run(_carga(args.porta, _mistura(quantidades, args.semente + 1, args.requisicoes), 500, 8))
+        resultado = asyncio.run(_carga(args.porta, _mistura(quantidades, args.semente), args.requisicoes, args.conexoes))
+    finally:
+        servidor.send_signal(signal.SIGINT)
+        servidor.wait()
+        shutil.rmtree(diretorio, ignore_errors=True)
+    print(
+        f"{modelo:<12} {resultado['vazao']:>8.0f} {resultado['p50']:>9.2f} {resultado['p99']:>9.2f}"
+        f" {resultado['p999']:>10.2f} {resultado['maximo']:>9.2f} {resultado['falhas']:>7}",
+        flush=True
+    )
+    return 1 if resultado["falhas"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelos", nargs="+", choices=MODELOS, default=list(MODELOS))
+    parser.add_argument("--servir", choices=MODELOS, help=argparse.SUPPRESS)
+    parser.add_argument("--conexoes", type=int, default=1000, help="conexões simultâneas")
+    parser.add_argument("--requisicoes", type=int, default=20000, help="total de requisições por modelo")
+    parser.add_argument("--veiculos", type=int, default=10000, help="veículos gerados (vendas e clientes proporcionais)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.servir is not None:
+        _servir(args)
+        return 0
+
+    print(f"backend: {os.getenv('CONCESSIONARIA_BACKEND', 'memoria')}, {args.conexoes} conexões, {args.requisicoes} requisições")
+    print(f"{'modelo':<12} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'p99.9 ms':>10} {'máx ms':>9} {'falhas':>7}", flush=True)
+    codigo = 0
+    for modelo in args.modelos:
+        codigo = _medir_modelo(modelo, args) or codigo
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
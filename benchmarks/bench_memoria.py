@@ -0,0 +1,123 @@
+"""
+Compara a memória ocupada por registro na Tabela colunar e no armazenamento anterior
+
+O armazenamento anterior guardava um modelo do pydantic por registro em um
+dicionário indexado pelo ID, mais a lista auxiliar de IDs; a Tabela atual
+guarda os campos em colunas (arrays numéricos para números, datas e enums).
+A medição usa o tracemalloc e inclui os textos dos registros nas duas formas.
+Os índices secundários do Database não entram na conta.
+
+Uso:
+    python -m benchmarks.bench_memoria [--tamanhos 10000 100000] [--lote 10000]
+"""
+import argparse
+import gc
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from pydantic import BaseModel
+
+from app.models import Cargo, Cliente, Funcionario, TipoVeiculo, Veiculo, Venda
+from app.tabela import Tabela
+
+
+def _funcionario(i: int) -> Funcionario:
+    cargos = list(Cargo)
+    return Funcionario(
+        nome=f"Funcionário {i}",
+        email=f"funcionario{i}@exemplo.com",
+        telefone=f"(11) 9{i % 10000:04d}-{i % 9999:04d}" if i % 2 else None,
+        cargo=cargos[i % len(cargos)],
+        data_contratacao=date(2015, 1, 1) + timedelta(days=i % 3000),
+        salario=1500.0 + i % 20000
+    )
+
+
+def _veiculo(i: int) -> Veiculo:
+    tipos = list(TipoVeiculo)
+    return Veiculo(
+        marca=f"Marca {i % 40}",
+        modelo=f"Modelo {i % 500}",
+        ano=2000 + i % 25,
+        tipo=tipos[i % len(tipos)],
+        preco=20000.0 + i % 100000,
+        disponivel=bool(i % 3)
+    )
+
+
+def _cliente(i: int) -> Cliente:
+    return Cliente(
+        nome=f"Cliente {i}",
+        email=f"cliente{i}@exemplo.com",
+        telefone=f"(21) 9{i % 10000:04d}-{i % 9999:04d}",
+        cpf=f"{i:011d}"
+    )
+
+
+def _venda(i: int) -> Venda:
+    return Venda(
+        veiculo_id=i,
+        cliente_id=1 + i % 50000,
+        funcionario_id=1 + i % 500,
+        data_venda=date(2020, 1, 1) + timedelta(days=i % 1500),
+        valor_venda=19000.0 + i % 100000
+    )
+
+
+def _lotes(gerar: Callable[[int], BaseModel], quantidade: int, lote: int) -> Iterator[List[BaseModel]]:
+    for inicio in range(1, quantidade + 1, lote):
+        yield [gerar(i) for i in range(inicio, min(inicio + lote, quantidade + 1))]
+
+
+def _como_antes(gerar: Callable[[int], BaseModel], quantidade: int, lote: int) -> Tuple[Dict[int, BaseModel], List[int]]:
+    linhas: Dict[int, BaseModel] = {}
+    ids: List[int] = []
+    for registros in _lotes(gerar, quantidade, lote):
+        for registro in registros:
+            registro.id = len(ids) + 1
+            linhas[registro.id] = registro
+            ids.append(registro.id)
+    return linhas, ids
+
+
+def _tabela(modelo: type, gerar: Callable[[int], BaseModel], quantidade: int, lote: int) -> Tabela:
+    tabela = Tabela(modelo)
+    for registros in _lotes(gerar, quantidade, lote):
+        tabela.inserir_lote(registros)
+    return tabela
+
+
+def _medir(construir: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    estrutura = construir()
+    gc.collect()
+    ocupado = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    del estrutura
+    return ocupado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lote", type=int, default=10000, help="registros gerados de cada vez durante a carga")
+    args = parser.parse_args()
+
+    print(f"{'modelo':<12} {'registros':>10} {'antes (B/reg)':>14} {'colunar (B/reg)':>16} {'redução':>8}")
+    for nome, modelo, gerar in (
+        ("Funcionario", Funcionario, _funcionario),
+        ("Veiculo", Veiculo, _veiculo),
+        ("Cliente", Cliente, _cliente),
+        ("Venda", Venda, _venda),
+    ):
+        for tamanho in args.tamanhos:
+            antes = _medir(lambda: _como_antes(gerar, tamanho, args.lote)) / tamanho
+            colunar = _medir(lambda: _tabela(modelo, gerar, tamanho, args.lote)) / tamanho
+            print(f"{nome:<12} {tamanho:>10} {antes:>14.0f} {colunar:>16.0f} {antes / colunar:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Latência de uma escrita no backend compartilhado, que só retorna depois de publicada
+
+Popula um WAL com os dados sintéticos de app.seed usando o Database comum
+(sem publicar nada durante a carga), abre o diretório com o
+DatabaseCompartilhado, que publica a primeira geração, e mede escritas
+isoladas, uma de cada tipo. Cada geração regrava as partes (um campo com o
+seu índice, ou um grupo de seções derivadas) que a escrita alterou: os
+registros incluídos são acrescentados ao que já foi publicado, sem
+recodificar nem reordenar o resto, mas as partes alteradas são copiadas
+inteiras, então o tempo ainda cresce com o tamanho das coleções. A venda
+altera as vendas e a disponibilidade do veículo vendido, cuja parte é
+reconstruída.
+
+Uso:
+    python -m benchmarks.bench_publicacao [--funcionarios 2000] [--veiculos 1000000] [--clientes 200000] [--vendas 1000000] [--repeticoes 5]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+from typing import Callable, Dict, List
+
+from app.compartilhado import DatabaseCompartilhado
+from app.database import Database
+from app.models import Cliente, Veiculo, Venda
+from app.persistencia import ArmazenamentoWAL
+from app.seed import gerar_dados_sinteticos
+
+
+def _tamanho_partes(diretorio: str) -> Dict[str, int]:
+    # Bytes das partes ("parte-<coleção>.<campo>-<geração>.pub"), somados por coleção
+    partes: Dict[str, int] = {}
+    for nome in sorted(os.listdir(diretorio)):
+        if nome.startswith("parte-") and nome.endswith(".pub"):
+            colecao = nome.split("-")[1].split(".")[0]
+            partes[colecao] = partes.get(colecao, 0) + os.path.getsize(os.path.join(diretorio, nome))
+    return partes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--funcionarios", type=int, default=2000)
+    parser.add_argument("--veiculos", type=int, default=1000000)
+    parser.add_argument("--clientes", type=int, default=200000)
+    parser.add_argument("--vendas", type=int, default=1000000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_wal = os.path.join(diretorio, "wal")
+        banco = Database(ArmazenamentoWAL(caminho_wal))
+        inicio = time.perf_counter()
+        gerar_dados_sinteticos(args.funcionarios, args.veiculos, args.clientes, args.vendas, banco=banco)
+        print(f"carga: {time.perf_counter() - inicio:.1f} s")
+        banco.fechar()
+
+        inicio = time.perf_counter()
+        compartilhado = DatabaseCompartilhado(diretorio, lambda: ArmazenamentoWAL(caminho_wal), intervalo_publicacao_ms=0)
+        print(f"abertura e primeira publicação: {time.perf_counter() - inicio:.1f} s")
+        for parte, tamanho in _tamanho_partes(os.path.join(diretorio, "publicacao")).items():
+            print(f"  parte {parte}: {tamanho / 2 ** 20:.0f} MiB")
+
+        # Veículos novos, para que cada venda medida tenha um veículo disponível
+        novos = compartilhado.add_veiculos([
+            Veiculo(marca="Marca", modelo="Modelo", ano=2024, tipo="Carro", preco=50000.0) for _ in range(args.repeticoes)
+        ])
+        funcionario = compartilhado.get_funcionario_by_id(1)
+        escritas: Dict[str, Callable[[int], object]] = {
+            "update_funcionario": lambda i: compartilhado.update_funcionario(1, funcionario),
+            "add_cliente": lambda i: compartilhado.add_cliente(Cliente(
+                nome="Cliente", email=f"medicao{i}@exemplo.com", telefone="(11) 90000-0000", cpf=f"9{i:010d}"
+            )),
+            "add_veiculo": lambda i: compartilhado.add_veiculo(Veiculo(
+                marca="Marca", modelo="Modelo", ano=2024, tipo="Carro", preco=50000.0
+            )),
+            "add_venda": lambda i: compartilhado.add_venda(Venda(
+                veiculo_id=novos[i].id, cliente_id=1, funcionario_id=1, data_venda=date(2025, 6, 30), valor_venda=48000.0
+            )),
+        }
+        print(f"{'escrita':<20} {'mediana (ms)':>13} {'máximo (ms)':>12}")
+        for nome, escrever in escritas.items():
+            tempos: List[float] = []
+            for repeticao in range(args.repeticoes):
+                inicio = time.perf_counter()
+                escrever(repeticao)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            print(f"{nome:<20} {statistics.median(tempos):>13.0f} {max(tempos):>12.0f}")
+        compartilhado.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Carga em todas as rotas da API, dentro do processo, direto pela interface ASGI
+
+Para cada escala o banco configurado (CONCESSIONARIA_BACKEND) é populado pelo
+gerador sintético de app.seed e cada rota recebe a mesma quantidade de
+requisições, com várias em paralelo. O relatório traz a vazão (req/s) e as
+latências p50/p95/p99 de cada rota.
+
+Uma escala de N registros gera N veículos, N/2 vendas, N/5 clientes e N/100
+funcionários (no mínimo 20). Cada escala roda em um processo próprio, com o
+banco vazio; com o backend sqlite ou wal, aponte CONCESSIONARIA_DIRETORIO_DADOS
+para um diretório vazio. O cache de respostas fica desligado, para medir o
+caminho completo de cada rota, a menos que --com-cache seja usado.
+
+Uso:
+    python -m benchmarks.bench_rotas [--escalas 10000 100000 1000000] [--requisicoes 200] [--concorrencia 8]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Caso(NamedTuple):
+    nome: str
+    metodo: str
+    # Recebe o número da requisição e retorna o caminho (com a query) e o corpo JSON
+    requisicao: Callable[[int], Tuple[str, Optional[object]]]
+    # Recebe o número da requisição e o corpo da resposta; retorna quantos itens falharam
+    resposta: Optional[Callable[[int, bytes], int]] = None
+
+
+async def _chamar(app, metodo: str, caminho: str, corpo: bytes) -> Tuple[int, bytes]:
+    caminho, _, query = caminho.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": metodo,
+        "scheme": "http",
+        "path": caminho,
+        "raw_path": caminho.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    enviado = False
+
+    async def receive():
+        nonlocal enviado
+        if not enviado:
+            enviado = True
+            return {"type": "http.request", "body": corpo, "more_body": False}
+        # Nunca há desconexão: espera até a resposta terminar e a tarefa ser cancelada
+        await asyncio.Future()
+
+    resposta = {"status": 0, "corpo": []}
+
+    async def send(mensagem):
+        if mensagem["type"] == "http.response.start":
+            resposta["status"] = mensagem["status"]
+        elif mensagem["type"] == "http.response.body":
+            resposta["corpo"].append(mensagem.get("body", b""))
+
+    await app(scope, receive, send)
+    return resposta["status"], b"".join(resposta["corpo"])
+
+
+async def _executar(app, caso: Caso, requisicoes: int, concorrencia: int) -> Dict[str, float]:
+    latencias: List[float] = []
+    falhas = 0
+    proxima = 0
+
+    async def trabalhador():
+        nonlocal proxima, falhas
+        while proxima < requisicoes:
+            numero = proxima
+            proxima += 1
+            caminho, corpo = caso.requisicao(numero)
+            dados = json.dumps(corpo).encode() if corpo is not None else b""
+            inicio = time.perf_counter()
+            status, conteudo = await _chamar(app, caso.metodo, caminho, dados)
+            latencias.append(time.perf_counter() - inicio)
+            if status >= 400:
+                falhas += 1
+            elif caso.resposta is not None:
+                falhas += caso.resposta(numero, conteudo)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    percentis = statistics.quantiles(latencias, n=100, method="inclusive") if len(latencias) > 1 else latencias * 99
+    return {
+        "vazao": requisicoes / duracao,
+        "p50": percentis[49] * 1000,
+        "p95": percentis[94] * 1000,
+        "p99": percentis[98] * 1000,
+        "falhas": falhas,
+    }
+
+
+def _casos(quantidades: Dict[str, int], requisicoes: int, semente: int) -> List[Caso]:
+    from app.database import db
+    from app.paginacao import codificar_cursor
+
+    aleatorio = random.Random(semente)
+    sorteios = [aleatorio.random() for _ in range(requisicoes)]
+
+    def sortear(entidade: str, numero: int) -> int:
+        # Os IDs do banco recém-populado vão de 1 até a quantidade gerada
+        return 1 + int(sorteios[numero] * quantidades[entidade])
+
+    emails_funcionarios = [db.get_funcionario_by_id(sortear("funcionarios", i)).email for i in range(requisicoes)]
+    clientes = [db.get_cliente_by_id(sortear("clientes", i)) for i in range(requisicoes)]
+    data_inicial = [date(2010, 1, 1) + timedelta(days=int(sorteio * 5000)) for sorteio in sorteios]
+
+    # IDs criados pelas rotas de escrita, por número da requisição, usados depois
+    # pelas rotas de atualização e remoção
+    criados: Dict[str, Dict[int, int]] = {"funcionarios": {}, "veiculos": {}, "clientes": {}, "vendas": {}}
+    criados_lote: Dict[str, Dict[int, List[int]]] = {"funcionarios": {}, "veiculos": {}, "clientes": {}, "vendas": {}}
+    tamanho_lote = 10
+
+    def guardar(entidade: str):
+        def guardar_id(numero: int, conteudo: bytes) -> int:
+            criados[entidade][numero] = json.loads(conteudo)["id"]
+            return 0
+        return guardar_id
+
+    def guardar_lote(entidade: Optional[str] = None):
+        def guardar_ids(numero: int, conteudo: bytes) -> int:
+            resultado = json.loads(conteudo)
+            if entidade is not None:
+                criados_lote[entidade][numero] = [item["id"] for item in resultado["itens"] if item["sucesso"]]
+            return resultado["falhas"]
+        return guardar_ids
+
+    def funcionario(numero: int, sufixo: str = "") -> dict:
+        return {
+            "nome": f"Carga {numero}",
+            "email": f"carga{sufixo}.{numero}@benchmark.exemplo.com",
+            "cargo": "Vendedor",
+            "data_contratacao": "2024-01-15",
+            "salario": 5000.0 + numero,
+        }
+
+    def veiculo(numero: int) -> dict:
+        return {"marca": "Benchmark", "modelo": f"Modelo {numero % 50}", "ano": 2024, "tipo": "Carro", "preco": 90000.0}
+
+    def cliente(numero: int, sufixo: int = 0) -> dict:
+        return {
+            "nome": f"Cliente carga {numero}",
+            "email": f"cliente{sufixo}.{numero}@benchmark.exemplo.com",
+            "cpf": f"9{sufixo:02d}{numero:08d}",
+        }
+
+    def venda(veiculo_id: int, numero: int) -> dict:
+        return {
+            "veiculo_id": veiculo_id,
+            "cliente_id": sortear("clientes", numero),
+            "funcionario_id": criados["funcionarios"][numero],
+            "data_venda": "2025-01-10",
+            "valor_venda": 88000.0,
+        }
+
+    def lote(entidade: str, numero: int) -> List[int]:
+        return criados_lote[entidade].get(numero, [])
+
+    def cursor(entidade: str, numero: int) -> str:
+        return codificar_cursor(sortear(entidade, numero))
+
+    return [
+        # Leituras
+        Caso("GET /", "GET", lambda i: ("/", None)),
+        Caso("GET /api/funcionarios", "GET", lambda i: ("/api/funcionarios", None)),
+        Caso("GET /api/funcionarios?limit", "GET", lambda i: (f"/api/funcionarios?limit=100&after_id={cursor('funcionarios', i)}", None)),
+        Caso("GET /api/funcionarios?filtros", "GET", lambda i: (
+            f"/api/funcionarios?cargo=Vendedor&salario_min=5000&data_contratacao_inicial={data_inicial[i]}&limit=50", None)),
+        Caso("GET /api/funcionarios?fields", "GET", lambda i: ("/api/funcionarios?fields=nome,cargo&limit=100", None)),
+        Caso("GET /api/funcionarios/estatisticas", "GET", lambda i: ("/api/funcionarios/estatisticas", None)),
+        Caso("GET /api/funcionarios/by-email", "GET", lambda i: (f"/api/funcionarios/by-email/{emails_funcionarios[i]}", None)),
+        Caso("GET /api/funcionarios/{id}", "GET", lambda i: (f"/api/funcionarios/{sortear('funcionarios', i)}", None)),
+        Caso("GET /api/funcionarios/{id}/vendas", "GET", lambda i: (f"/api/funcionarios/{sortear('funcionarios', i)}/vendas", None)),
+        Caso("GET /api/funcionarios/filtro/salario", "GET", lambda i: (
+            f"/api/funcionarios/filtro/salario?salario_min={4000 + i % 50 * 100}&salario_max={4500 + i % 50 * 100}", None)),
+        Caso("GET /api/funcionarios/filtro/data-contratacao", "GET", lambda i: (
+            f"/api/funcionarios/filtro/data-contratacao?data_inicial={data_inicial[i]}&data_final={data_inicial[i] + timedelta(days=180)}", None)),
+        Caso("GET /api/funcionarios/filtro/cargo", "GET", lambda i: ("/api/funcionarios/filtro/cargo/Gerente de Vendas", None)),
+        Caso("GET /api/cargos", "GET", lambda i: ("/api/cargos", None)),
+        Caso("GET /api/veiculos?limit", "GET", lambda i: (f"/api/veiculos?limit=100&after_id={cursor('veiculos', i)}", None)),
+        Caso("GET /api/veiculos/export.ndjson", "GET", lambda i: (
+            f"/api/veiculos/export.ndjson?id_inicial={sortear('veiculos', i)}&id_final={sortear('veiculos', i) + 999}", None)),
+        Caso("GET /api/veiculos/busca", "GET", lambda i: (
+            f"/api/veiculos/busca?marca={('Toyota', 'Fiat', 'Honda')[i % 3]}&ano_min={2012 + i % 10}&disponivel=true", None)),
+        Caso("GET /api/veiculos/busca?modelo", "GET", lambda i: (f"/api/veiculos/busca?modelo={('cor', 'hil', 'tr', 'on')[i % 4]}", None)),
+        Caso("GET /api/veiculos/{id}", "GET", lambda i: (f"/api/veiculos/{sortear('veiculos', i)}", None)),
+        Caso("GET /api/veiculos/{id}/vendas", "GET", lambda i: (f"/api/veiculos/{sortear('veiculos', i)}/vendas", None)),
+        Caso("GET /api/clientes?limit", "GET", lambda i: (f"/api/clientes?limit=100&after_id={cursor('clientes', i)}", None)),
+        Caso("GET /api/clientes/export.ndjson", "GET", lambda i: (
+            f"/api/clientes/export.ndjson?id_inicial={sortear('clientes', i)}&id_final={sortear('clientes', i) + 999}", None)),
+        Caso("GET /api/clientes/by-cpf", "GET", lambda i: (f"/api/clientes/by-cpf/{clientes[i].cpf}", None)),
+        Caso("GET /api/clientes/by-email", "GET", lambda i: (f"/api/clientes/by-email/{clientes[i].email}", None)),
+        Caso("GET /api/clientes/{id}", "GET", lambda i: (f"/api/clientes/{clientes[i].id}", None)),
+        Caso("GET /api/clientes/{id}/vendas", "GET", lambda i: (f"/api/clientes/{clientes[i].id}/vendas", None)),
+        Caso("GET /api/vendas?limit", "GET", lambda i: (f"/api/vendas?limit=100&after_id={cursor('vendas', i)}", None)),
+        Caso("GET /api/vendas/export.ndjson", "GET", lambda i: (
+            f"/api/vendas/export.ndjson?id_inicial={sortear('vendas', i)}&id_final={sortear('vendas', i) + 999}", None)),
+        Caso("GET /api/vendas/analise/receita-mensal", "GET", lambda i: (
+            f"/api/vendas/analise/receita-mensal?data_inicial={data_inicial[i]}", None)),
+        Caso("GET /api/vendas/analise/por-vendedor", "GET", lambda i: ("/api/vendas/analise/por-vendedor", None)),
+        Caso("GET /api/vendas/analise/por-tipo", "GET", lambda i: ("/api/vendas/analise/por-tipo", None)),
+        Caso("GET /api/vendas/analise/por-marca", "GET", lambda i: ("/api/vendas/analise/por-marca", None)),
+        Caso("GET /api/vendas/analise/descontos", "GET", lambda i: ("/api/vendas/analise/descontos", None)),
+        Caso("GET /api/vendas/ranking", "GET", lambda i: ("/api/vendas/ranking?limit=10", None)),
+        Caso("GET /api/vendas/receita", "GET", lambda i: (
+            f"/api/vendas/receita?inicio={data_inicial[i]}&fim={data_inicial[i] + timedelta(days=365)}&granularidade=mes", None)),
+        Caso("GET /api/vendas/{id}", "GET", lambda i: (f"/api/vendas/{sortear('vendas', i)}", None)),
+
+        # Inclusões: os registros criados aqui são atualizados e removidos em seguida
+        Caso("POST /api/funcionarios", "POST", lambda i: ("/api/funcionarios", funcionario(i)), guardar("funcionarios")),
+        Caso("POST /api/funcionarios/lote", "POST", lambda i: (
+            "/api/funcionarios/lote", [funcionario(i * tamanho_lote + j, "lote") for j in range(tamanho_lote)]),
+            guardar_lote("funcionarios")),
+        Caso("POST /api/veiculos", "POST", lambda i: ("/api/veiculos", veiculo(i)), guardar("veiculos")),
+        Caso("POST /api/veiculos/lote", "POST", lambda i: (
+            "/api/veiculos/lote", [veiculo(i * tamanho_lote + j) for j in range(tamanho_lote)]),
+            guardar_lote("veiculos")),
+        Caso("POST /api/clientes", "POST", lambda i: ("/api/clientes", cliente(i)), guardar("clientes")),
+        Caso("POST /api/clientes/lote", "POST", lambda i: (
+            "/api/clientes/lote", [cliente(i * tamanho_lote + j, 1) for j in range(tamanho_lote)]),
+            guardar_lote("clientes")),
+        Caso("POST /api/vendas", "POST", lambda i: ("/api/vendas", venda(criados["veiculos"][i], i)), guardar("vendas")),
+        Caso("POST /api/vendas/lote", "POST", lambda i: (
+            "/api/vendas/lote", [venda(veiculo_id, i) for veiculo_id in lote("veiculos", i)]),
+            guardar_lote("vendas")),
+
+        # Atualizações
+        Caso("PUT /api/funcionarios/{id}", "PUT", lambda i: (
+            f"/api/funcionarios/{criados['funcionarios'][i]}", {**funcionario(i), "salario": 6000.0})),
+        Caso("PUT /api/funcionarios/lote", "PUT", lambda i: ("/api/funcionarios/lote", [
+            {**funcionario(i * tamanho_lote + j, "lote"), "id": funcionario_id, "salario": 6000.0}
+            for j, funcionario_id in enumerate(lote("funcionarios", i))
+        ]), guardar_lote()),
+        Caso("PUT /api/veiculos/{id}", "PUT", lambda i: (f"/api/veiculos/{criados['veiculos'][i]}", {**veiculo(i), "preco": 91000.0})),
+        Caso("PUT /api/veiculos/lote", "PUT", lambda i: ("/api/veiculos/lote", [
+            {**veiculo(j), "id": veiculo_id, "preco": 91000.0} for j, veiculo_id in enumerate(lote("veiculos", i))
+        ]), guardar_lote()),
+        Caso("PUT /api/clientes/{id}", "PUT", lambda i: (f"/api/clientes/{criados['clientes'][i]}", {**cliente(i), "telefone": "(11) 90000-0000"})),
+        Caso("PUT /api/clientes/lote", "PUT", lambda i: ("/api/clientes/lote", [
+            {**cliente(i * tamanho_lote + j, 1), "id": cliente_id, "telefone": "(11) 90000-0000"}
+            for j, cliente_id in enumerate(lote("clientes", i))
+        ]), guardar_lote()),
+        Caso("PUT /api/vendas/{id}", "PUT", lambda i: (
+            f"/api/vendas/{criados['vendas'][i]}", {**venda(criados["veiculos"][i], i), "valor_venda": 87000.0})),
+        Caso("PUT /api/vendas/lote", "PUT", lambda i: ("/api/vendas/lote", [
+            {**venda(veiculo_id, i), "id": venda_id, "valor_venda": 87000.0}
+            for venda_id, veiculo_id in zip(lote("vendas", i), lote("veiculos", i))
+        ]), guardar_lote()),
+
+        # Remoções: as vendas saem primeiro, para liberar veículos, clientes e funcionários
+        Caso("DELETE /api/vendas/{id}", "DELETE", lambda i: (f"/api/vendas/{criados['vendas'][i]}", None)),
+        Caso("DELETE /api/vendas/lote", "DELETE", lambda i: ("/api/vendas/lote", lote("vendas", i)), guardar_lote()),
+        Caso("DELETE /api/funcionarios/{id}", "DELETE", lambda i: (f"/api/funcionarios/{criados['funcionarios'][i]}", None)),
+        Caso("DELETE /api/funcionarios/lote", "DELETE", lambda i: ("/api/funcionarios/lote", lote("funcionarios", i)), guardar_lote()),
+        Caso("DELETE /api/veiculos/{id}", "DELETE", lambda i: (f"/api/veiculos/{criados['veiculos'][i]}", None)),
+        Caso("DELETE /api/veiculos/lote", "DELETE", lambda i: ("/api/veiculos/lote", lote("veiculos", i)), guardar_lote()),
+        Caso("DELETE /api/clientes/{id}", "DELETE", lambda i: (f"/api/clientes/{criados['clientes'][i]}", None)),
+        Caso("DELETE /api/clientes/lote", "DELETE", lambda i: ("/api/clientes/lote", lote("clientes", i)), guardar_lote()),
+    ]
+
+
+def _medir_escala(args) -> int:
+    from app.cache import cache_respostas
+    from app.database import db
+    from app.main import app
+    from app.seed import gerar_dados_sinteticos
+
+    if not db.esta_vazio():
+        print("O banco configurado já possui dados; use um diretório de dados vazio.", file=sys.stderr)
+        return 1
+    if not args.com_cache:
+        cache_respostas.limite_bytes = 0
+
+    escala = args.escala
+    quantidades = {
+        "funcionarios": max(escala // 100, 20),
+        "veiculos": escala,
+        "clientes": max(escala // 5, 1),
+        "vendas": escala // 2,
+    }
+    inicio = time.perf_counter()
+    gerar_dados_sinteticos(semente=args.semente, **quantidades)
+    resumo = ", ".join(f"{quantidade} {entidade}" for entidade, quantidade in quantidades.items())
+    print(f"\n== Escala {escala}: {resumo} (gerados em {time.perf_counter() - inicio:.1f}s)")
+
+    casos = _casos(quantidades, args.requisicoes, args.semente)
+    print(f"{'rota':<48} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'falhas':>7}")
+    falhas = 0
+    for caso in casos:
+        if caso.metodo == "GET":
+            # Aquecimento: as primeiras chamadas preparam caches internos do FastAPI e do pydantic
+            asyncio.run(_executar(app, caso, min(args.requisicoes, 20), args.concorrencia))
+        resultado = asyncio.run(_executar(app, caso, args.requisicoes, args.concorrencia))
+        falhas += resultado["falhas"]
+        print(
+            f"{caso.nome:<48} {resultado['vazao']:>9.0f} {resultado['p50']:>9.2f}"
+            f" {resultado['p95']:>9.2f} {resultado['p99']:>9.2f} {resultado['falhas']:>7}"
+        )
+    db.fechar()
+    return 1 if falhas else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--escala", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por rota")
+    parser.add_argument("--concorrencia", type=int, default=8, help="requisições simultâneas")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--com-cache", action="store_true", help="mantém o cache de respostas ligado")
+    args = parser.parse_args()
+
+    if args.escala is not None:
+        return _medir_escala(args)
+
+    # Cada escala em um processo novo, com o banco vazio e sem memória herdada da anterior
+    codigo = 0
+    for escala in args.escalas:
+        comando = [
+            sys.executable, "-m", "benchmarks.bench_rotas", "--escala", str(escala),
+            "--requisicoes", str(args.requisicoes), "--concorrencia", str(args.concorrencia),
+            "--semente", str(args.semente),
+        ]
+        if args.com_cache:
+            comando.append("--com-cache")
+        codigo = subprocess.call(comando) or codigo
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Compara a serialização das respostas pelo caminho padrão do FastAPI e pelo caminho rápido
+
+O caminho padrão revalida a lista contra o response_model, passa pelo
+jsonable_encoder e só então gera o JSON; o caminho rápido (app.serializacao)
+gera os bytes direto do serializador compilado do pydantic. As duas saídas
+são conferidas antes da medição.
+
+Uso:
+    python -m benchmarks.bench_serializacao [--tamanhos 1000 10000 100000] [--repeticoes 5]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import Cargo, Funcionario, TipoVeiculo, Veiculo, Venda
+from app.serializacao import serializar
+
+
+def _funcionarios(quantidade: int) -> list:
+    cargos = list(Cargo)
+    return [
+        Funcionario(
+            id=i,
+            nome=f"Funcionário {i}",
+            email=f"funcionario{i}@exemplo.com",
+            cargo=cargos[i % len(cargos)],
+            data_contratacao=date(2015, 1, 1) + timedelta(days=i % 3000),
+            salario=1500.0 + i % 20000
+        )
+        for i in range(1, quantidade + 1)
+    ]
+
+
+def _veiculos(quantidade: int) -> list:
+    tipos = list(TipoVeiculo)
+    return [
+        Veiculo(
+            id=i,
+            marca=f"Marca {i % 40}",
+            modelo=f"Modelo {i % 500}",
+            ano=2000 + i % 25,
+            tipo=tipos[i % len(tipos)],
+            preco=20000.0 + i % 100000
+        )
+        for i in range(1, quantidade + 1)
+    ]
+
+
+def _vendas(quantidade: int) -> list:
+    return [
+        Venda(
+            id=i,
+            veiculo_id=i,
+            cliente_id=1 + i % 1000,
+            funcionario_id=1 + i % 100,
+            data_venda=date(2020, 1, 1) + timedelta(days=i % 1500),
+            valor_venda=19000.0 + i % 100000
+        )
+        for i in range(1, quantidade + 1)
+    ]
+
+
+def _caminho_padrao(modelo: type) -> Callable[[list], bytes]:
+    campo = create_response_field(name="resposta", type_=List[modelo], mode="serialization")
+
+    def serializar_padrao(itens: list) -> bytes:
+        conteudo = asyncio.run(serialize_response(field=campo, response_content=itens, is_coroutine=True))
+        return JSONResponse(conteudo).body
+    return serializar_padrao
+
+
+def _medir(funcao: Callable[[list], bytes], itens: list, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(itens)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=5, help="o melhor tempo entre as repetições é o reportado")
+    args = parser.parse_args()
+
+    print(f"{'modelo':<12} {'itens':>8} {'padrão (ms)':>12} {'rápido (ms)':>12} {'ganho':>7}")
+    for nome, gerar, modelo in (
+        ("Funcionario", _funcionarios, Funcionario),
+        ("Veiculo", _veiculos, Veiculo),
+        ("Venda", _vendas, Venda),
+    ):
+        padrao = _caminho_padrao(modelo)
+        for tamanho in args.tamanhos:
+            itens = gerar(tamanho)
+            if json.loads(padrao(itens)) != json.loads(serializar(itens)):
+                raise SystemExit(f"Saídas divergentes para {nome} com {tamanho} itens")
+            tempo_padrao = _medir(padrao, itens, args.repeticoes)
+            tempo_rapido = _medir(serializar, itens, args.repeticoes)
+            print(
+                f"{nome:<12} {tamanho:>8} {tempo_padrao * 1000:>12.1f} {tempo_rapido * 1000:>12.1f}"
+                f" {tempo_padrao / tempo_rapido:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Vazão de leitura e memória por processo com vários workers do uvicorn
+
+Para cada backend, escala e quantidade de workers, um diretório temporário é
+populado pelo gerador sintético (python -m app.seed) e servido por
+"uvicorn app.main:app --workers N". A carga só de leituras (por ID, histórico
+de vendas do veículo e busca no estoque) é enviada por conexões HTTP
+simultâneas; ao final, a memória residente de cada worker é lida de
+/proc/<pid>/status e separada em anônima (RssAnon, própria do processo) e
+mapeada de arquivos (RssFile, páginas do cache do sistema compartilhadas).
+
+Com o backend compartilhado, a memória anônima de cada worker não deve
+crescer com a escala: os dados ficam na publicação mapeada. A vazão só
+escala com os workers quando há núcleos livres para eles.
+
+Uso:
+    python -m benchmarks.bench_workers [--backends compartilhado sqlite] [--workers 1 2 4] [--escalas 10000 100000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_assincrono import _aguardar_servidor, _carga
+
+
+BACKENDS = ("compartilhado", "sqlite")
+
+
+def _quantidades(escala: int) -> Dict[str, int]:
+    return {"funcionarios": max(20, escala // 100), "veiculos": escala, "clientes": escala // 5, "vendas": escala // 2}
+
+
+def _leituras(quantidades: Dict[str, int], semente: int) -> Callable[[int], Tuple[str, str, Optional[dict]]]:
+    aleatorio = random.Random(semente)
+    marcas = ("Toyota", "Volkswagen", "Fiat", "Honda", "Hyundai")
+
+    def requisicao(numero: int) -> Tuple[str, str, Optional[dict]]:
+        sorteio = aleatorio.random()
+        if sorteio < 0.3:
+            return "GET", f"/api/veiculos/{aleatorio.randint(1, quantidades['veiculos'])}", None
+        if sorteio < 0.5:
+            return "GET", f"/api/clientes/{aleatorio.randint(1, quantidades['clientes'])}", None
+        if sorteio < 0.7:
+            return "GET", f"/api/vendas/{aleatorio.randint(1, quantidades['vendas'])}", None
+        if sorteio < 0.9:
+            return "GET", f"/api/veiculos/{aleatorio.randint(1, quantidades['veiculos'])}/vendas", None
+        return "GET", f"/api/veiculos/busca?marca={aleatorio.choice(marcas)}&disponivel=true&limit=10", None
+    return requisicao
+
+
+def _memoria(pid: int) -> Dict[str, int]:
+    # Valores em kB, como aparecem no arquivo
+    with open(f"/proc/{pid}/status") as arquivo:
+        campos = dict(linha.split(":", 1) for linha in arquivo.read().splitlines() if ":" in linha)
+    return {nome: int(campos[nome].split()[0]) for nome in ("RssAnon", "RssFile")}
+
+
+def _workers(pid: int) -> List[int]:
+    """
+    PIDs dos workers do uvicorn; com um único worker, é o próprio processo principal
+    """
+    workers = []
+    for tarefa in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tarefa}/children") as arquivo:
+            for filho in map(int, arquivo.read().split()):
+                with open(f"/proc/{filho}/cmdline", "rb") as comando:
+                    # O multiprocessing também inicia um processo auxiliar (resource_tracker)
+                    if b"resource_tracker" not in comando.read():
+                        workers.append(filho)
+    return workers or [pid]
+
+
+def _medir(backend: str, escala: int, workers: int, args) -> int:
+    diretorio = tempfile.mkdtemp(prefix="bench_workers_")
+    ambiente = {**os.environ, "CONCESSIONARIA_BACKEND": backend, "CONCESSIONARIA_DIRETORIO_DADOS": diretorio}
+    ambiente.pop("CONCESSIONARIA_SQLITE_CAMINHO", None)
+    quantidades = _quantidades(escala)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "app.seed", "--semente", str(args.semente),
+             *(f"--{entidade}={quantidade}" for entidade, quantidade in quantidades.items())],
+            env=ambiente, check=True, stdout=subprocess.DEVNULL
+        )
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.porta), "--workers", str(workers),
+             "--log-level", "warning", "--no-access-log", "--backlog", "4096"],
+            env=ambiente
+        )
+        try:
+            _aguardar_servidor(servidor, args.porta)
+            # Aquecimento, que também garante que todos os workers já abriram os dados
+            asyncio.run(_carga(args.porta, _leituras(quantidades, args.semente + 1), 2000, 32))
+            resultado = asyncio.run(_carga(args.porta, _leituras(quantidades, args.semente), args.requisicoes, args.conexoes))
+            memorias = [_memoria(pid) for pid in _workers(servidor.pid)]
+        finally:
+            servidor.send_signal(signal.SIGINT)
+            servidor.wait()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    anonima = [memoria["RssAnon"] / 1024 for memoria in memorias]
+    arquivo = [memoria["RssFile"] / 1024 for memoria in memorias]
+    print(
+        f"{backend:<14} {escala:>9} {workers:>7} {resultado['vazao']:>8.0f} {resultado['p99']:>9.2f}"
+        f" {min(anonima):>9.1f} {max(anonima):>9.1f} {max(arquivo):>9.1f} {resultado['falhas']:>7}",
+        flush=True
+    )
+    return 1 if resultado["falhas"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4], help="quantidades de workers medidas")
+    parser.add_argument("--escalas", nargs="+", type=int, default=[10000, 100000], help="veículos gerados em cada escala")
+    parser.add_argument("--conexoes", type=int, default=200, help="conexões simultâneas")
+    parser.add_argument("--requisicoes", type=int, default=20000, help="total de requisições por medição")
+    parser.add_argument("--porta", type=int, default=8766)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} núcleos, {args.conexoes} conexões, {args.requisicoes} requisições (memória em MB por worker)")
+    print(
+        f"{'backend':<14} {'escala':>9} {'workers':>7} {'req/s':>8} {'p99 ms':>9}"
+        f" {'anôn mín':>9} {'anôn máx':>9} {'arquivo':>9} {'falhas':>7}",
+        flush=True
+    )
+    codigo = 0
+    for backend in args.backends:
+        for escala in args.escalas:
+            for workers in args.workers:
+                codigo = _medir(backend, escala, workers, args) or codigo
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Teste de estresse do Database compartilhado entre várias threads
+
+Dispara escritores (funcionários, veículos em lote, vendas e remoções) e
+leitores (listagens e estatísticas) ao mesmo tempo e, ao final, confere que
+os IDs são únicos e que contagens, estatísticas e índices batem entre si.
+Todos os escritores também disputam a venda dos mesmos veículos, que não
+podem ser vendidos mais de uma vez.
+
+Uso:
+    python -m benchmarks.stress_concorrencia [--threads 32] [--operacoes 500] [--wal DIRETORIO]
+
+Com --wal, o banco usa o log de escrita antecipada e é reaberto no final
+para verificar que a recuperação reproduz o mesmo estado.
+Termina com código 1 se alguma inconsistência for encontrada.
+"""
+import argparse
+import random
+import shutil
+import sys
+import threading
+import time
+from datetime import date
+
+from app.database import Database
+from app.erros import ErroIntegridade
+from app.models import Cargo, Cliente, Funcionario, TipoVeiculo, Veiculo, Venda
+from app.persistencia import ArmazenamentoWAL
+
+
+def _escritor(
+    db: Database,
+    semente: int,
+    operacoes: int,
+    cliente_id: int,
+    disputados: list,
+    criados: dict,
+    trava: threading.Lock
+) -> None:
+    aleatorio = random.Random(semente)
+    funcionarios, veiculos, vendas, removidos = [], [], [], []
+    for i in range(operacoes):
+        funcionario = db.add_funcionario(Funcionario(
+            nome=f"Funcionário {semente}-{i}",
+            email=f"f{semente}-{i}@exemplo.com",
+            cargo=aleatorio.choice(list(Cargo)),
+            data_contratacao=date(2015 + aleatorio.randrange(10), 1 + aleatorio.randrange(12), 1),
+            salario=float(aleatorio.randrange(1500, 30000))
+        ))
+        funcionarios.append(funcionario.id)
+        lote = db.add_veiculos([
+            Veiculo(marca="Marca", modelo=f"Modelo {j}", ano=2020, tipo=TipoVeiculo.CARRO, preco=50000.0)
+            for j in range(3)
+        ])
+        veiculos.extend(v.id for v in lote)
+        venda = db.add_venda(Venda(
+            veiculo_id=lote[0].id,
+            cliente_id=cliente_id,
+            funcionario_id=funcionario.id,
+            data_venda=date(2024, 1, 1),
+            valor_venda=49000.0
+        ))
+        vendas.append(venda.id)
+        try:
+            venda = db.add_venda(Venda(
+                veiculo_id=disputados[i],
+                cliente_id=cliente_id,
+                funcionario_id=funcionario.id,
+                data_venda=date(2024, 1, 2),
+                valor_venda=48000.0
+            ))
+            vendas.append(venda.id)
+        except ErroIntegridade:
+            pass
+        if i % 4 == 0 and db.delete_veiculo(lote[2].id):
+            removidos.append(lote[2].id)
+        if i % 5 == 0:
+            db.update_funcionario(funcionario.id, Funcionario(
+                nome=funcionario.nome,
+                email=funcionario.email,
+                cargo=Cargo.GERENTE_VENDAS,
+                data_contratacao=funcionario.data_contratacao,
+                salario=funcionario.salario + 100
+            ))
+    with trava:
+        criados["funcionarios"].extend(funcionarios)
+        criados["veiculos"].extend(veiculos)
+        criados["vendas"].extend(vendas)
+        criados["veiculos_removidos"].extend(removidos)
+
+
+def _leitor(db: Database, parar: threading.Event, falhas: list) -> None:
+    while not parar.is_set():
+        estatisticas = db.calcular_estatisticas()
+        por_cargo = sum(e.quantidade for e in estatisticas.estatisticas_por_cargo)
+        if por_cargo != estatisticas.total_funcionarios:
+            falhas.append(f"Estatísticas inconsistentes durante a leitura: {por_cargo} != {estatisticas.total_funcionarios}")
+        db.get_all_veiculos()
+        db.consultar_funcionarios(salario_min=5000, salario_max=20000)
+        # Uma pequena pausa imita clientes consultando repetidamente, sem monopolizar o GIL
+        time.sleep(0.001)
+
+
+def verificar(db: Database, criados: dict) -> list:
+    falhas = []
+    for colecao in ("funcionarios", "veiculos", "vendas"):
+        ids = criados[colecao]
+        if len(ids) != len(set(ids)):
+            falhas.append(f"IDs duplicados em {colecao}: {len(ids) - len(set(ids))}")
+
+    esperados = {
+        "funcionarios": len(criados["funcionarios"]),
+        "veiculos": len(criados["veiculos"]) - len(criados["veiculos_removidos"]),
+        "vendas": len(criados["vendas"]),
+    }
+    obtidos = {
+        "funcionarios": len(db.get_all_funcionarios()),
+        "veiculos": len(db.get_all_veiculos()),
+        "vendas": len(db.get_all_vendas()),
+    }
+    if esperados != obtidos:
+        falhas.append(f"Contagens divergentes: esperado {esperados}, obtido {obtidos}")
+
+    funcionarios = db.get_all_funcionarios()
+    estatisticas = db.calcular_estatisticas()
+    if estatisticas.total_funcionarios != len(funcionarios):
+        falhas.append("Total das estatísticas difere da quantidade de funcionários")
+    if abs(estatisticas.total_salarios - sum(f.salario for f in funcionarios)) > 0.01:
+        falhas.append("Soma de salários das estatísticas difere da soma real")
+    if len(db.filtrar_por_salario()) != len(funcionarios):
+        falhas.append("Índice de salário fora de sincronia com a tabela")
+    if len(db.filtrar_por_data_contratacao()) != len(funcionarios):
+        falhas.append("Índice de data de contratação fora de sincronia com a tabela")
+
+    vendas_por_veiculo: dict = {}
+    for venda in db.get_all_vendas():
+        vendas_por_veiculo[venda.veiculo_id] = vendas_por_veiculo.get(venda.veiculo_id, 0) + 1
+    vendidos_duas_vezes = sum(1 for quantidade in vendas_por_veiculo.values() if quantidade > 1)
+    if vendidos_duas_vezes:
+        falhas.append(f"{vendidos_duas_vezes} veículos vendidos mais de uma vez")
+    if any(veiculo.disponivel for veiculo in db.get_all_veiculos() if veiculo.id in vendas_por_veiculo):
+        falhas.append("Veículo vendido continua marcado como disponível")
+    return falhas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--leitores", type=int, default=4)
+    parser.add_argument("--operacoes", type=int, default=500, help="iterações por thread escritora")
+    parser.add_argument("--wal", help="diretório (apagado antes do teste) para usar o backend com WAL")
+    args = parser.parse_args()
+
+    if args.wal:
+        shutil.rmtree(args.wal, ignore_errors=True)
+        db = Database(ArmazenamentoWAL(args.wal, operacoes_por_snapshot=5000))
+    else:
+        db = Database()
+
+    cliente = db.add_cliente(Cliente(nome="Cliente", email="cliente@exemplo.com", cpf="000.000.000-00"))
+    disputados = [
+        veiculo.id for veiculo in db.add_veiculos([
+            Veiculo(marca="Marca", modelo="Disputado", ano=2020, tipo=TipoVeiculo.CARRO, preco=50000.0)
+            for _ in range(args.operacoes)
+        ])
+    ]
+    criados = {"funcionarios": [], "veiculos": list(disputados), "vendas": [], "veiculos_removidos": []}
+    trava = threading.Lock()
+    parar = threading.Event()
+    falhas: list = []
+
+    leitores = [threading.Thread(target=_leitor, args=(db, parar, falhas)) for _ in range(args.leitores)]
+    escritores = [
+        threading.Thread(target=_escritor, args=(db, semente, args.operacoes, cliente.id, disputados, criados, trava))
+        for semente in range(args.threads)
+    ]
+    inicio = time.perf_counter()
+    for thread in leitores + escritores:
+        thread.start()
+    for thread in escritores:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    for thread in leitores:
+        thread.join()
+
+    falhas.extend(verificar(db, criados))
+    if args.wal:
+        db.fechar()
+        recuperado = Database(ArmazenamentoWAL(args.wal))
+        falhas.extend(f"Após recuperação: {falha}" for falha in verificar(recuperado, criados))
+        recuperado.fechar()
+
+    escritas = args.threads * args.operacoes
+    print(f"{args.threads} escritores x {args.operacoes} iterações em {duracao:.2f}s ({escritas / duracao:.0f} iterações/s)")
+    if falhas:
+        for falha in falhas[:20]:
+            print(f"FALHA: {falha}")
+        return 1
+    print("OK: IDs únicos, contagens consistentes e nenhum veículo vendido duas vezes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())